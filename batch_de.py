@@ -0,0 +1,55 @@
+"""
+Batch extraction: run one extraction config over many PDFs with Parser.perform_de_batch().
+
+Documents are pipelined (see parser.args.document_workers / ingest_workers in
+settings.yml): the next PDF is rasterized and embedded while the previous ones are in
+VLM extraction, and the VLM batches requests across documents.
+
+Usage (from the project root, with PROJECT_ROOT set):
+    python batch_de.py --config de_config/1008.json --output-dir output/ dataset/*.pdf
+    python batch_de.py --config de_config/1008.json --output-dir output/ --input-dir dataset/
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+from src import Parser
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*", help="PDF files to extract.")
+    parser.add_argument("--input-dir", help="Also extract every *.pdf in this directory.")
+    parser.add_argument("--config", required=True, help="Extraction config (de_config JSON) shared by all PDFs.")
+    parser.add_argument("--output-dir", required=True, help="Directory for <pdf stem>.json outputs.")
+    args = parser.parse_args()
+
+    pdf_paths = list(args.pdfs)
+    if args.input_dir:
+        pdf_paths += sorted(glob.glob(os.path.join(args.input_dir, "*.pdf")))
+    # The same file may be listed and found in --input-dir; extract it once
+    pdf_paths = list(dict.fromkeys(os.path.abspath(pdf_path) for pdf_path in pdf_paths))
+    if not pdf_paths:
+        parser.error("no PDFs given")
+
+    with open(args.config, "r") as f:
+        extraction_config = json.load(f)
+
+    # Reject colliding outputs before loading any model
+    try:
+        Parser.batch_output_paths(pdf_paths, args.output_dir)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = Parser(extraction_config_path=args.config).perform_de_batch(pdf_paths, extraction_config, args.output_dir)
+
+    failed = [pdf_path for pdf_path, result in results.items() if isinstance(result, Exception)]
+    print(f"Extracted {len(results) - len(failed)}/{len(results)} documents into {args.output_dir}.")
+    for pdf_path in failed:
+        print(f"  failed: {pdf_path}: {results[pdf_path]}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
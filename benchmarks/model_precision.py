@@ -0,0 +1,109 @@
+"""
+Latency / memory / accuracy benchmark for the VLM's load-time precision settings
+(model_manager.models.<vlm>.precision and .quantization, see models.ModelPrecision).
+
+Each setting is written as PRECISION or PRECISION+QUANTIZATION, e.g. fp32, bf16,
+fp32+dynamic_int8. For every setting the VLM is reloaded, every (PDF, de_config) pair
+is extracted end to end with Parser.perform_de(), and the benchmark reports:
+
+  - weights MB:   size of the VLM's weights (quantized weights counted packed)
+  - load s:       time to load the VLM
+  - extract s:    total perform_de() wall time over all pairs
+  - match:        share of fields whose value equals the value extracted with the
+                  first setting (whitespace- and case-insensitive); 1.0 for the first
+
+The first setting is the accuracy reference, so list the most precise one first.
+
+Usage (from the project root, with PROJECT_ROOT set):
+    python -m benchmarks.model_precision --settings fp32 bf16 fp32+dynamic_int8
+    python -m benchmarks.model_precision --pair dataset/1008.pdf de_config/1008_small.json
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+from config.loader import settings
+from common import TensorLRUCache
+from models.ModelManager import ModelManager
+from src import Parser
+
+DEFAULT_PAIRS = [
+    ("dataset/1008.pdf", "de_config/1008_small.json"),
+    ("dataset/form2-2.pdf", "de_config/form2-2.json"),
+]
+
+
+def parse_setting(setting):
+    precision, _, quantization = setting.partition("+")
+    return precision or None, quantization or None
+
+
+def normalise(value):
+    if isinstance(value, list):
+        value = " ".join(str(point.get("value", "")) if isinstance(point, dict) else str(point) for point in value)
+    return " ".join(str(value or "").split()).lower()
+
+
+def weights_mb(model):
+    return sum(TensorLRUCache.nbytes(tensor) for tensor in model.state_dict().values()) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pair", nargs=2, action="append", metavar=("PDF", "DE_CONFIG"),
+                        help="PDF and de_config to extract; repeatable. Defaults to two dataset/ pairs.")
+    parser.add_argument("--settings", nargs="+", default=["fp32", "bf16", "fp32+dynamic_int8"])
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    pairs = [(pdf, config) for pdf, config in (args.pair or DEFAULT_PAIRS) if os.path.exists(pdf)]
+    vlm_candidate = settings.get("parser", {}).get("args", {}).get("vlm_candidate", "QwenV25Infer")
+    vlm_config = ModelManager.config["models"][vlm_candidate]
+
+    reference = None
+    results = []
+    print(f"{'setting':>20} {'weights MB':>11} {'load s':>8} {'extract s':>10} {'match':>7}")
+    for setting in args.settings:
+        precision, quantization = parse_setting(setting)
+        vlm_config["precision"], vlm_config["quantization"] = precision, quantization
+        # Drop the previous VLM so Parser() loads it again with this setting
+        ModelManager.unload(vlm_candidate)
+
+        start = time.perf_counter()
+        pipeline = Parser()
+        vlm = ModelManager.get_model(vlm_candidate)
+        load_s = time.perf_counter() - start
+
+        values = {}
+        start = time.perf_counter()
+        for pdf_path, config_path in pairs:
+            with open(config_path, "r") as f:
+                extraction_config = json.load(f)
+            with tempfile.NamedTemporaryFile(suffix=".json") as output:
+                outputs = pipeline.perform_de(pdf_path, extraction_config, output.name)
+            for entry in outputs.model_dump():
+                values[(pdf_path, config_path, entry["field_name"])] = normalise(entry.get("value"))
+        extract_s = time.perf_counter() - start
+
+        if reference is None:
+            reference = values
+        match = sum(values.get(key) == value for key, value in reference.items()) / max(1, len(reference))
+
+        row = {
+            "setting": setting,
+            "weights_mb": weights_mb(vlm.model),
+            "load_s": load_s,
+            "extract_s": extract_s,
+            "match": match,
+        }
+        results.append(row)
+        print(f"{setting:>20} {row['weights_mb']:>11.0f} {load_s:>8.1f} {extract_s:>10.1f} {match:>7.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Retrieval-quality benchmark for token pooling (PDFProcessor token_pool_factor).
+
+For every (PDF, de_config) pair, pages are embedded once without pooling and then
+pooled in memory with TokenPooler at each requested factor. Every item's retrieval
+query is scored against the raw and the pooled embeddings, and the benchmark reports:
+
+  - tokens/page:  mean number of vectors per page
+  - recall@k:     share of items with probable_pages whose top-k contains one of them
+  - overlap@k:    mean overlap of the top-k with the unpooled top-k
+  - score ms:     wall time of one query × page MaxSim pass over the whole document
+
+Usage (from the project root, with PROJECT_ROOT set):
+    python -m benchmarks.token_pooling --factors 2 3 4 --top-k 3
+    python -m benchmarks.token_pooling --pair dataset/1008.pdf de_config/1008.json
+"""
+import os
+import json
+import time
+import argparse
+import torch
+from config.loader import settings
+from models.ModelManager import ModelManager
+from extraction_io.ExtractionItems import ExtractionItems
+from vector_retrieve import PDFProcessor, TokenPooler
+from src.helper.PageFinder import PageFinder
+
+DEFAULT_PAIRS = [
+    ("dataset/1008.pdf", "de_config/1008.json"),
+    ("dataset/1008.pdf", "de_config/1008_small.json"),
+    ("dataset/form2-2.pdf", "de_config/form2-2.json"),
+    ("dataset/sls_new.pdf", "de_config/sls_new.json"),
+]
+
+
+def evaluate(pdf_processor, embeddings, queries, probable_pages, top_k, baseline=None, repeats=3):
+    """
+    Score `queries` against `embeddings` and compute the metrics of one configuration.
+    """
+    query_embeddings = pdf_processor.embed_queries(queries)
+    page_nums = [page_num for page_num, _ in embeddings]
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        scores = pdf_processor.score_pages(embeddings, query_embeddings).float().cpu()
+        timings.append(time.perf_counter() - start)
+    top_pages = pdf_processor._top_pages(scores, page_nums, top_k)
+
+    labelled = [(pages, expected) for pages, expected in zip(top_pages, probable_pages) if expected]
+    recall = sum(bool(set(pages) & set(expected)) for pages, expected in labelled) / len(labelled) if labelled else float("nan")
+    overlap = float("nan")
+    if baseline is not None:
+        overlap = sum(len(set(a) & set(b)) / max(1, len(b)) for a, b in zip(top_pages, baseline)) / len(top_pages)
+
+    return {
+        "tokens_per_page": sum(emb.reshape(-1, emb.shape[-1]).shape[0] for _, emb in embeddings) / len(embeddings),
+        "recall": recall,
+        "overlap": overlap,
+        "score_ms": 1000 * min(timings),
+        "top_pages": top_pages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pair", nargs=2, action="append", metavar=("PDF", "DE_CONFIG"),
+                        help="PDF and de_config to evaluate; repeatable. Defaults to the dataset/ pairs.")
+    parser.add_argument("--factors", nargs="+", type=float, default=[2, 3, 4])
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    parser_cfg = settings.get("parser", {}).get("args", {})
+    embedding_candidate = parser_cfg.get("embedding_candidate", "ColPaliInfer")
+    ModelManager.initialize_models(torch.device(parser_cfg.get("device", "cpu")), model_classes=[embedding_candidate])
+
+    # Unpooled embeddings come from (or go into) the regular page cache
+    pdf_processor_cfg = dict(settings.get("pdf_processor", {}).get("args", {}))
+    pdf_processor_cfg.update(token_pool_factor=None)
+    pdf_processor = PDFProcessor(getattr(ModelManager, embedding_candidate), **pdf_processor_cfg)
+    page_finder = PageFinder(pdf_processor)
+
+    results = []
+    for pdf_path, config_path in args.pair or DEFAULT_PAIRS:
+        if not os.path.exists(pdf_path):
+            print(f"Skipping {pdf_path}: file not found")
+            continue
+        with open(config_path, "r") as f:
+            items = [item for item in ExtractionItems.model_validate(json.load(f)) if not item.parent]
+        queries = [page_finder.build_query(item) for item in items]
+        probable_pages = [item.probable_pages or [] for item in items]
+
+        doc_key = pdf_processor.page_cache.document_key(pdf_path)
+        stores = pdf_processor.pdf_to_images(pdf_path, with_checkboxes=False)
+        embeddings = pdf_processor.generate_embeddings(stores["embedding"], doc_key)
+        for store in stores.values():
+            store.clear()
+
+        baseline = evaluate(pdf_processor, embeddings, queries, probable_pages, args.top_k)
+        rows = [("none", baseline)]
+        for factor in args.factors:
+            pooler = TokenPooler(factor)
+            pooled = [(page_num, pooler.pool(emb.float())) for page_num, emb in embeddings]
+            rows.append((f"{factor:g}", evaluate(pdf_processor, pooled, queries, probable_pages, args.top_k,
+                                                 baseline=baseline["top_pages"])))
+
+        print(f"\n{pdf_path} × {config_path}  ({len(embeddings)} pages, {len(queries)} queries, "
+              f"{sum(bool(p) for p in probable_pages)} labelled)")
+        print(f"{'pool':>6} {'tokens/page':>12} {f'recall@{args.top_k}':>10} {f'overlap@{args.top_k}':>11} {'score ms':>9}")
+        for name, row in rows:
+            print(f"{name:>6} {row['tokens_per_page']:>12.1f} {row['recall']:>10.3f} {row['overlap']:>11.3f} {row['score_ms']:>9.2f}")
+            results.append({
+                "pdf": pdf_path,
+                "config": config_path,
+                "pool_factor": name,
+                **{key: value for key, value in row.items() if key != "top_pages"},
+            })
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,216 @@
 # common/extraction_state.py
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
-from typing import List, Tuple, Any, Union, Dict
+from typing import List, Tuple, Any, Union, Dict, Iterator, Optional
 import torch
 from extraction_io.ExtractionOutputs import ExtractionOutput
 from extraction_io.ExtractionItems import ExtractionItems
 from common.BaseComponent import BaseComponent
+from common.PageStore import PageStore
+
+
+# The ExtractionState of the document being extracted in the current context
+_current_state: ContextVar[Optional["ExtractionState"]] = ContextVar("extraction_state", default=None)
 
 
 @dataclass
 class ExtractionState(BaseComponent):
     """
-    Holds global images, embeddings, and extraction entries state for a document extraction cycle.
-    Uses class variables to maintain state.
+    Holds the images, embeddings, and extraction entries of one document extraction.
+
+    Each document gets its own instance, made current for the extraction by scope()
+    and stored in a contextvars.ContextVar. The classmethods below read and write the
+    current instance, so parsers and helpers keep calling ExtractionState.get_*()
+    while several documents are extracted at once in one process (one per thread or
+    task) without seeing each other's state. Worker threads started for a document
+    must run in a copy of its context (contextvars.copy_context(), as DagExecutor does);
+    reading the state where none is current raises instead of silently starting an
+    empty one.
     """
-    extraction_items: Union[List[dict], ExtractionItems]
-    current_extraction_item: ExtractionItems
-    images: List[Tuple[int, str]] = field(default_factory=list)
+    # Identifies the document extraction, e.g. to key per-document caches shared by threads
+    document_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    extraction_items: Union[List[dict], ExtractionItems, None] = None
+    current_extraction_item: Any = None
+    images: Union[PageStore, List[Tuple[int, Any]]] = field(default_factory=list)
     embeddings: List[Tuple[int, torch.Tensor]] = field(default_factory=list)
     response: List[ExtractionOutput] = field(default_factory=list)  # Holds raw extraction entries or validated models
     checkboxes: Dict[int, dict] = field(default_factory=dict)
+    retrieved_pages: Dict[str, List[int]] = field(default_factory=dict)  # field_name -> pages from the retrieval plan
+    # Hash indexes kept in step with the fields above by the setters, for O(1) lookups
+    _responses_by_field: Dict[str, Any] = field(default_factory=dict, repr=False)
+    _items_by_field: Dict[str, Any] = field(default_factory=dict, repr=False)
+    _images_by_page: Dict[int, Any] = field(default_factory=dict, repr=False)
+    _embeddings_by_page: Dict[int, torch.Tensor] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def current(cls) -> "ExtractionState":
+        """
+        The state of the current context.
+
+        Raises:
+            RuntimeError: If no state is current, i.e. the caller runs outside scope()
+                (and after no reset()) or in a thread started without copy_context().
+        """
+        state = _current_state.get()
+        if state is None:
+            raise RuntimeError(
+                "No ExtractionState is current: run inside ExtractionState.scope(), and start "
+                "worker threads in a copy of the document's context (contextvars.copy_context())"
+            )
+        return state
+
+    @classmethod
+    @contextmanager
+    def scope(cls) -> Iterator["ExtractionState"]:
+        """
+        Make a fresh state current for the duration of one document extraction, then
+        release its page buffers and restore the previous state.
+        """
+        state = cls()
+        token = _current_state.set(state)
+        try:
+            yield state
+        finally:
+            state.release()
+            _current_state.reset(token)
+
+    def release(self):
+        if isinstance(self.images, PageStore):
+            # Release the document's page buffers and spill files
+            self.images.clear()
+        self.images = []
+        self.embeddings = []
+        self._images_by_page = {}
+        self._embeddings_by_page = {}
+
+    @staticmethod
+    def _response_field_name(entry: Any) -> Optional[str]:
+        root = getattr(entry, "root", None)
+        return getattr(root, "field_name", None)
+
+    def _index_response(self, entry: Any):
+        field_name = self._response_field_name(entry)
+        if field_name is not None:
+            # The first response of a field wins, as with a scan of the list
+            self._responses_by_field.setdefault(field_name, entry)
 
-    
     @classmethod
     def reset(cls):
         """
-        Clear images, embeddings, and entries for a new extraction cycle.
+        Clear images, embeddings, and entries of the current state for a new extraction cycle.
+        Legacy entry point for callers that do not use scope(): if no state is current,
+        a fresh one is created and made current for the rest of the context.
         """
-        cls.images = []
-        cls.embeddings = []
-        cls.response = []
-        cls.extraction_config = None
-        cls.checkboxes = {}
+        state = _current_state.get()
+        if state is None:
+            _current_state.set(cls())
+            return
+        state.release()
+        state.response = []
+        state._responses_by_field = {}
+        state.checkboxes = {}
+        state.retrieved_pages = {}
 
     @classmethod
     def update_curr_extraction_item(cls, idx: int):
-        cls.current_extraction_item = cls.extraction_items[idx]
+        state = cls.current()
+        state.current_extraction_item = state.extraction_items[idx]
 
     @classmethod
     def set_images(cls, imgs):
-        cls.images = imgs
+        """
+        Store the document's page images: a PageStore (already indexed by page) or a
+        list of (page_num, image) tuples, which is indexed here.
+        """
+        state = cls.current()
+        state.images = imgs
+        state._images_by_page = {} if isinstance(imgs, PageStore) else dict(imgs)
 
     @classmethod
     def set_embeddings(cls, embs):
-        cls.embeddings = embs
+        state = cls.current()
+        state.embeddings = embs
+        state._embeddings_by_page = dict(embs)
 
     @classmethod
     def add_response(cls, entry: Any):
         """
         Add a single extraction entry (could be a dict or Pydantic model).
         """
-        cls.response.append(entry)
+        state = cls.current()
+        state.response.append(entry)
+        state._index_response(entry)
 
     @classmethod
     def set_responses(cls, response_list: List[Any]):
         """
         Replace the entire entries list with a new list.
         """
-        cls.response = response_list
+        state = cls.current()
+        state.response = response_list
+        state._responses_by_field = {}
+        for entry in response_list:
+            state._index_response(entry)
 
     @classmethod
     def set_extraction_items(cls, extraction_items: Union[List[dict], ExtractionItems]):
-        cls.extraction_items = extraction_items
+        state = cls.current()
+        state.extraction_items = extraction_items
+        state._items_by_field = {}
+        for item in extraction_items or []:
+            field_name = getattr(item, "field_name", None)
+            if field_name is not None:
+                state._items_by_field.setdefault(field_name, item)
+
+    @classmethod
+    def get_document_id(cls) -> Optional[str]:
+        """
+        Id of the current document extraction; None outside of one (e.g. a VLM call
+        made directly), which only disables per-document caching.
+        """
+        state = _current_state.get()
+        return state.document_id if state is not None else None
 
     @classmethod
     def get_images(cls):
-        return cls.images
+        return cls.current().images
+
+    @classmethod
+    def get_page_image(cls, page_num: int):
+        """
+        Get the decoded image of a page in O(1), or None if the page does not exist.
+
+        Images come from the document's PageStore, an LRU of decoded pages shared by
+        every parser, so each page is decoded once per document however many
+        extraction items look at it.
+        """
+        state = cls.current()
+        if isinstance(state.images, PageStore):
+            return state.images.get(page_num)
+        return state._images_by_page.get(page_num)
 
     @classmethod
     def get_embeddings(cls):
-        return cls.embeddings
+        return cls.current().embeddings
+
+    @classmethod
+    def get_page_embedding(cls, page_num: int):
+        """
+        Get the embedding of a page in O(1), or None if the page has none.
+        """
+        return cls.current()._embeddings_by_page.get(page_num)
 
     @classmethod
     def get_responses(cls):
-        return cls.response
+        return cls.current().response
 
     
     @classmethod
     def get_response_by_field_name(cls, field_name: str) -> Any:
         """
-        Get response item matching the given field name.
+        Get response item matching the given field name, in O(1) from the field_name index.
 
         Args:
             field_name: The field name to search for
@@ -86,21 +218,20 @@ class ExtractionState(BaseComponent):
         Returns:
             Matching response item or None if not found
         """
-        matches = [r for r in cls.response if hasattr(r, 'root') and hasattr(r.root, 'field_name')  and r.root.field_name == field_name]
-        return matches[0] if matches else None
+        return cls.current()._responses_by_field.get(field_name)
 
     @classmethod
     def get_extraction_items(cls):
-        return cls.extraction_items
+        return cls.current().extraction_items
 
     @classmethod
     def get_extraction_item(cls, idx: int):
-        return cls.extraction_items[idx]
+        return cls.current().extraction_items[idx]
 
     @classmethod
     def get_extraction_item_by_fieldname(cls, field_name: str) -> Any:
         """
-        Get extraction item matching the given field name.
+        Get extraction item matching the given field name, in O(1) from the field_name index.
 
         Args:
             field_name: The field name to search for
@@ -108,21 +239,30 @@ class ExtractionState(BaseComponent):
         Returns:
             Matching extraction item or None if not found
         """
-        matches = [item for item in cls.extraction_items if
-                   hasattr(item, 'field_name') and item.field_name == field_name]
-        return matches[0] if matches else None
+        return cls.current()._items_by_field.get(field_name)
 
     @classmethod
     def get_current_extraction_item(cls):
-        return cls.current_extraction_item
+        return cls.current().current_extraction_item
+
+    @classmethod
+    def set_retrieved_pages(cls, retrieved_pages: Dict[str, List[int]]):
+        cls.current().retrieved_pages = retrieved_pages
+
+    @classmethod
+    def get_retrieved_pages(cls, field_name: str):
+        """
+        Pages planned for field_name by PageFinder.plan(), or None if it was not planned.
+        """
+        return cls.current().retrieved_pages.get(field_name)
 
     @classmethod
     def set_checkboxes(cls, boxes: Dict[int, dict]):
-        cls.checkboxes = boxes
+        cls.current().checkboxes = boxes
 
     @classmethod
     def get_checkboxes(cls):
-        return cls.checkboxes
+        return cls.current().checkboxes
 
     @classmethod
     def has_checkboxes(cls) -> bool:
@@ -131,4 +271,4 @@ class ExtractionState(BaseComponent):
         Returns:
             bool: True if there are checkboxes, False otherwise
         """
-        return len(cls.checkboxes) > 0
+        return len(cls.current().checkboxes) > 0
@@ -12,6 +12,8 @@ class InferenceVLComponent(BaseComponent):
         - infer(image_data=None, prompt=None) → str
         - infer_lang(prompt=None) → str
 
+    and may override infer_batch(requests) → list[str] to batch independent requests.
+
     Where:
       - image_data: bytes | PIL.Image.Image | str (file path) | None
       - prompt: str | None
@@ -33,6 +35,24 @@ class InferenceVLComponent(BaseComponent):
         """
         raise NotImplementedError("Subclasses must implement infer()")
 
+    def infer_batch(self, requests: list, documents: list = None, **generation_kwargs) -> list:
+        """
+        Run inference on several independent (image_data, prompt) pairs.
+
+        The default runs infer() once per pair; models that can generate a
+        padded batch in one pass override this.
+
+        Args:
+            requests: List of (image_data, prompt) tuples.
+            documents: Optional document id per request, for models with per-document caches.
+            generation_kwargs: Options such as max_new_tokens, forwarded to infer() when set.
+
+        Returns:
+            list[str]: One generated text per request, in request order.
+        """
+        kwargs = {key: value for key, value in generation_kwargs.items() if value is not None}
+        return [self.infer(image_data, prompt, **kwargs) for image_data, prompt in requests]
+
     @abstractmethod
     def infer_lang(self, prompt: str = None) -> str:
         """
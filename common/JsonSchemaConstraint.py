@@ -0,0 +1,53 @@
+import json
+import threading
+from typing import Any, Dict
+from transformers import LogitsProcessorList, PrefixConstrainedLogitsProcessor
+
+
+class JsonSchemaConstraint:
+    """
+    Grammar-constrained decoding for JSON-schema outputs.
+
+    Compiles a JSON schema (e.g. KeyValueGeneration.model_json_schema()) into a
+    token-level logits processor for generate(). At every step only tokens that keep
+    the output a valid prefix of a schema-conforming JSON document are allowed, so the
+    model cannot emit fences, prose or malformed JSON, and stops as soon as the object
+    is complete.
+
+    Uses the optional `lm-format-enforcer` package (pip install lm-format-enforcer).
+    The tokenizer vocabulary is analysed once per instance; compiled schemas are cached.
+    """
+
+    def __init__(self, tokenizer):
+        try:
+            from lmformatenforcer import JsonSchemaParser
+            from lmformatenforcer.integrations.transformers import (
+                build_token_enforcer_tokenizer_data,
+                build_transformers_prefix_allowed_tokens_fn,
+            )
+        except ImportError as e:
+            raise ImportError(
+                "Constrained decoding requires lm-format-enforcer: pip install lm-format-enforcer"
+            ) from e
+
+        self._parser_cls = JsonSchemaParser
+        self._build_prefix_fn = build_transformers_prefix_allowed_tokens_fn
+        self._tokenizer_data = build_token_enforcer_tokenizer_data(tokenizer)
+        self._schemas: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def logits_processor(self, json_schema: Dict[str, Any]) -> LogitsProcessorList:
+        """
+        A fresh LogitsProcessorList constraining one generate() call to `json_schema`.
+
+        The enforcer keeps per-sequence state, so a new processor is built per call;
+        only the parsed schema is reused.
+        """
+        key = json.dumps(json_schema, sort_keys=True)
+        with self._lock:
+            parser = self._schemas.get(key)
+            if parser is None:
+                parser = self._parser_cls(json_schema)
+                self._schemas[key] = parser
+        prefix_fn = self._build_prefix_fn(self._tokenizer_data, parser)
+        return LogitsProcessorList([PrefixConstrainedLogitsProcessor(prefix_fn, num_beams=1)])
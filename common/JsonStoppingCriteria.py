@@ -0,0 +1,73 @@
+from typing import Dict, List
+import torch
+from transformers import StoppingCriteria
+
+
+class JsonStoppingCriteria(StoppingCriteria):
+    """
+    Stops each sequence of a generate() call once its first top-level JSON object closes.
+
+    Everything after that object is discarded by DirtyJsonParser anyway, so there is
+    no point generating it. Every new token is decoded on its own (decodings are
+    cached per token id) and fed to a small scanner that tracks brace depth, skipping
+    braces inside JSON strings. Text before the first '{' (e.g. a ```json fence) is
+    ignored.
+
+    Returns one flag per sequence, so finished sequences of a batch stop while the
+    others keep generating.
+    """
+
+    def __init__(self, tokenizer, prompt_len: int):
+        """
+        Args:
+            tokenizer: Tokenizer of the generating model.
+            prompt_len: Length of the (padded) prompt; tokens after it are generated text.
+        """
+        self.tokenizer = tokenizer
+        self.prompt_len = prompt_len
+        self._token_text: Dict[int, str] = {}
+        # Per sequence: [depth, in_string, escaped, done]
+        self._states: List[list] = []
+        self._seen = prompt_len
+
+    def _text(self, token_id: int) -> str:
+        text = self._token_text.get(token_id)
+        if text is None:
+            text = self.tokenizer.decode([token_id], skip_special_tokens=True)
+            self._token_text[token_id] = text
+        return text
+
+    @staticmethod
+    def _scan(state: list, text: str) -> None:
+        for char in text:
+            depth, in_string, escaped, _ = state
+            if in_string:
+                if escaped:
+                    state[2] = False
+                elif char == "\\":
+                    state[2] = True
+                elif char == '"':
+                    state[1] = False
+            elif char == '"' and depth > 0:
+                state[1] = True
+            elif char == "{":
+                state[0] = depth + 1
+            elif char == "}" and depth > 0:
+                state[0] = depth - 1
+                if depth == 1:
+                    state[3] = True
+                    return
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        if not self._states:
+            self._states = [[0, False, False, False] for _ in range(input_ids.shape[0])]
+
+        new_tokens = input_ids[:, self._seen:].tolist()
+        self._seen = input_ids.shape[1]
+        for state, tokens in zip(self._states, new_tokens):
+            for token_id in tokens:
+                if state[3]:
+                    break
+                self._scan(state, self._text(token_id))
+
+        return torch.tensor([state[3] for state in self._states], dtype=torch.bool, device=input_ids.device)
@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+from PIL import Image
+from common.BaseComponent import BaseComponent
+
+
+class PageStore(BaseComponent):
+    """
+    In-memory store of decoded RGB page images for one document.
+
+    Pages are held as PIL images in a page → image index and handed out as-is
+    (no copy, no re-decode) to ColPali, YOLO and the VLM. Resident images form an
+    LRU bounded by `max_bytes`: when the budget is exceeded, the least recently
+    used pages are spilled to a private temporary directory as raw pixel buffers.
+    A spilled page is rebuilt with Image.frombytes (no codec) on its next access
+    and becomes resident again, so repeated lookups of the same page by several
+    extraction items cost one reload at most.
+
+    Iterating the store yields (page_num, image) tuples in page order, so it can be
+    used wherever the (page_num, image_path) list was used before.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, spill_root: Optional[str] = None):
+        """
+        Args:
+            max_bytes: Memory budget for resident page images. None keeps every page in memory.
+            spill_root: Parent directory for spilled pages; the system temp dir if None.
+        """
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.spill_root = spill_root
+        self._spill_dir: Optional[str] = None
+        # Least recently used first
+        self._resident: "OrderedDict[int, Image.Image]" = OrderedDict()
+        # Pages with a copy on disk; a page may be both resident and spilled
+        self._spilled: Dict[int, Tuple[str, Tuple[int, int], str]] = {}
+        self._resident_bytes = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _image_bytes(image: Image.Image) -> int:
+        return image.width * image.height * len(image.getbands())
+
+    def add(self, page_num: int, image: Image.Image) -> None:
+        """
+        Store the decoded image for page_num, spilling least recently used pages if over budget.
+        """
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        with self._lock:
+            self.discard(page_num)
+            self._make_resident(page_num, image)
+
+    def get(self, page_num: int) -> Optional[Image.Image]:
+        """
+        Return the image for page_num, or None if the page is not in the store.
+        Marks the page as most recently used, reloading it from disk if it was spilled.
+        """
+        with self._lock:
+            image = self._resident.get(page_num)
+            if image is not None:
+                self._resident.move_to_end(page_num)
+                return image
+            if page_num in self._spilled:
+                image = self._load_spilled(page_num)
+                self._make_resident(page_num, image)
+                return image
+            return None
+
+    def pages(self) -> List[int]:
+        with self._lock:
+            return sorted(set(self._resident) | set(self._spilled))
+
+    def discard(self, page_num: int) -> None:
+        with self._lock:
+            image = self._resident.pop(page_num, None)
+            if image is not None:
+                self._resident_bytes -= self._image_bytes(image)
+            spilled = self._spilled.pop(page_num, None)
+            if spilled is not None and os.path.exists(spilled[0]):
+                os.remove(spilled[0])
+
+    def clear(self) -> None:
+        """
+        Drop every page and delete the spill directory.
+        """
+        with self._lock:
+            self._resident.clear()
+            self._spilled.clear()
+            self._resident_bytes = 0
+            if self._spill_dir:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
+
+    def _make_resident(self, page_num: int, image: Image.Image) -> None:
+        self._resident[page_num] = image
+        self._resident_bytes += self._image_bytes(image)
+        self._enforce_budget()
+
+    def _enforce_budget(self) -> None:
+        if not self.max_bytes:
+            return
+        # Evict from the least recently used end, always keeping the page just touched
+        while self._resident_bytes > self.max_bytes and len(self._resident) > 1:
+            page_num = next(iter(self._resident))
+            self._spill(page_num)
+
+    def _spill(self, page_num: int) -> None:
+        image = self._resident.pop(page_num)
+        self._resident_bytes -= self._image_bytes(image)
+        if page_num in self._spilled:
+            # Already on disk from an earlier eviction; pages are immutable, so just drop it
+            return
+        if self._spill_dir is None:
+            if self.spill_root:
+                os.makedirs(self.spill_root, exist_ok=True)
+            self._spill_dir = tempfile.mkdtemp(prefix="pages_", dir=self.spill_root)
+        path = os.path.join(self._spill_dir, f"page_{page_num}.raw")
+        with open(path, "wb") as f:
+            f.write(image.tobytes())
+        self._spilled[page_num] = (path, image.size, image.mode)
+        self.logger.debug(f"Spilled page {page_num} to {path}")
+
+    def _load_spilled(self, page_num: int) -> Image.Image:
+        path, size, mode = self._spilled[page_num]
+        with open(path, "rb") as f:
+            return Image.frombytes(mode, size, f.read())
+
+    def __iter__(self) -> Iterator[Tuple[int, Image.Image]]:
+        for page_num in self.pages():
+            yield page_num, self.get(page_num)
+
+    def __len__(self) -> int:
+        return len(self.pages())
+
+    def __contains__(self, page_num: int) -> bool:
+        with self._lock:
+            return page_num in self._resident or page_num in self._spilled
+
+    def __del__(self):
+        if self._spill_dir:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
@@ -0,0 +1,16 @@
+class Prompt(str):
+    """
+    A built prompt: behaves as the full prompt text (system part + "\n" + user part),
+    and keeps the two parts in `system` and `user`.
+
+    QwenV25Infer, with its prefix cache on, sends `system` as a system message ahead
+    of the page image, so every prompt sharing that system part (template + JSON
+    schema) starts with the same tokens and can reuse their cached prefill. Anything
+    else treats it as a plain string.
+    """
+
+    def __new__(cls, system: str, user: str):
+        prompt = super().__new__(cls, f"{system}\n{user}" if system else user)
+        prompt.system = system
+        prompt.user = user
+        return prompt
@@ -1,6 +1,11 @@
 from common.BaseComponent import BaseComponent
 from common.CallableComponent import CallableComponent
+from common.PageStore import PageStore
 from common.ExtractionState import ExtractionState
 from common.DirtyJsonParser import DirtyJsonParser
+from common.Prompt import Prompt
+from common.JsonStoppingCriteria import JsonStoppingCriteria
+from common.JsonSchemaConstraint import JsonSchemaConstraint
+from common.TensorLRUCache import TensorLRUCache
 from common.InferenceVLComponent import InferenceVLComponent
 from common.InferenceVisionComponent import InferenceVisionComponent
\ No newline at end of file
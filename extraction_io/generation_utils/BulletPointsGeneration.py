@@ -1,11 +1,14 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, ClassVar
 
 
 class BulletPointsGeneration(BaseModel):
     """
     Schema expected from VLM for a bullet-points extraction prompt.
     """
+    # Generation budget (new tokens) for this schema: a page worth of bullet strings
+    max_new_tokens: ClassVar[int] = 2048
+
     field_name: str = Field(..., description="The logical field name, e.g. 'benefits_list'.")
     points: List[str] = Field(..., description="List of extracted bullet strings.")
     continue_next_page: bool = Field(
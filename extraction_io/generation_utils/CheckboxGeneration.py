@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, model_validator
-from typing import List, Optional, Union
+from typing import List, Optional, Union, ClassVar
 
 class CheckboxGeneration(BaseModel):
     """
@@ -7,6 +7,9 @@ class CheckboxGeneration(BaseModel):
     Exactly one of `selected_option` or `selected_options` must be set,
     and `continue_next_page` must always be present.
     """
+    # Generation budget (new tokens) for this schema: one or a few option labels
+    max_new_tokens: ClassVar[int] = 256
+
     field_name: str = Field(
         ...,
         description="The logical field name, e.g. 'OccupancyStatus' or 'FeaturesSelected'."
@@ -0,0 +1,55 @@
+from functools import lru_cache
+from pydantic import BaseModel, Field, create_model
+from typing import ClassVar, List, Tuple, Type
+from extraction_io.generation_utils.KeyValueGeneration import KeyValueGeneration
+
+
+class GroupedKeyValueGeneration(BaseModel):
+    """
+    Base of the schemas expected from VLM for a grouped key-value prompt, which asks
+    for several single-page key-value fields of the same page at once.
+
+    for_items() builds the concrete model dynamically: one required string property
+    per field, keyed (aliased) by its field_name and typed like KeyValueGeneration.value.
+    Dump a validated instance with model_dump(by_alias=True) to get field_name → value.
+    The model carries no per-group state; the caller passes the group's generation
+    budget (budget()) explicitly as max_new_tokens.
+    """
+    # Generation budget (new tokens) per grouped field
+    tokens_per_field: ClassVar[int] = 128
+
+    @classmethod
+    def for_items(cls, items: List) -> Type["GroupedKeyValueGeneration"]:
+        """
+        The merged generation model for `items` (ExtractionItems of type key-value).
+
+        Raises:
+            ValueError: If two items share a field_name, since their answers would be
+                merged into one property.
+        """
+        field_names = [item.field_name for item in items]
+        if len(set(field_names)) != len(field_names):
+            raise ValueError(f"Grouped key-value items must have distinct field names, got {field_names}")
+        return cls._model_for(tuple((item.field_name, item.description) for item in items))
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _model_for(cls, key: Tuple[Tuple[str, str], ...]) -> Type["GroupedKeyValueGeneration"]:
+        # Bounded: every document of a config shares one class, while the long-running
+        # server does not keep a class for every field set it has ever seen
+        value_field = KeyValueGeneration.model_fields["value"]
+        fields = {
+            f"field_{i}": (
+                value_field.annotation,
+                Field(..., alias=field_name, description=f"{description}. {value_field.description}"),
+            )
+            for i, (field_name, description) in enumerate(key)
+        }
+        return create_model(f"{cls.__name__}{len(key)}", __base__=cls, **fields)
+
+    @classmethod
+    def budget(cls, num_fields: int) -> int:
+        """
+        Generation budget of a prompt asking for `num_fields` fields.
+        """
+        return max(KeyValueGeneration.max_new_tokens, cls.tokens_per_field * num_fields)
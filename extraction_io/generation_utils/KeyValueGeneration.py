@@ -1,9 +1,13 @@
 from pydantic import BaseModel, Field
+from typing import ClassVar
 
 class KeyValueGeneration(BaseModel):
     """
     Schema expected from VLM for a key-value extraction prompt.
     """
+    # Generation budget (new tokens) for this schema: a single value plus field name and flag
+    max_new_tokens: ClassVar[int] = 512
+
     field_name: str = Field(..., description="The logical field name, e.g. 'BorrowerName'.")
     value: str = Field(..., description="The extracted raw text for this field.")
     continue_next_page: bool = Field(
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Union, Dict
+from typing import Union, Dict, ClassVar
 
 
 class SummaryGeneration(BaseModel):
@@ -18,6 +18,9 @@ class SummaryGeneration(BaseModel):
       "continue_next_page": <true|false>
     }
     """
+    # Generation budget (new tokens) for this schema: one page/fragment summary
+    max_new_tokens: ClassVar[int] = 1024
+
     field_name: str = Field(..., description="Logical field name or summary key")
     summary: Union[
         str,
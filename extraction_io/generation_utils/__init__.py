@@ -1,4 +1,5 @@
 from extraction_io.generation_utils.BulletPointsGeneration import BulletPointsGeneration
 from extraction_io.generation_utils.KeyValueGeneration import KeyValueGeneration
 from extraction_io.generation_utils.SummaryGeneration import SummaryGeneration
-from extraction_io.generation_utils.CheckboxGeneration import CheckboxGeneration
\ No newline at end of file
+from extraction_io.generation_utils.CheckboxGeneration import CheckboxGeneration
+from extraction_io.generation_utils.GroupedKeyValueGeneration import GroupedKeyValueGeneration
\ No newline at end of file
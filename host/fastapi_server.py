@@ -1,12 +1,16 @@
 from fastapi import FastAPI, UploadFile, Form
 from fastapi.responses import JSONResponse
 from host.shared.parser_wrapper import parser
-import shutil, os, json
+import shutil, os, json, tempfile
 
 app = FastAPI()
 
+# A plain (non-async) endpoint runs in FastAPI's thread pool, so concurrent requests are
+# extracted in parallel; each perform_de() call has its own request-scoped ExtractionState.
+# Nothing a request reads is shared with other requests: the upload goes to a private
+# temporary file and the response is built from perform_de()'s return value.
 @app.post("/perform_de")
-async def perform_de(pdf: UploadFile, config_name: str = Form(...)):
+def perform_de(pdf: UploadFile, config_name: str = Form(...)):
     dataset_path = os.path.join("../dataset", pdf.filename)
     output_path = os.path.join("../output", pdf.filename.replace(".pdf", ".json"))
     config_path = os.path.join("../de_config", config_name)
@@ -14,23 +18,28 @@ async def perform_de(pdf: UploadFile, config_name: str = Form(...)):
     os.makedirs("../dataset", exist_ok=True)
     os.makedirs("../output", exist_ok=True)
 
-    if not os.path.exists(dataset_path):
-        with open(dataset_path, "wb") as f:
-            shutil.copyfileobj(pdf.file, f)
+    # Private copy of this upload; another request may upload a different PDF of the same name
+    fd, upload_path = tempfile.mkstemp(prefix=".upload_", suffix=".pdf", dir="../dataset")
+    with os.fdopen(fd, "wb") as f:
+        shutil.copyfileobj(pdf.file, f)
 
     try:
         # Load extraction configuration
         with open(config_path, 'r') as file:
             extraction_config = json.load(file)
-        parser.perform_de(dataset_path, extraction_config, output_path)
-        with open(output_path, 'r') as f:
-            result = json.load(f)
-        return JSONResponse(content=result)
+        # The output file is replaced atomically (last request wins); the response comes
+        # from this request's own result, never from reading the file back
+        outputs = parser.perform_de(upload_path, extraction_config, output_path)
+        return JSONResponse(content=outputs.model_dump(mode="json"))
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
+    finally:
+        # Keep the first upload of each file name in the dataset, as before
+        if os.path.exists(dataset_path):
+            os.remove(upload_path)
+        else:
+            os.replace(upload_path, dataset_path)
 
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001, reload=True)
-
-
@@ -1 +1,2 @@
 CONFIG_PATH = "../config/settings.yml"
+DE_CONFIG_DIR = "../de_config"
@@ -1,5 +1,14 @@
+import glob
+import os
 from src import Parser
-from host.shared.config import CONFIG_PATH
+from host.shared.config import DE_CONFIG_DIR
 
-# Singleton parser instance initialized once
-parser = Parser(CONFIG_PATH)
\ No newline at end of file
+# Singleton parser instance initialized once; every request gets its own ExtractionState
+parser = Parser()
+
+# Warm the query-embedding cache with every de_config the server can be asked for
+for extraction_config_path in sorted(glob.glob(os.path.join(DE_CONFIG_DIR, "*.json"))):
+    try:
+        parser.warm_query_cache(extraction_config_path)
+    except Exception:
+        parser.logger.exception(f"Could not warm the query cache from {extraction_config_path}")
@@ -1,4 +1,5 @@
 import json
+from typing import List
 import torch
 from transformers import PretrainedConfig
 from colpali_engine.models import ColQwen2, ColQwen2Processor, ColPali, ColPaliProcessor
@@ -17,6 +18,8 @@ class ColPaliInfer(InferenceVLComponent):
         device=None,
         torch_dtype=torch.bfloat16,
         device_map="auto",
+        batch_size=1,
+        query_batch_size=32,
     ):
         super().__init__()  # initializes self.logger, etc.
         device = "cpu" if not device else device
@@ -52,6 +55,8 @@ class ColPaliInfer(InferenceVLComponent):
 
         self.device = device
         self.model_name = model_name
+        self.batch_size = max(1, int(batch_size))
+        self.query_batch_size = max(1, int(query_batch_size))
         self.logger.info("ColPaliInfer initialization complete")
 
     def get_image_embedding(self, image: Image.Image) -> torch.Tensor:
@@ -63,6 +68,30 @@ class ColPaliInfer(InferenceVLComponent):
         self.logger.debug("Image embedding generated")
         return emb
 
+    def get_image_embeddings(self, images: List[Image.Image], batch_size: int = None) -> List[torch.Tensor]:
+        """
+        Embed a list of page images, `batch_size` pages per forward pass.
+
+        ColQwen2Processor pads every image in a batch to the longest token sequence,
+        so the padded output is split back into one tensor per page using the
+        attention mask. Each returned tensor has shape (1, n_tokens, dim), the same
+        layout get_image_embedding() produces for a single page.
+        """
+        batch_size = batch_size or self.batch_size
+        embeddings = []
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            self.logger.debug(f"Generating image embeddings for pages {start + 1}-{start + len(chunk)}")
+            batch = self.processor.process_images(chunk)
+            batch = {k: v.to(self.device) for k, v in batch.items()}
+            with torch.no_grad():
+                emb = self.model(**batch)
+            mask = batch["attention_mask"].bool()
+            for i in range(emb.shape[0]):
+                embeddings.append(emb[i][mask[i]].unsqueeze(0))
+        self.logger.debug(f"Generated {len(embeddings)} image embeddings")
+        return embeddings
+
     def get_text_embedding(self, text: str) -> torch.Tensor:
         self.logger.debug("Generating text embedding for %r", text)
         inputs = self.processor.process_queries([text] if isinstance(text, str) else text)
@@ -72,6 +101,26 @@ class ColPaliInfer(InferenceVLComponent):
         self.logger.debug("Text embedding generated")
         return emb
 
+    def get_text_embeddings(self, texts: List[str], batch_size: int = None) -> List[torch.Tensor]:
+        """
+        Embed a list of queries, `batch_size` queries per forward pass.
+
+        Returns one (n_tokens, dim) tensor per query, trimmed to its unpadded length.
+        """
+        batch_size = batch_size or self.query_batch_size
+        embeddings = []
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            self.logger.debug(f"Generating text embeddings for {len(chunk)} queries")
+            inputs = self.processor.process_queries(chunk)
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            with torch.no_grad():
+                emb = self.model(**inputs)
+            mask = inputs["attention_mask"].bool()
+            for i in range(emb.shape[0]):
+                embeddings.append(emb[i][mask[i]])
+        return embeddings
+
     def infer(self, image_data=None, prompt: str = None) -> str:
         """
         Run inference on the provided inputs:
@@ -39,9 +39,9 @@ class H2OVLInfer(InferenceVLComponent):
         else:
             raise ValueError("Provide either API details or a model name for inference.")
 
-    def infer(self, image_data, prompt):
+    def infer(self, image_data, prompt, max_new_tokens=None):
         """
-        Run inference on image + text prompt.
+        Run inference on image + text prompt, optionally capping the generation at max_new_tokens.
         """
         if not prompt or not isinstance(prompt, str):
             raise ValueError("Prompt must be a non-empty string")
@@ -50,14 +50,14 @@ class H2OVLInfer(InferenceVLComponent):
             if self.client:
                 return self._infer_via_api(image_data, prompt)
             elif self.model and self.tokenizer:
-                return self._infer_locally(image_data, prompt)
+                return self._infer_locally(image_data, prompt, max_new_tokens)
             else:
                 raise ValueError("Initialization incomplete for inference.")
         except Exception as e:
             self.logger.exception(f"Inference failed: {str(e)}")
             raise RuntimeError(f"Inference failed: {str(e)}") from e
 
-    def _infer_locally(self, image_data, prompt):
+    def _infer_locally(self, image_data, prompt, max_new_tokens=None):
         """
         Local inference via model.chat(). Accepts image path or bytes or PIL.Image.
         """
@@ -72,20 +72,24 @@ class H2OVLInfer(InferenceVLComponent):
                 image_data.save(tmp.name)
                 image_data = tmp.name
 
+        generation_config = dict(self.generation_config)
+        if max_new_tokens:
+            generation_config["max_new_tokens"] = max_new_tokens
+
         history = None
         response, history = self.model.chat(
             self.tokenizer,
             image_data,
             prompt,
-            self.generation_config,
+            generation_config,
             history=history,
             return_history=True
         )
         return response
 
-    def infer_lang(self, prompt: str = None) -> str:
+    def infer_lang(self, prompt: str = None, max_new_tokens: int = None) -> str:
         """
-        Text-only inference.
+        Text-only inference, optionally capping the generation at max_new_tokens.
         """
         if not prompt or not isinstance(prompt, str):
             raise ValueError("Prompt must be a non-empty string")
@@ -95,12 +99,16 @@ class H2OVLInfer(InferenceVLComponent):
                 response = self.client.text_generation(prompt)
                 return response if isinstance(response, str) else str(response)
             elif self.model and self.tokenizer:
+                generation_config = dict(self.generation_config)
+                if max_new_tokens:
+                    generation_config["max_new_tokens"] = max_new_tokens
+
                 history = None
                 response, history = self.model.chat(
                     self.tokenizer,
                     None,
                     prompt,
-                    self.generation_config,
+                    generation_config,
                     history=history,
                     return_history=True
                 )
@@ -0,0 +1,63 @@
+from typing import Any, Callable, Optional
+
+
+class LazyModel:
+    """
+    Stand-in for a model instance that is loaded on first use.
+
+    Every attribute access is forwarded to the instance returned by `loader(class_name)`
+    (ModelManager.get_model), which loads the model the first time and returns the
+    shared instance afterwards. Components can therefore be built with a model they
+    may never call, e.g. the checkbox detector for configs without checkbox items.
+    Check `loaded` before optional calls (e.g. cache maintenance) that should not
+    load the model by themselves.
+
+    The handle is truthy only if `is_registered(class_name)` holds, so `if handle:`
+    checks that the model can be loaded, like `if model:` did for an optional model.
+    `model_name`, when known from config, is served without loading the model, so
+    cache keys (embedding store, query cache) never force a load.
+    """
+
+    def __init__(
+        self,
+        class_name: str,
+        loader: Callable[[str], Any],
+        is_loaded: Optional[Callable[[str], bool]] = None,
+        is_registered: Optional[Callable[[str], bool]] = None,
+        model_name: Optional[str] = None,
+    ):
+        self._class_name = class_name
+        self._loader = loader
+        self._is_loaded = is_loaded
+        self._is_registered = is_registered
+        self._model_name = model_name
+
+    @property
+    def instance(self) -> Any:
+        return self._loader(self._class_name)
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether the model has been loaded, without loading it.
+        """
+        return self._is_loaded is not None and self._is_loaded(self._class_name)
+
+    @property
+    def model_name(self) -> str:
+        """
+        The configured model name, or the loaded instance's if config has none.
+        """
+        if self._model_name is not None:
+            return self._model_name
+        return self.instance.model_name
+
+    def __bool__(self) -> bool:
+        return self._is_registered is None or self._is_registered(self._class_name)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes not defined on the handle itself
+        return getattr(self.instance, name)
+
+    def __repr__(self) -> str:
+        return f"LazyModel({self._class_name!r})"
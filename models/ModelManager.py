@@ -1,9 +1,26 @@
-import torch
+import threading
 import importlib
+from abc import ABCMeta
+from concurrent.futures import ThreadPoolExecutor
+import torch
 from common import BaseComponent
 from config.loader import settings
+from models.ModelPrecision import ModelPrecision
+
+class _LazyModelAttributes(ABCMeta):
+    """
+    Metaclass resolving a registered but not yet loaded model on attribute access, so
+    `getattr(ModelManager, "QwenV25Infer")` loads the model the first time it is needed.
+    """
+
+    def __getattr__(cls, name):
+        # Only reached when normal lookup fails, i.e. for models that are not loaded yet
+        if name in cls.__dict__.get("_registered", {}):
+            return cls.get_model(name)
+        raise AttributeError(f"type object '{cls.__name__}' has no attribute '{name}'")
+
 
-class ModelManager(BaseComponent):
+class ModelManager(BaseComponent, metaclass=_LazyModelAttributes):
     """
     Dynamically load and instantiate model classes given their class-name strings.
     All models respect a global `model_loading` setting from config:
@@ -14,77 +31,189 @@ class ModelManager(BaseComponent):
       - <ClassName>_model_name_or_url
       - <ClassName>_api_endpoint
       - <ClassName>_api_token
+    An optional `args` mapping under a model's entry is forwarded to its
+    constructor as keyword arguments in local mode, and optional `precision` /
+    `quantization` keys are applied at load time (see ModelPrecision).
+
+    Models are registered by initialize_models() and loaded either there (eager, on
+    `load_workers` threads) or on first access (lazy): `getattr(ModelManager, name)`
+    and `ModelManager.get_model(name)` load a registered model once, thread-safely.
+    ModelManager.lazy(name) returns a LazyModel handle that defers even that lookup,
+    so a component can hold a model it may never use.
     """
     config = settings.get("model_manager", {})
+    # class_name -> device of every model registered by initialize_models()
+    _registered = {}
+    _locks = {}
+    _registry_lock = threading.Lock()
 
     @classmethod
     def initialize_models(
         cls,
         device: torch.device = torch.device("cpu"),
-        model_classes: list[str] = []
+        model_classes: list[str] = [],
+        lazy: bool = False,
+        load_workers: int = 1,
     ):
         """
-        For each class_name in model_classes:
-          1) If cls already has a non-None attribute named class_name, skip instantiation.
-          2) Import module "models.<class_name>"
-          3) Retrieve class "<class_name>"
-          4) If config["model_loading"] == "local":
-               – Look up "<class_name>_model_name_or_url"
-               – Instantiate: ModelClass(model_name=<value>, device=device)
-             Else if "api":
-               – Look up "<class_name>_api_endpoint" and "<class_name>_api_token"
-               – Instantiate: ModelClass(api_endpoint=<…>, api_token=<…>)
-             Else:
-               – Raise ValueError
-          5) Assign the instance to cls.<class_name>
+        Register every class_name in model_classes and, unless `lazy`, load them now:
+          1) Validate the global loading mode.
+          2) Register each model with its device; already loaded models are left as they are.
+          3) If not lazy, load the registered models concurrently on `load_workers` threads
+             (from_pretrained releases the GIL for most of its I/O and tensor work).
+          4) Otherwise each model is loaded by _load_model() on first access.
         """
         if cls.config is None:
             raise ValueError("Configuration not loaded. Call load_config first.")
 
-        # Determine global loading mode
+        # 1) Determine global loading mode
         model_loading = cls.config.get("model_loading", "local")
         if model_loading not in ("local", "api"):
             raise ValueError(f"Invalid model_loading: {model_loading}. Must be 'local' or 'api'.")
 
-        for class_name in model_classes:
-            # 1) If already instantiated, skip
-            existing = getattr(cls, class_name, None)
-            if existing is not None:
-                continue
+        # 2) Register
+        with cls._registry_lock:
+            for class_name in model_classes:
+                cls._registered.setdefault(class_name, device)
+                cls._locks.setdefault(class_name, threading.Lock())
+
+        # 3) Eager, concurrent load
+        if lazy:
+            return
+        pending = [name for name in model_classes if cls.__dict__.get(name) is None]
+        workers = max(1, min(int(load_workers), len(pending)))
+        if workers <= 1:
+            for class_name in pending:
+                cls.get_model(class_name)
+            return
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="model-load") as pool:
+            # list() surfaces the first loading error
+            list(pool.map(cls.get_model, pending))
+
+    @classmethod
+    def get_model(cls, class_name: str):
+        """
+        Return the instance of a registered model, loading it on first call.
+        Concurrent callers of the same model wait for a single load.
+        """
+        instance = cls.__dict__.get(class_name)
+        if instance is not None:
+            return instance
+        if class_name not in cls._registered:
+            raise KeyError(f"Model '{class_name}' is not registered; list it in initialize_models()")
+
+        with cls._locks[class_name]:
+            instance = cls.__dict__.get(class_name)
+            if instance is None:
+                cls.logger.info(f"Loading {class_name}...")
+                instance = cls._load_model(class_name, cls._registered[class_name])
+                # Assign to class variable, e.g. ModelManager.QwenV25Infer or ModelManager.ColPaliInfer
+                setattr(cls, class_name, instance)
+        return instance
+
+    @classmethod
+    def lazy(cls, class_name: str):
+        """
+        A LazyModel handle for `class_name` that loads the model on its first attribute
+        access; None if class_name is None. The handle is falsy if the model is not
+        registered, and knows its model name from config without loading it.
+        """
+        if class_name is None:
+            return None
+        from models.LazyModel import LazyModel
+        return LazyModel(
+            class_name,
+            cls.get_model,
+            cls.is_loaded,
+            is_registered=cls.is_registered,
+            model_name=cls.configured_model_name(class_name),
+        )
+
+    @classmethod
+    def is_registered(cls, class_name: str) -> bool:
+        """
+        Whether `class_name` was registered by initialize_models(), i.e. can be loaded.
+        """
+        return class_name in cls._registered or cls.is_loaded(class_name)
+
+    @classmethod
+    def configured_model_name(cls, class_name: str):
+        """
+        The model name `class_name` is loaded with in local mode (its model_name_or_url),
+        read from config; None in api mode or if it is not configured.
+        """
+        if cls.config.get("model_loading", "local") != "local":
+            return None
+        return ((cls.config.get("models") or {}).get(class_name) or {}).get("model_name_or_url")
+
+    @classmethod
+    def is_loaded(cls, class_name: str) -> bool:
+        """
+        Whether `class_name` is loaded, without loading it.
+        """
+        return cls.__dict__.get(class_name) is not None
+
+    @classmethod
+    def unload(cls, class_name: str):
+        """
+        Drop a loaded model; it is loaded again on next access if still registered.
+        """
+        if class_name in cls.__dict__:
+            delattr(cls, class_name)
 
-            # 2) Dynamically import the module "models.<ClassName>"
-            module_name = f"models.{class_name}"
+    @classmethod
+    def _load_model(cls, class_name: str, device: torch.device):
+        """
+        Instantiate one model:
+          1) Import module "models.<class_name>"
+          2) Retrieve class "<class_name>"
+          3) If config["model_loading"] == "local":
+               – Look up "<class_name>_model_name_or_url"
+               – Instantiate: ModelClass(model_name=<value>, device=device, torch_dtype=<precision>)
+               – Apply the model's quantization, if any
+             Else if "api":
+               – Look up "<class_name>_api_endpoint" and "<class_name>_api_token"
+               – Instantiate: ModelClass(api_endpoint=<…>, api_token=<…>)
+        """
+        model_loading = cls.config.get("model_loading", "local")
+
+        # 1) Dynamically import the module "models.<ClassName>"
+        module_name = f"models.{class_name}"
+        try:
+            module = importlib.import_module(module_name)
+        except ModuleNotFoundError as e:
+            raise ImportError(f"Could not import module '{module_name}' for class '{class_name}'") from e
+
+        # 2) Retrieve the class object
+        try:
+            ModelClass = getattr(module, class_name)
+        except AttributeError as e:
+            raise ImportError(f"Module '{module_name}' does not define class '{class_name}'") from e
+
+        # 3) Instantiate based on loading mode
+        if model_loading == "local":
+            if class_name not in cls.config['models']:
+                raise KeyError(f"Expected config key '{class_name}' for local loading of '{class_name}'")
+            model_name = cls.config['models'][class_name]["model_name_or_url"]
+            # Optional constructor kwargs, e.g. ColPaliInfer's embedding batch_size
+            model_args = cls.config['models'][class_name].get("args") or {}
+            precision = ModelPrecision.from_config(cls.config['models'][class_name])
+            model_args = {**model_args, **precision.constructor_kwargs(ModelClass)}
             try:
-                module = importlib.import_module(module_name)
-            except ModuleNotFoundError as e:
-                raise ImportError(f"Could not import module '{module_name}' for class '{class_name}'") from e
+                instance = ModelClass(model_name=model_name, device=device if device else torch.device(cls.config['models'][class_name].get("device", "cpu")), **model_args)
+                precision.apply(instance)
+            except Exception as e:
+                cls.logger.exception(f"Error instantiating {class_name}(model_name={model_name}, device={device}) | {e}")
+                raise RuntimeError(f"Error instantiating {class_name}(model_name={model_name}, device={device})") from e
 
-            # 3) Retrieve the class object
+        else:  # model_loading == "api"
+            api_endpoint = cls.config['models'][class_name].get("api_endpoint")
+            api_token    = cls.config['models'][class_name].get("api_token")
+            if api_token  or api_endpoint:
+                raise KeyError(f"Expected 'api_endpoint and 'api_token' in config for API loading of '{class_name}'")
             try:
-                ModelClass = getattr(module, class_name)
-            except AttributeError as e:
-                raise ImportError(f"Module '{module_name}' does not define class '{class_name}'") from e
-
-            # 4) Instantiate based on loading mode
-            if model_loading == "local":
-                if class_name not in cls.config['models']:
-                    raise KeyError(f"Expected config key '{class_name}' for local loading of '{class_name}'")
-                model_name = cls.config['models'][class_name]["model_name_or_url"]
-                try:
-                    instance = ModelClass(model_name=model_name, device=device if device else torch.device(cls.config['models'][class_name].get("device", "cpu")))
-                except Exception as e:
-                    cls.logger.exception(f"Error instantiating {class_name}(model_name={model_name}, device={device}) | {e}")
-                    raise RuntimeError(f"Error instantiating {class_name}(model_name={model_name}, device={device})") from e
-
-            else:  # model_loading == "api"
-                api_endpoint = cls.config['models'][class_name].get("api_endpoint")
-                api_token    = cls.config['models'][class_name].get("api_token")
-                if api_token  or api_endpoint:
-                    raise KeyError(f"Expected 'api_endpoint and 'api_token' in config for API loading of '{class_name}'")
-                try:
-                    instance = ModelClass(api_endpoint=api_endpoint, api_token=api_token)
-                except Exception as e:
-                    raise RuntimeError(f"Error instantiating {class_name}(api_endpoint={api_endpoint}, api_token=***)") from e
-
-            # 5) Assign to class variable, e.g. ModelManager.QwenV25Infer or ModelManager.ColPaliInfer
-            setattr(cls, class_name, instance)
\ No newline at end of file
+                instance = ModelClass(api_endpoint=api_endpoint, api_token=api_token)
+            except Exception as e:
+                raise RuntimeError(f"Error instantiating {class_name}(api_endpoint={api_endpoint}, api_token=***)") from e
+
+        return instance
\ No newline at end of file
@@ -0,0 +1,88 @@
+import inspect
+from typing import Any, Optional
+import torch
+from common import BaseComponent
+
+
+class ModelPrecision(BaseComponent):
+    """
+    Load-time precision and quantization settings for the local models.
+
+    Configured per model in settings.yml, next to `args`:
+
+        model_manager:
+          models:
+            QwenV25Infer:
+              precision: bf16              # null | fp32 | bf16 | fp16 (dtype the weights are loaded in)
+              quantization: dynamic_int8   # null | dynamic_int8
+
+    `precision` is handed to the model class as its `torch_dtype` constructor argument,
+    so the weights are materialised in that dtype by from_pretrained() rather than loaded
+    in fp32 and cast. Left null, the model class keeps its own default (fp32 for
+    QwenV25Infer, bf16 for ColPaliInfer), so lower precision is always opt-in.
+    `quantization` is applied to the loaded `instance.model`:
+
+      - dynamic_int8: torch dynamic quantization of every nn.Linear (int8 weights,
+        activations quantized on the fly). CPU only; the weights must be fp32, so it
+        forces precision fp32 at load time.
+    """
+
+    DTYPES = {
+        "fp32": torch.float32,
+        "float32": torch.float32,
+        "bf16": torch.bfloat16,
+        "bfloat16": torch.bfloat16,
+        "fp16": torch.float16,
+        "float16": torch.float16,
+    }
+    QUANTIZATIONS = ("dynamic_int8",)
+
+    def __init__(self, precision: Optional[str] = None, quantization: Optional[str] = None):
+        super().__init__()
+        if precision is not None and precision not in self.DTYPES:
+            raise ValueError(f"Invalid precision: {precision}. Must be one of {sorted(self.DTYPES)}.")
+        if quantization is not None and quantization not in self.QUANTIZATIONS:
+            raise ValueError(f"Invalid quantization: {quantization}. Must be one of {list(self.QUANTIZATIONS)}.")
+        if quantization == "dynamic_int8" and precision not in (None, "fp32", "float32"):
+            self.logger.warning(f"dynamic_int8 quantizes fp32 weights; loading in fp32 instead of {precision}")
+            precision = "fp32"
+        self.precision = precision or ("fp32" if quantization else None)
+        self.quantization = quantization
+
+    @classmethod
+    def from_config(cls, model_config: dict) -> "ModelPrecision":
+        return cls(model_config.get("precision"), model_config.get("quantization"))
+
+    @property
+    def torch_dtype(self) -> Optional[torch.dtype]:
+        return self.DTYPES[self.precision] if self.precision else None
+
+    def constructor_kwargs(self, model_class: type) -> dict:
+        """
+        The `torch_dtype` keyword for `model_class`, if a precision is set and the class accepts it.
+        """
+        if self.torch_dtype is None:
+            return {}
+        if "torch_dtype" not in inspect.signature(model_class.__init__).parameters:
+            self.logger.warning(f"{model_class.__name__} does not take torch_dtype; ignoring precision {self.precision}")
+            return {}
+        return {"torch_dtype": self.torch_dtype}
+
+    def apply(self, instance: Any) -> Any:
+        """
+        Quantize `instance.model` in place, if a quantization is set. Returns the instance.
+        """
+        if self.quantization is None:
+            return instance
+        model = getattr(instance, "model", None)
+        if not isinstance(model, torch.nn.Module):
+            self.logger.warning(f"{type(instance).__name__} has no torch model; ignoring quantization {self.quantization}")
+            return instance
+
+        # 1) Dynamic int8: nn.Linear weights → int8, activations quantized per batch at run time
+        if self.quantization == "dynamic_int8":
+            if next(model.parameters()).device.type != "cpu":
+                raise ValueError(f"dynamic_int8 quantization runs on CPU only; {type(instance).__name__} is not on CPU")
+            instance.model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.logger.info(f"Applied {self.quantization} quantization to {type(instance).__name__}")
+        return instance
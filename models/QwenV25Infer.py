@@ -1,10 +1,15 @@
+import hashlib
+import threading
 import torch
-from transformers import Qwen2_5_VLForConditionalGeneration, AutoProcessor
+import transformers
+from packaging.specifiers import SpecifierSet
+from packaging.version import Version
+from transformers import Qwen2_5_VLForConditionalGeneration, AutoProcessor, DynamicCache, StoppingCriteriaList
 from qwen_vl_utils import process_vision_info
 from PIL import Image
 from io import BytesIO
 from huggingface_hub import InferenceClient
-from common import InferenceVLComponent
+from common import InferenceVLComponent, JsonStoppingCriteria, JsonSchemaConstraint, TensorLRUCache
 from abc import abstractmethod
 
 
@@ -22,7 +27,16 @@ class QwenV25Infer(InferenceVLComponent):
         client (InferenceClient): The client for making API requests.
     """
 
-    def __init__(self, model_name=None, api_endpoint=None, api_token=None, device='cuda'):
+    # transformers releases whose Qwen2.5-VL internals (.model, get_rope_index, rope_deltas)
+    # the cached prefill in _generate_from_caches() is written against
+    CACHE_TRANSFORMERS_VERSIONS = SpecifierSet(">=4.49.0.dev0,<5")
+    # Model attributes the cached prefill relies on (found on the model or its inner .model)
+    CACHE_MODEL_ATTRIBUTES = ("get_rope_index", "rope_deltas", "visual")
+
+    def __init__(self, model_name=None, api_endpoint=None, api_token=None, device='cuda', max_batch_size=4,
+                 max_new_tokens=2048, stop_at_json=True, constrained_decoding=False,
+                 prefix_cache_mb=0, min_prefix_tokens=64, vision_cache_mb=0, min_pixels=None, max_pixels=None,
+                 torch_dtype=None):
         """
         Initializes the QwenV25Infer class.
 
@@ -31,6 +45,25 @@ class QwenV25Infer(InferenceVLComponent):
             api_endpoint (str, optional): The API endpoint for inference.
             api_token (str, optional): The API token for authentication.
             device (str, optional): The device to run the model on ('cuda' or 'cpu'). Defaults to 'cuda'.
+            max_batch_size (int, optional): Most sequences generated together by infer_batch(). Defaults to 4.
+            max_new_tokens (int, optional): Generation budget when the caller does not pass one. Defaults to 2048.
+            stop_at_json (bool, optional): End each generation once its first top-level JSON object
+                closes (JsonStoppingCriteria). Defaults to True.
+            constrained_decoding (bool, optional): Constrain generations to the caller's JSON schema
+                (JsonSchemaConstraint; needs lm-format-enforcer). Defaults to False.
+            prefix_cache_mb (float, optional): Memory budget of the LRU cache of prefilled key/values
+                for shared prompt prefixes (system prompt + schema). 0 disables it. Defaults to 0.
+            min_prefix_tokens (int, optional): Shortest shared prefix worth caching. Defaults to 64.
+            vision_cache_mb (float, optional): Memory budget of the LRU cache of vision-encoder outputs
+                per (document, page image); a document's entries are dropped by clear_vision_cache(document)
+                when it finishes. 0 disables it. Defaults to 0.
+            min_pixels (int, optional): Smallest image area fed to the vision encoder; smaller pages are
+                upscaled. None keeps the processor default.
+            max_pixels (int, optional): Largest image area fed to the vision encoder; larger pages are
+                downscaled (aspect ratio kept). The visual token count is about pixels / 28², so this
+                bounds prompt length, latency and memory per page. None keeps the processor default.
+            torch_dtype (torch.dtype, optional): Dtype the weights are loaded in, set by ModelManager from
+                the model's `precision` setting. None loads fp32.
 
         Raises:
             ValueError: If neither API details nor a model name are provided.
@@ -41,26 +74,46 @@ class QwenV25Infer(InferenceVLComponent):
         self.client = None
         self.model = None
         self.processor = None
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_new_tokens = max_new_tokens
+        self.stop_at_json = stop_at_json
+        self.constrained_decoding = constrained_decoding
+        self._json_constraint = None
+        # One generate() at a time: the model keeps per-call state (rope_deltas), and the
+        # VLM scheduler and text-only callers (LMProcessor) share this instance
+        self._generate_lock = threading.Lock()
+        self.min_prefix_tokens = min_prefix_tokens
+        self.prefix_cache = TensorLRUCache(int(prefix_cache_mb * 2**20)) if prefix_cache_mb else None
+        self.vision_cache = TensorLRUCache(int(vision_cache_mb * 2**20)) if vision_cache_mb else None
+        # Image-token budget, honoured by both process_vision_info and the processor
+        self.pixel_budget = {
+            key: int(value) for key, value in (("min_pixels", min_pixels), ("max_pixels", max_pixels)) if value
+        }
 
         if self.api_endpoint and self.api_token:
             self.client = InferenceClient(model=api_endpoint, token=api_token)
         elif model_name:
-            print(f"Loading {model_name} model...")
+            self.logger.info(f"Loading {model_name} model...")
             self.model = Qwen2_5_VLForConditionalGeneration.from_pretrained(
-                model_name #, torch_dtype=torch.float16, device_map="auto"
+                model_name, torch_dtype=torch_dtype, low_cpu_mem_usage=True
             ).to(self.device)
-            print(f"Model loaded!")
-            self.processor = AutoProcessor.from_pretrained(model_name)
+            self.logger.info("Model loaded!")
+            self.processor = AutoProcessor.from_pretrained(model_name, **self.pixel_budget)
+            # Decoder-only batching: pad on the left so every prompt ends where generation starts
+            self.processor.tokenizer.padding_side = "left"
+            self._disable_unsupported_caches()
         else:
             raise ValueError("Either API details or a model name must be provided for inference.")
 
-    def infer(self, image_data, prompt):
+    def infer(self, image_data, prompt, max_new_tokens=None, json_schema=None):
         """
         Performs inference on the provided image and prompt.
 
         Args:
             image_data (Union[bytes, str, Image.Image]): The image data as bytes, file path, or PIL Image.
             prompt (str): The textual prompt for the model.
+            max_new_tokens (int, optional): Generation budget; defaults to self.max_new_tokens.
+            json_schema (dict, optional): With constrained_decoding, the schema the output must follow.
 
         Returns:
             str: The generated text from the model.
@@ -79,62 +132,335 @@ class QwenV25Infer(InferenceVLComponent):
                 response = self._infer_via_api(image_data, prompt)
                 return response if isinstance(response, str) else str(response)
             elif self.model and self.processor:
-                return self._infer_locally(image_data, prompt)
+                return self._infer_locally(image_data, prompt, max_new_tokens, json_schema)
             else:
                 raise ValueError("Model and processor or API details must be properly initialized for inference.")
         except Exception as e:
             raise RuntimeError(f"Inference failed: {str(e)}") from e
 
-    def _infer_locally(self, image_data, prompt):
+    def infer_batch(self, requests, max_new_tokens=None, json_schema=None, documents=None):
         """
-        Performs local inference using the loaded model.
+        Performs inference on several independent (image, prompt) pairs.
+
+        Locally, the pairs are generated together in left-padded batches of up to
+        `max_batch_size` sequences; each sequence stops at its own end-of-sequence
+        token while the rest of the batch keeps generating. Via the API, the pairs
+        are sent one by one.
 
         Args:
-            image_data (bytes): The image data in bytes format.
-            prompt (str): The textual prompt for the model.
+            requests (list of tuple): (image_data, prompt) pairs, as accepted by infer().
+            max_new_tokens (int, optional): Generation budget; defaults to self.max_new_tokens.
+            json_schema (dict, optional): With constrained_decoding, the schema every output must follow.
+            documents (list, optional): Document id of each pair, which keys the vision cache.
 
         Returns:
-            str: The generated text from the model.
+            list of str: The generated text for each pair, in request order.
         """
+        for image_data, prompt in requests:
+            if not image_data:
+                raise ValueError("Image data cannot be None")
+            if not prompt or not isinstance(prompt, str):
+                raise ValueError("Prompt must be a non-empty string")
+
+        try:
+            if self.client:
+                return [str(self._infer_via_api(image_data, prompt)) for image_data, prompt in requests]
+            elif self.model and self.processor:
+                documents = documents or [None] * len(requests)
+                outputs = []
+                for start in range(0, len(requests), self.max_batch_size):
+                    stop = start + self.max_batch_size
+                    outputs.extend(self._infer_locally_batch(
+                        requests[start:stop], max_new_tokens, json_schema, documents[start:stop]
+                    ))
+                return outputs
+            else:
+                raise ValueError("Model and processor or API details must be properly initialized for inference.")
+        except Exception as e:
+            raise RuntimeError(f"Batch inference failed: {str(e)}") from e
+
+    @staticmethod
+    def _load_image(image_data):
         if isinstance(image_data, bytes):
-            image = Image.open(BytesIO(image_data)).convert("RGB")
+            return Image.open(BytesIO(image_data)).convert("RGB")
         elif isinstance(image_data, Image.Image):
-            image = image_data
+            return image_data
         elif isinstance(image_data, str):
-            image = Image.open(image_data).convert("RGB")
+            return Image.open(image_data).convert("RGB")
         else:
             raise ValueError("Image must be either bytes or Image object.")
 
-        messages = [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "image", "image": image},
-                    {"type": "text", "text": prompt},
-                ],
-            }
-        ]
+    def _infer_locally(self, image_data, prompt, max_new_tokens=None, json_schema=None):
+        """
+        Performs local inference using the loaded model.
+
+        Args:
+            image_data (bytes): The image data in bytes format.
+            prompt (str): The textual prompt for the model.
+
+        Returns:
+            str: The generated text from the model.
+        """
+        return self._infer_locally_batch([(image_data, prompt)], max_new_tokens, json_schema)[0]
+
+    def _infer_locally_batch(self, requests, max_new_tokens=None, json_schema=None, documents=None):
+        """
+        Generates one left-padded batch locally.
+
+        Args:
+            requests (list of tuple): (image_data, prompt) pairs.
+            max_new_tokens (int, optional): Generation budget; defaults to self.max_new_tokens.
+            json_schema (dict, optional): With constrained_decoding, the schema every output must follow.
+            documents (list, optional): Document id of each pair, which keys the vision cache.
+
+        Returns:
+            list of str: The generated text for each pair.
+        """
+        inputs, images = self._prepare_inputs(requests)
+
+        # With left padding every prompt ends at the same position
+        prompt_len = inputs["input_ids"].shape[-1]
+
+        # Generate output; finished sequences are padded until the longest one stops
+        generation_kwargs = self._generation_kwargs(prompt_len, max_new_tokens, json_schema)
+        generation_kwargs["pad_token_id"] = self.processor.tokenizer.pad_token_id
+        with self._generate_lock, torch.no_grad():
+            if self.prefix_cache is not None or self.vision_cache is not None:
+                generated_ids = self._generate_from_caches(inputs, images, generation_kwargs, documents)
+            else:
+                generated_ids = self.model.generate(**inputs, **generation_kwargs)
+        generated_ids = generated_ids[:, prompt_len:]
+        return self.processor.batch_decode(generated_ids, skip_special_tokens=True)
+
+    def _prepare_inputs(self, requests):
+        """
+        Chat-template, pad and tensorize (image, prompt) pairs into one left-padded batch.
+
+        Returns:
+            tuple: (processor inputs on self.device, the loaded PIL images in request order).
+        """
+        images = [self._load_image(image_data) for image_data, _ in requests]
+        conversations = [self._messages(image, prompt) for image, (_, prompt) in zip(images, requests)]
 
         # Prepare inputs using the processor and process_vision_info
-        text = self.processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-        image_inputs, video_inputs = process_vision_info(messages)
+        texts = [
+            self.processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+            for messages in conversations
+        ]
+        image_inputs, video_inputs = process_vision_info(conversations)
         inputs = self.processor(
-            text=[text],
+            text=texts,
             images=image_inputs,
             videos=video_inputs,
             padding=True,
             return_tensors="pt",
         ).to(self.device)
+        return inputs, images
 
-        # Record how many tokens the prompt took:
-        prompt_len = inputs["input_ids"].shape[-1]
+    def _messages(self, image_data, prompt):
+        """
+        Chat messages for one (image, prompt) pair: the image, then the prompt text.
 
-        # Generate output
-        with torch.no_grad():
-            generated_ids = self.model.generate(**inputs, max_new_tokens=50000)
-        generated_ids = generated_ids[:, prompt_len:]
-        generated_text = self.processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
-        return generated_text
+        With the prefix cache on, a Prompt's system part (template + JSON schema) goes
+        into a system message ahead of the image instead, so prompts sharing it share
+        their leading tokens and its prefill can be reused.
+        """
+        system = getattr(prompt, "system", None) if self.prefix_cache is not None else None
+        text = prompt.user if system else prompt
+        messages = [{"role": "system", "content": [{"type": "text", "text": system}]}] if system else []
+        messages.append(
+            {
+                "role": "user",
+                "content": [
+                    {"type": "image", "image": self._load_image(image_data), **self.pixel_budget},
+                    {"type": "text", "text": text},
+                ],
+            }
+        )
+        return messages
+
+    def _generate_from_caches(self, inputs, images, generation_kwargs, documents=None):
+        """
+        Generate while reusing cached prompt-prefix key/values and vision-encoder outputs.
+
+        The prefix is every token before the first <|vision_start|>: chat header, system
+        prompt and schema. It is text only, so its key/values do not depend on the image
+        or anything after it. Steps:
+          1) If the prefix cache is on and all rows share one prefix of at least
+             min_prefix_tokens, fetch its key/values from the LRU (prefilling on a miss).
+          2) Lay them out per row behind each row's left padding, up to column c0 (the first
+             column that is past the prefix in some row); without a prefix, c0 = 0.
+          3) Prefill columns [c0, L - 1) from embeddings (text + cached or fresh vision
+             features), with the multimodal rotary positions of the full prompt.
+          4) Hand the cache to generate(), which only runs the last prompt token and decodes.
+        """
+        input_ids = inputs["input_ids"]
+        attention_mask = inputs["attention_mask"]
+        batch_size, seq_len = input_ids.shape
+        pads = (attention_mask == 0).sum(dim=1).tolist()
+
+        # 1) Shared prefix key/values, one (1, heads, P, head_dim) pair per layer
+        prefix = self._shared_prefix(input_ids, pads) if self.prefix_cache is not None else None
+        cache = DynamicCache()
+        c0 = 0
+        if prefix is not None:
+            prefix_kv = self.prefix_cache.get_or_compute(prefix, lambda: self._prefill_prefix(prefix))
+
+            # 2) Batched cache covering columns [0, c0); padding columns stay zero and masked
+            c0 = min(pads) + len(prefix)
+            for layer_idx, (keys, values) in enumerate(prefix_kv):
+                batch_keys = keys.new_zeros((batch_size, keys.shape[1], c0, keys.shape[3]))
+                batch_values = values.new_zeros((batch_size, values.shape[1], c0, values.shape[3]))
+                for i, pad in enumerate(pads):
+                    batch_keys[i, :, pad:c0] = keys[0, :, :c0 - pad]
+                    batch_values[i, :, pad:c0] = values[0, :, :c0 - pad]
+                cache.update(batch_keys, batch_values, layer_idx)
+
+        # 3) Prefill the rest of the prompt but its last token
+        position_ids, rope_deltas = self._model_attr("get_rope_index")(
+            input_ids, image_grid_thw=inputs.get("image_grid_thw"), attention_mask=attention_mask
+        )
+        if c0 < seq_len - 1:
+            inputs_embeds = self._embed_inputs(inputs, images, documents)
+            # The decoder without the LM head: only the cache is needed, not the logits
+            self.model.model(
+                inputs_embeds=inputs_embeds[:, c0:seq_len - 1],
+                position_ids=position_ids[:, :, c0:seq_len - 1],
+                attention_mask=attention_mask[:, :seq_len - 1],
+                past_key_values=cache,
+                cache_position=torch.arange(c0, seq_len - 1, device=input_ids.device),
+                use_cache=True,
+            )
+
+        # 4) Decode; with rope_deltas set, the model continues the multimodal positions itself
+        self._set_rope_deltas(rope_deltas)
+        return self.model.generate(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            past_key_values=cache,
+            **generation_kwargs,
+        )
+
+    def _shared_prefix(self, input_ids, pads):
+        """
+        The token prefix before the first image, if every row shares it and it is at
+        least min_prefix_tokens long; else None.
+        """
+        vision_start = self.model.config.vision_start_token_id
+        prefixes = set()
+        for row, pad in zip(input_ids.tolist(), pads):
+            if vision_start not in row[pad:]:
+                return None
+            prefixes.add(tuple(row[pad:row.index(vision_start, pad)]))
+        if len(prefixes) != 1:
+            return None
+        prefix = prefixes.pop()
+        return prefix if len(prefix) >= self.min_prefix_tokens else None
+
+    def _prefill_prefix(self, prefix):
+        """
+        Run the text-only prefix through the model and return its per-layer (keys, values).
+        """
+        prefix_ids = torch.tensor([prefix], device=self.model.device)
+        # Text tokens share one position on all three rotary axes
+        position_ids = torch.arange(len(prefix), device=self.model.device).view(1, 1, -1).expand(3, 1, -1)
+        outputs = self.model.model(input_ids=prefix_ids, position_ids=position_ids, use_cache=True)
+        cache = outputs.past_key_values
+        if hasattr(cache, "to_legacy_cache"):
+            return cache.to_legacy_cache()
+        return tuple((layer.keys, layer.values) for layer in cache.layers)
+
+    def _embed_inputs(self, inputs, images, documents=None):
+        """
+        Input embeddings of the full prompt, with the vision tower's features in place
+        of the image placeholder tokens.
+
+        Each image is encoded on its own, so its features can be cached: with the vision
+        cache on, they are keyed by the request's document and the image's pixel content
+        and patch grid, so a page seen by several extraction items is encoded once per
+        document, and a document's entries can be dropped when it finishes.
+        """
+        input_ids = inputs["input_ids"]
+        inputs_embeds = self.model.get_input_embeddings()(input_ids)
+        pixel_values = inputs.get("pixel_values")
+        if pixel_values is None:
+            return inputs_embeds
+
+        visual = self._model_attr("visual")
+        grid_thw = inputs["image_grid_thw"]
+        image_embeds = []
+        offset = 0
+        documents = documents or [None] * len(images)
+        for image, grid, document in zip(images, grid_thw, documents):
+            n_patches = int(grid.prod())
+            patches = pixel_values[offset:offset + n_patches]
+            offset += n_patches
+
+            def encode(patches=patches, grid=grid):
+                return visual(patches.type(visual.dtype), grid_thw=grid.unsqueeze(0))
+
+            if self.vision_cache is None:
+                image_embeds.append(encode())
+            else:
+                digest = hashlib.blake2b(image.tobytes(), digest_size=16).digest()
+                key = (document, digest, image.size, tuple(grid.tolist()))
+                image_embeds.append(self.vision_cache.get_or_compute(key, encode))
+
+        image_embeds = torch.cat(image_embeds, dim=0)
+        image_mask = (input_ids == self.model.config.image_token_id).unsqueeze(-1).expand_as(inputs_embeds)
+        return inputs_embeds.masked_scatter(image_mask, image_embeds.to(inputs_embeds.dtype))
+
+    def clear_vision_cache(self, document=None):
+        """
+        Drop the cached vision-encoder outputs of `document` (e.g. once it is extracted),
+        or every entry if None.
+        """
+        if self.vision_cache is None:
+            return
+        if document is None:
+            self.vision_cache.clear()
+        else:
+            self.vision_cache.drop(lambda key: key[0] == document)
+
+    def _disable_unsupported_caches(self):
+        """
+        Turn the prefix and vision caches off, falling back to plain generate(), when the
+        installed transformers is outside CACHE_TRANSFORMERS_VERSIONS or the loaded model
+        lacks the internals _generate_from_caches() calls.
+        """
+        if self.prefix_cache is None and self.vision_cache is None:
+            return
+        problem = None
+        version = transformers.__version__
+        if Version(version) not in self.CACHE_TRANSFORMERS_VERSIONS:
+            problem = f"transformers {version} is outside the supported range {self.CACHE_TRANSFORMERS_VERSIONS}"
+        else:
+            inner = getattr(self.model, "model", None)
+            missing = [
+                name for name in self.CACHE_MODEL_ATTRIBUTES
+                if not hasattr(self.model, name) and not hasattr(inner, name)
+            ]
+            if inner is None:
+                missing.insert(0, "model")
+            if missing:
+                problem = f"the model has no {', '.join(missing)}"
+        if problem is not None:
+            self.logger.warning(f"Disabling prefix_cache_mb/vision_cache_mb ({problem}); using plain generate()")
+            self.prefix_cache = None
+            self.vision_cache = None
+
+    def _model_attr(self, name):
+        """
+        Attribute of the Qwen2.5-VL model, which newer transformers keep on the inner .model.
+        """
+        if hasattr(self.model, name):
+            return getattr(self.model, name)
+        return getattr(self.model.model, name)
+
+    def _set_rope_deltas(self, rope_deltas):
+        for module in (self.model, getattr(self.model, "model", None)):
+            if module is not None and hasattr(module, "rope_deltas"):
+                module.rope_deltas = rope_deltas
 
     def _infer_via_api(self, image_data, prompt):
         """
@@ -154,12 +480,30 @@ class QwenV25Infer(InferenceVLComponent):
         else:
             return {"error": "API request failed."}
 
-    def infer_lang(self, prompt: str = None) -> str:
+    def _generation_kwargs(self, prompt_len, max_new_tokens=None, json_schema=None):
+        """
+        Token budget, stopping criteria and (with constrained_decoding and a schema)
+        the JSON-schema logits processor shared by every generate() call.
+        """
+        kwargs = {"max_new_tokens": max_new_tokens or self.max_new_tokens}
+        if self.constrained_decoding and json_schema:
+            if self._json_constraint is None:
+                self._json_constraint = JsonSchemaConstraint(self.processor.tokenizer)
+            kwargs["logits_processor"] = self._json_constraint.logits_processor(json_schema)
+        if self.stop_at_json:
+            kwargs["stopping_criteria"] = StoppingCriteriaList(
+                [JsonStoppingCriteria(self.processor.tokenizer, prompt_len)]
+            )
+        return kwargs
+
+    def infer_lang(self, prompt: str = None, max_new_tokens=None, json_schema=None) -> str:
         """
         Run inference using only text input.
 
         Args:
             prompt: Optional; textual prompt for language-based inference.
+            max_new_tokens: Optional; generation budget, defaults to self.max_new_tokens.
+            json_schema: Optional; with constrained_decoding, the schema the output must follow.
 
         Returns:
             str: The model's generated text response.
@@ -188,8 +532,8 @@ class QwenV25Infer(InferenceVLComponent):
                 prompt_len = inputs["input_ids"].shape[-1]
 
                 # Generate output
-                with torch.no_grad():
-                    generated_ids = self.model.generate(**inputs, max_new_tokens=50000)
+                with self._generate_lock, torch.no_grad():
+                    generated_ids = self.model.generate(**inputs, **self._generation_kwargs(prompt_len, max_new_tokens, json_schema))
                 generated_ids = generated_ids[:, prompt_len:]
 
                 return self.processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
@@ -52,9 +52,10 @@ class SmolDoclingInfer(InferenceVLComponent):
         else:
             raise ValueError("Either model_name or api_endpoint+api_token must be provided.")
 
-    def infer(self, image_data=None, prompt: str = None) -> str:
+    def infer(self, image_data=None, prompt: str = None, max_new_tokens: int = None) -> str:
         """
         Vision+Text inference: requires both image_data and prompt.
+        max_new_tokens caps the generation (default 8192 for long DocTags outputs).
         """
         if image_data is None or prompt is None:
             raise ValueError("Both image_data and prompt are required for SmolDocling.")
@@ -64,11 +65,11 @@ class SmolDoclingInfer(InferenceVLComponent):
             return self._infer_via_api(image_data, prompt)
         elif self.model and self.processor:
             self.logger.debug("Performing local SmolDocling inference")
-            return self._infer_locally(image_data, prompt)
+            return self._infer_locally(image_data, prompt, max_new_tokens)
         else:
             raise ValueError("SmolDocling component not properly initialized.")
 
-    def _infer_locally(self, image_data, prompt: str) -> str:
+    def _infer_locally(self, image_data, prompt: str, max_new_tokens: int = None) -> str:
         # Convert to PIL.Image
         if isinstance(image_data, bytes):
             image = Image.open(BytesIO(image_data)).convert("RGB")
@@ -102,7 +103,7 @@ class SmolDoclingInfer(InferenceVLComponent):
         with torch.no_grad():
             generated_ids = self.model.generate(
                 **inputs,
-                max_new_tokens=8192  # For long DocTags outputs
+                max_new_tokens=max_new_tokens or 8192  # For long DocTags outputs
             )
         generated_ids = generated_ids[:, prompt_len:]
         doc_tags = self.processor.batch_decode(
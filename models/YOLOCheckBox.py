@@ -3,7 +3,9 @@ from ultralytics import YOLO
 from matplotlib import pyplot as plt
 import cv2
 import os
+from typing import Union
 import torch
+from PIL import Image
 from common import InferenceVisionComponent
 
 class YOLOCheckBox(InferenceVisionComponent):
@@ -77,7 +79,7 @@ class YOLOCheckBox(InferenceVisionComponent):
         Perform inference on the given image and save the output if required.
 
         Args:
-            image_path: Path to the image for inference.
+            image_path: Path to the image for inference, or a PIL image.
             output_path: Optional path to save the output image with bounding boxes.
 
         Returns:
@@ -150,10 +152,18 @@ class YOLOCheckBox(InferenceVisionComponent):
         checkboxes = sorted(checkboxes, key=lambda x: (x['bbox']['x1'], x['bbox']['y1']))
         return checkboxes
     
-    def infer(self, image_data: str):
-        self.logger.info(f"Running inference on image: {image_data}")
-        base, ext = os.path.splitext(image_data)
-        output_path = f"{base}_cb{ext}"
+    def infer(self, image_data: Union[str, Image.Image]):
+        """
+        Detect checkboxes on a page given as a file path or an in-memory PIL image.
+        An annotated copy is written next to the input only when a file path is given.
+        """
+        output_path = None
+        if isinstance(image_data, str):
+            self.logger.info(f"Running inference on image: {image_data}")
+            base, ext = os.path.splitext(image_data)
+            output_path = f"{base}_cb{ext}"
+        else:
+            self.logger.info(f"Running inference on in-memory image of size {image_data.size}")
         checkboxes = self.get_checked_boxes(image_data, output_path=output_path)
         self.logger.info(f"Detected checkboxes: {checkboxes}")
         return checkboxes
\ No newline at end of file
@@ -1 +1,3 @@
+from models.ModelPrecision import ModelPrecision
+from models.LazyModel import LazyModel
 from models.ModelManager import ModelManager
\ No newline at end of file
@@ -1,16 +1,23 @@
 # src/parsers/parser.py
 
 import importlib
-from typing import Union, List, Type, Any
+import os
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Union, List, Dict, Tuple, Type, Any
 import torch
 from dotenv import load_dotenv
 
-from vector_retrieve import PDFProcessor
-from models import ModelManager
+from vector_retrieve import PDFProcessor, PageStream
+from models import ModelManager, LazyModel
 from common import ExtractionState, BaseComponent
 from extraction_io.ExtractionItems import ExtractionItems, ExtractionItem
 from extraction_io.ExtractionOutputs import ExtractionOutput, ExtractionOutputs
-from src.helper import PromptBuilder, VLMProcessor, PageFinder, ParentProcessor, LMProcessor
+from src.helper import PromptBuilder, VLMProcessor, VLMScheduler, PageFinder, ParentProcessor, LMProcessor, DagExecutor
+from src.parsers import ParseKeyValueGroup
 from config.loader import settings
 
 load_dotenv()
@@ -30,7 +37,12 @@ class Parser(BaseComponent):
       6) After all items are processed, wrap state entries in ExtractionOutputs and write JSON.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, extraction_config_path: str = None, **kwargs):
+        """
+        Args:
+            extraction_config_path: Optional de_config JSON whose retrieval queries are
+                embedded (or loaded from the persistent query cache) at startup.
+        """
 
         # ---------------------------------------------------------------------
         # Pull parser settings from the already‐loaded settings dict
@@ -41,23 +53,67 @@ class Parser(BaseComponent):
         self.vlm_candidate = parser_cfg.get("vlm_candidate", "QwenV25Infer")
         self.embedding_candidate = parser_cfg.get("embedding_candidate", "ColPaliInfer")
         self.cb_candidate = parser_cfg.get("cb_candidate")
+        self.item_workers = max(1, int(parser_cfg.get("item_workers", 1)))
+        self.group_key_values = bool(parser_cfg.get("group_key_values", False))
+        self.lazy_model_loading = bool(parser_cfg.get("lazy_model_loading", False))
+        self.model_load_workers = max(1, int(parser_cfg.get("model_load_workers", 1)))
+        self.document_workers = max(1, int(parser_cfg.get("document_workers", 2)))
+        self.ingest_workers = max(1, int(parser_cfg.get("ingest_workers", 1)))
+        self.streaming_ingest = bool(parser_cfg.get("streaming_ingest", False))
+        vlm_batch_wait_ms = parser_cfg.get("vlm_batch_wait_ms", 20)
+        # Read from config rather than the model, which may not be loaded yet
+        vlm_args = (ModelManager.config.get("models", {}).get(self.vlm_candidate) or {}).get("args") or {}
+        vlm_max_batch_size = vlm_args.get("max_batch_size", 4)
+        pdf_processor_cfg = settings.get("pdf_processor", {}).get("args", {})
 
 
         super().__init__(parser_cfg)
         
-        # 1) Load and initialize models
-        ModelManager.initialize_models(self.device, model_classes=self.models)
-
-        # 2) Instantiate PDFProcessor with the shared ColPaliInfer
-        self.pdf_processor = PDFProcessor(getattr(ModelManager, self.embedding_candidate),
-                                          getattr(ModelManager, self.cb_candidate))
+        # 1) Register the models; load them now (concurrently) unless loading is lazy
+        ModelManager.initialize_models(
+            self.device,
+            model_classes=self.models,
+            lazy=self.lazy_model_loading,
+            load_workers=self.model_load_workers,
+        )
+
+        # 2) Instantiate PDFProcessor with the shared ColPaliInfer. Models are passed as
+        #    LazyModel handles, so a model nobody calls (e.g. the checkbox detector for a
+        #    config without checkbox items) is never loaded in lazy mode.
+        self.pdf_processor = PDFProcessor(ModelManager.lazy(self.embedding_candidate),
+                                          ModelManager.lazy(self.cb_candidate),
+                                          **pdf_processor_cfg)
 
         # 3) Dynamically import and instantiate helper components now that ModelManager is ready
         self.prompt_builder = PromptBuilder()
-        self.vlm_processor = VLMProcessor(getattr(ModelManager, self.vlm_candidate))
+        self.vlm_processor = VLMProcessor(ModelManager.lazy(self.vlm_candidate))
+        # Shared by all concurrently processed items, so their VLM requests are batched together
+        self.vlm_scheduler = VLMScheduler(
+            self.vlm_processor, max_batch_size=vlm_max_batch_size, max_wait_ms=vlm_batch_wait_ms
+        )
         self.page_finder = PageFinder(self.pdf_processor)
         self.parent_processor = ParentProcessor()
-        self.lm_processor = LMProcessor(getattr(ModelManager, self.vlm_candidate))
+        self.lm_processor = LMProcessor(ModelManager.lazy(self.vlm_candidate))
+        # Bounds how many documents are rasterized/embedded at once (see perform_de_batch)
+        self._ingest_slots = threading.Semaphore(self.ingest_workers)
+        # Runs the items' dependency DAG (ExtractionItem.parent) on `item_workers` threads
+        self.item_executor = DagExecutor(self.item_workers, thread_name_prefix="item")
+
+        # 4) Warm the query-embedding cache for a known extraction config
+        if extraction_config_path:
+            self.warm_query_cache(extraction_config_path)
+
+    def warm_query_cache(self, extraction_config_path: str):
+        """
+        Load the embeddings of every retrieval query in an extraction config from the
+        persistent query cache, computing and persisting the missing ones, so documents
+        processed with that config never embed its queries again.
+        """
+        with open(extraction_config_path, "r") as f:
+            extraction_items = self._validate_extraction_items(json.load(f))
+        queries = self.page_finder.planned_queries(list(extraction_items))
+        self.logger.info(f"Warming query-embedding cache with {len(queries)} queries from {extraction_config_path}")
+        self.pdf_processor.warm_query_cache(queries)
 
     def _validate_extraction_items(self, extraction_items: Union[List[dict], ExtractionItems]) -> ExtractionItems:
         """
@@ -85,31 +141,143 @@ class Parser(BaseComponent):
 
         Steps:
           1) Validate `extraction_items` as a Pydantic ExtractionItems.
-          2) Reset ExtractionState (clears images, embeddings, entries).
+          2) Make a fresh, request-scoped ExtractionState current (see ExtractionState.scope()).
           3) Store extraction_items in global state.
           4) Populate images & embeddings by calling PDFProcessor(pdf_path).
-          5) Process each item via _process_all_items().
-          6) Wrap all entries in ExtractionOutputs and write JSON to output_json_path.
-          7) Return the ExtractionOutputs Pydantic object.
+          5) Plan page retrieval for all items in one batched pass.
+          6) Process each item via _process_all_items().
+          7) Wrap all entries in ExtractionOutputs and write JSON to output_json_path.
+          8) Return the ExtractionOutputs Pydantic object.
         """
         # 1) Validate `extraction_items` 
         extraction_items = self._validate_extraction_items(extraction_items)
 
+        # 2) A fresh ExtractionState, current for this document only, so several
+        #    documents can be extracted concurrently by one Parser
+        with ExtractionState.scope() as state:
+            try:
+                return self._perform_de_in_scope(pdf_path, extraction_items, output_json_path)
+            finally:
+                self._release_document(state.document_id)
+
+    def perform_de_batch(
+            self,
+            pdf_paths: List[str],
+            extraction_items: Union[List[dict], ExtractionItems],
+            output_dir: str
+    ) -> Dict[str, Union[ExtractionOutputs, Exception]]:
+        """
+        Extract many documents with one extraction config, pipelined.
+
+        Up to `document_workers` documents are in flight at once, each in its own
+        request-scoped ExtractionState, and at most `ingest_workers` of them are being
+        rasterized and embedded at any time. So while document N is in VLM extraction,
+        document N+1 is already being ingested, and the shared VLMScheduler batches the
+        VLM requests of all in-flight documents together.
+
+        Steps:
+          1) Map every PDF to <output_dir>/<pdf stem>.json, rejecting PDFs whose outputs
+             would collide; validate `extraction_items` once and warm the query cache.
+          2) Run perform_de() for every PDF on the document pool.
+          3) Collect each document's ExtractionOutputs; a failing document is logged
+             and its exception returned in its place, so one bad PDF does not stop a backfill.
+
+        Returns:
+            Dict of pdf_path → ExtractionOutputs (or the Exception it raised), in input order.
+
+        Raises:
+            ValueError: If two PDFs would write the same output file, before any is extracted.
+        """
+        # 1) Output paths, then validate once and embed the config's queries once
+        output_paths = self.batch_output_paths(pdf_paths, output_dir)
+        extraction_items = self._validate_extraction_items(extraction_items)
+        self.pdf_processor.warm_query_cache(self.page_finder.planned_queries(list(extraction_items)))
+        os.makedirs(output_dir, exist_ok=True)
+
+        # 2) Pipelined documents
+        results: Dict[str, Union[ExtractionOutputs, Exception]] = {}
+        with ThreadPoolExecutor(max_workers=self.document_workers, thread_name_prefix="document") as pool:
+            futures = {}
+            for pdf_path, output_json_path in output_paths.items():
+                futures[pdf_path] = pool.submit(self.perform_de, pdf_path, extraction_items, output_json_path)
+
+            # 3) Collect in input order
+            for idx, (pdf_path, future) in enumerate(futures.items(), start=1):
+                try:
+                    results[pdf_path] = future.result()
+                    self.logger.info(f"[Parser] Batch document {idx}/{len(futures)} done: {pdf_path}")
+                except Exception as e:
+                    self.logger.exception(f"[Parser] Batch document {idx}/{len(futures)} failed: {pdf_path}")
+                    results[pdf_path] = e
+        return results
+
+    @staticmethod
+    def batch_output_paths(pdf_paths: List[str], output_dir: str) -> Dict[str, str]:
+        """
+        pdf_path → <output_dir>/<pdf stem>.json for a batch.
+
+        Raises:
+            ValueError: If a PDF is listed twice, or two PDFs share a stem (compared
+                case-insensitively, as on macOS and Windows file systems), listing them.
+        """
+        by_name: Dict[str, List[str]] = {}
+        for pdf_path in pdf_paths:
+            stem = os.path.splitext(os.path.basename(pdf_path))[0]
+            by_name.setdefault(f"{stem}.json".casefold(), []).append(pdf_path)
+        collisions = {name: paths for name, paths in by_name.items() if len(paths) > 1}
+        if collisions:
+            listed = "; ".join(f"{name}: {', '.join(paths)}" for name, paths in collisions.items())
+            raise ValueError(f"PDFs would overwrite each other's output in {output_dir}: {listed}")
+        return {
+            pdf_path: os.path.join(output_dir, f"{os.path.splitext(os.path.basename(pdf_path))[0]}.json")
+            for pdf_path in pdf_paths
+        }
+
+    def _perform_de_in_scope(
+            self,
+            pdf_path: str,
+            extraction_items: ExtractionItems,
+            output_json_path: str
+    ) -> ExtractionOutputs:
+        """
+        Steps 3)–8) of perform_de(), inside the document's ExtractionState scope.
+        """
         self.logger.info("Resetting parser state...")
         self._reset_state()
 
         self.logger.info("Storing extraction_items in global state...")
         self._set_extraction_items_in_state(extraction_items)
 
-        self.logger.info("Converting PDF → images & embeddings...")
-        self._populate_images_and_embeddings(pdf_path)
-
-        self.logger.info("Processing all extraction items...")
-        self._process_all_items()
+        if self.streaming_ingest:
+            # Ingest in the background while items with known pages are already extracted;
+            # the ingest slot is released by the stream once its last stage finishes
+            self.logger.info("Streaming PDF → images & embeddings while extraction starts...")
+            self._ingest_slots.acquire()
+            try:
+                stream = self.pdf_processor.stream(pdf_path, on_finish=self._ingest_slots.release)
+            except Exception:
+                self._ingest_slots.release()
+                raise
+            try:
+                self.logger.info("Processing all extraction items...")
+                self._process_all_items(stream)
+            finally:
+                stream.close()
+        else:
+            # Ingestion (rasterize, embed, plan) is bounded by `ingest_workers` across documents
+            with self._ingest_slots:
+                self.logger.info("Converting PDF → images & embeddings...")
+                self._populate_images_and_embeddings(pdf_path)
+
+                self.logger.info("Planning page retrieval for all extraction items...")
+                self._plan_retrieval()
+
+            self.logger.info("Processing all extraction items...")
+            self._process_all_items()
 
         self.logger.info("Writing final JSON output...")
         return self._write_output(output_json_path)
-    
+
     
 
     def _reset_state(self):
@@ -119,6 +287,19 @@ class Parser(BaseComponent):
         """
         ExtractionState.reset()
 
+    def _release_document(self, document_id: str):
+        """
+        Drop the VLM's cached vision-encoder outputs of a finished document, if it keeps
+        any. Entries are keyed by document, so documents still in flight keep theirs.
+        A lazily loaded VLM that is not loaded yet has no cache, and is not loaded for this.
+        """
+        vlm_infer = self.vlm_processor.vlm_infer
+        if isinstance(vlm_infer, LazyModel) and not vlm_infer.loaded:
+            return
+        clear_vision_cache = getattr(vlm_infer, "clear_vision_cache", None)
+        if clear_vision_cache:
+            clear_vision_cache(document_id)
+
     def _set_extraction_items_in_state(self, extraction_items: ExtractionItems):
         """
         Store the user’s list of ExtractionItem objects in global state so that all
@@ -134,60 +315,223 @@ class Parser(BaseComponent):
         """
         _ = self.pdf_processor(pdf_path)
 
-    def _process_all_items(self):
-        """
-        For each ExtractionItem in the user’s config:
-          1) Determine extype ("key-value" or "bullet-points").
-          2) Determine the list of pages: use `probable_pages` or call PageFinder on embeddings.
-          3) Dynamically instantiate the correct Parse* class via _get_parser_for_type().
-          4) Call parser_instance.run(pages) to get raw fragment/bullet dicts.
-          5) Feed those raw fragments/bullets into the corresponding ResultBuilder (KeyValueResultBuilder or BulletPointsResultBuilder).
-          6) Validate final Pydantic model via ExtractionOutput.model_validate() and store it in state.
-        """
-        for idx, item in enumerate(ExtractionState.get_extraction_items()):
-            self.logger.info("=" * 80)
-            self.logger.info(f"[Parser] Processing item #{idx}: field_name = '{item.field_name}'")
-
-            ExtractionState.update_curr_extraction_item(idx)
-
-            pages = item.probable_pages or []
-            if not pages:
-                # If no explicit probable_pages, use PageFinder to get top‐k pages
-                pages = self.page_finder()
-
-            # 3) Dynamically load and instantiate ParseKeyValue or ParseBulletPoints
-            parser_response_model = self._get_parser_generation_model(item)
-            parser_instance = self._get_parser_for_type(item, parser_response_model)
-            # 4) Gather raw data (list of dicts) by calling parser_instance.run(pages)
-            raw_data = parser_instance(pages)
-
-            ## TODO process with parent items
-            raw_data = self.parent_processor(raw_data)
-
-            # 5) Build and validate a Pydantic model
-            extype = item.type  # e.g. "key-value" or "bullet-points"
-            cls_suffix = "".join(part.capitalize() for part in extype.split("-"))
-            builder_class_name = f"{cls_suffix}ResultBuilder"
-            builder_module = importlib.import_module("extraction_io.result_builders")
-            builder_cls: Type = getattr(builder_module, builder_class_name)
-
-            kwargs = {
-                "field_name": item.field_name,
-                "key": item.description,
-                "fragments": raw_data,
-                "multipage": item.multipage_value
+    def _plan_retrieval(self):
+        """
+        Run PageFinder.plan() once for the whole config, so every item without
+        probable_pages gets its top-k pages from a single batched query × page scoring
+        instead of one retrieval call per item.
+        """
+        self.page_finder.plan()
+
+    def _process_all_items(self, stream: PageStream = None):
+        """
+        Process every ExtractionItem in the user’s config and store the results in config order.
+
+          1) Build the work units: with `group_key_values`, single-page key-value items
+             without parents that retrieve the same pages form one unit (see
+             _group_key_values()); every other item is a unit of its own.
+          2) Build the dependency DAG from ExtractionItem.parent: a unit depends on the
+             units of its items' parents.
+          3) With a `stream` (streaming ingestion still running), add an "ingest" task that
+             waits for the stream and plans retrieval. Early units (items without parents
+             whose probable_pages are known, except checkbox items) only wait for their
+             pages to be rendered; every other unit depends on "ingest".
+          4) Run it with the DagExecutor on `item_workers` threads. A unit starts as soon
+             as its parents' ExtractionOutputs are in state; concurrent units' VLM
+             requests are batched together by the VLMScheduler.
+          5) Responses are stored in the order of the config.
+        """
+        items = list(ExtractionState.get_extraction_items())
+        indexed = list(enumerate(items))
+
+        # 1) Work units, keyed by the config index of their first item. While streaming,
+        #    only early items can be grouped, since the others' pages are not planned yet.
+        parentless = [(idx, item) for idx, item in indexed if not item.parent]
+        early = {idx for idx, item in parentless if item.probable_pages and item.type != "checkbox"}
+        groupable = parentless if stream is None else [(idx, item) for idx, item in parentless if idx in early]
+        groups, singles = self._group_key_values(groupable) if self.group_key_values else ([], groupable)
+        grouped = {idx for members, _ in groups for idx, _ in members}
+        units = {members[0][0]: (self._process_group, members, pages) for members, pages in groups}
+        units.update({idx: (self._process_single, [(idx, item)], None) for idx, item in indexed if idx not in grouped})
+
+        # 2) Dependencies
+        unit_of_field = {item.field_name: key for key, (_, members, _) in units.items() for _, item in members}
+        dependencies = {}
+        for key, (_, members, _) in units.items():
+            dependencies[key] = set()
+            for _, item in members:
+                for parent in item.parent or []:
+                    if parent not in unit_of_field:
+                        raise ValueError(f"Parent item '{parent}' not found for '{item.field_name}'")
+                    dependencies[key].add(unit_of_field[parent])
+
+        # Each unit's outputs are published before its dependents start
+        results: Dict[int, ExtractionOutput] = {}
+
+        def publish(key, outputs):
+            for idx in sorted(outputs):
+                results[idx] = outputs[idx]
+                ExtractionState.add_response(outputs[idx])
+
+        tasks = {key: partial(fn, members, pages) for key, (fn, members, pages) in sorted(units.items())}
+
+        # 3) Streaming: early units wait for their pages, the rest for the whole ingestion
+        if stream is not None:
+            ingest = "ingest"
+            for key, (fn, members, pages) in units.items():
+                if key in early:
+                    needed = pages or [page for _, item in members for page in item.probable_pages]
+                    tasks[key] = partial(self._process_when_rendered, stream, needed, tasks[key])
+                else:
+                    dependencies[key].add(ingest)
+            # Early units come first, so a serial run extracts them before waiting for ingestion
+            tasks = {
+                **{key: task for key, task in tasks.items() if key in early},
+                ingest: partial(self._finish_ingest, stream),
+                **{key: task for key, task in tasks.items() if key not in early},
             }
-            # Call the builder
-            built_model = builder_cls.build(**kwargs)
-            # Always wrap in ExtractionOutput
-            model_obj = ExtractionOutput.model_validate(built_model.model_dump())
+            dependencies[ingest] = set()
 
-            # 6) Add validated model to global state
-            ExtractionState.add_response(model_obj)
+        # 4) Run the DAG
+        self.item_executor.run(tasks, dependencies, on_done=publish)
+
+        # 5) Keep the output in config order
+        ExtractionState.set_responses([results[idx] for idx in sorted(results)])
+
+    def _process_when_rendered(self, stream: PageStream, pages: List[int], process) -> Dict[int, ExtractionOutput]:
+        """
+        Run an early unit once `pages` are rendered, without waiting for the rest of ingestion.
+        """
+        stream.wait_pages(pages)
+        return process()
+
+    def _finish_ingest(self, stream: PageStream) -> Dict[int, ExtractionOutput]:
+        """
+        Wait for streaming ingestion, publish its embeddings and checkboxes, and plan retrieval.
+        """
+        self.pdf_processor.finish_stream(stream)
+        self.logger.info("Planning page retrieval for all extraction items...")
+        self._plan_retrieval()
+        return {}
+
+    def _group_key_values(
+        self,
+        indexed_items: List[Tuple[int, ExtractionItem]]
+    ) -> Tuple[List[Tuple[List[Tuple[int, ExtractionItem]], List[int]]], List[Tuple[int, ExtractionItem]]]:
+        """
+        Group single-page 'key-value' items by the pages they would read.
 
-            # Debug: log extracted values or points
-            root = model_obj.root
-            self.logger.info(f"[Parser] Extracted value for '{item.field_name}': {root.value!r}")
+        Items with the same candidate pages (from `probable_pages` or the retrieval plan)
+        can share one prompt per page. Groups of one, multipage items, other types and
+        items repeating a field_name already in their group are returned as singles.
+
+        Returns:
+            (groups, singles): groups as (members, pages), singles as (idx, item).
+        """
+        by_pages: Dict[Tuple[int, ...], List[Tuple[int, ExtractionItem]]] = {}
+        singles = []
+        for idx, item in indexed_items:
+            if item.type != "key-value" or item.multipage_value:
+                singles.append((idx, item))
+                continue
+            pages = item.probable_pages or self.page_finder(extraction_item=item)
+            members = by_pages.setdefault(tuple(pages), [])
+            if any(member.field_name == item.field_name for _, member in members):
+                # One schema property per field_name: a duplicate would lose its answer
+                singles.append((idx, item))
+                continue
+            members.append((idx, item))
+
+        groups = []
+        for pages, members in by_pages.items():
+            if len(members) > 1:
+                groups.append((members, list(pages)))
+            else:
+                singles.extend(members)
+        return groups, singles
+
+    def _process_single(self, members: List[Tuple[int, ExtractionItem]], pages: Any) -> Dict[int, ExtractionOutput]:
+        idx, item = members[0]
+        # An active caller: its requests may wait for other running units to fill a batch
+        with self.vlm_scheduler.caller():
+            return {idx: self._process_item(idx, item)}
+
+    def _process_group(self, members: List[Tuple[int, ExtractionItem]], pages: List[int]) -> Dict[int, ExtractionOutput]:
+        """
+        Extract a group of key-value items sharing `pages` with one ParseKeyValueGroup pass,
+        then build each item's output from its own fragments.
+        """
+        self.logger.info("=" * 80)
+        self.logger.info(
+            f"[Parser] Processing {len(members)} grouped items on pages {pages}: "
+            f"{[item.field_name for _, item in members]}"
+        )
+
+        parser_instance = ParseKeyValueGroup([item for _, item in members], self.vlm_scheduler, self.prompt_builder)
+        with self.vlm_scheduler.caller():
+            raw_by_field = parser_instance(pages)
+
+        outputs = {}
+        for idx, item in members:
+            raw_data = self.parent_processor(raw_by_field[item.field_name], extraction_item=item)
+            outputs[idx] = self._build_output(item, raw_data)
+        return outputs
+
+    def _process_item(self, idx: int, item: ExtractionItem) -> ExtractionOutput:
+        """
+        Extract one ExtractionItem without touching shared state:
+          1) Determine the list of pages: use `probable_pages` or the retrieval plan (PageFinder).
+          2) Dynamically instantiate the correct Parse* class via _get_parser_for_type().
+          3) Call parser_instance.run(pages) to get raw fragment/bullet dicts.
+          4) Feed those raw fragments/bullets into the corresponding ResultBuilder (KeyValueResultBuilder or BulletPointsResultBuilder).
+          5) Validate and return the final Pydantic model via ExtractionOutput.model_validate().
+        """
+        self.logger.info("=" * 80)
+        self.logger.info(f"[Parser] Processing item #{idx}: field_name = '{item.field_name}'")
+
+        pages = item.probable_pages or []
+        if not pages:
+            # If no explicit probable_pages, use PageFinder to get top‐k pages
+            pages = self.page_finder(extraction_item=item)
+
+        # 2) Dynamically load and instantiate ParseKeyValue or ParseBulletPoints
+        parser_response_model = self._get_parser_generation_model(item)
+        parser_instance = self._get_parser_for_type(item, parser_response_model)
+        # 3) Gather raw data (list of dicts) by calling parser_instance.run(pages)
+        raw_data = parser_instance(pages)
+
+        ## TODO process with parent items
+        raw_data = self.parent_processor(raw_data, extraction_item=item)
+
+        # 4) + 5) Build and validate the output model
+        return self._build_output(item, raw_data)
+
+    def _build_output(self, item: ExtractionItem, raw_data: Any) -> ExtractionOutput:
+        """
+        Feed raw fragments/bullets into the item type's ResultBuilder and wrap the
+        built model in an ExtractionOutput.
+        """
+        extype = item.type  # e.g. "key-value" or "bullet-points"
+        cls_suffix = "".join(part.capitalize() for part in extype.split("-"))
+        builder_class_name = f"{cls_suffix}ResultBuilder"
+        builder_module = importlib.import_module("extraction_io.result_builders")
+        builder_cls: Type = getattr(builder_module, builder_class_name)
+
+        kwargs = {
+            "field_name": item.field_name,
+            "key": item.description,
+            "fragments": raw_data,
+            "multipage": item.multipage_value
+        }
+        # Call the builder
+        built_model = builder_cls.build(**kwargs)
+        # 5) Always wrap in ExtractionOutput
+        model_obj = ExtractionOutput.model_validate(built_model.model_dump())
+
+        # Debug: log extracted values or points
+        root = model_obj.root
+        self.logger.info(f"[Parser] Extracted value for '{item.field_name}': {root.value!r}")
+        return model_obj
 
     def _get_parser_for_type(self, item: ExtractionItem, parser_response_model: Any):
         """
@@ -214,7 +558,7 @@ class Parser(BaseComponent):
             from src.parsers.ParseBase import ParseBase
             parser_cls = ParseBase
 
-        return parser_cls(item, self.vlm_processor, self.prompt_builder, parser_response_model)
+        return parser_cls(item, self.vlm_scheduler, self.prompt_builder, parser_response_model)
 
     def _get_parser_generation_model(self, item: ExtractionItem):
         # Choose JSON schema from the appropriate Pydantic model
@@ -234,14 +578,18 @@ class Parser(BaseComponent):
           a. Each entry is a Pydantic ExtractionOutput.
           b. Call .model_dump() on each to get a raw dict.
           c. Wrap the list of dicts in ExtractionOutputs.model_validate().
-          d. Write the pretty-printed JSON to output_json_path.
+          d. Write the pretty-printed JSON to output_json_path (atomically replaced).
           e. Return the ExtractionOutputs instance.
         """
         all_models = ExtractionState.get_responses()
         raw_list = [m.model_dump() for m in all_models]
         final_output = ExtractionOutputs.model_validate(raw_list)
 
-        with open(output_json_path, "w") as f:
+        # Write to a private file and rename it into place, so concurrent documents with the
+        # same output path never interleave their writes and readers never see a partial file
+        tmp_path = f"{output_json_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
             f.write(final_output.model_dump_json(indent=2))
+        os.replace(tmp_path, output_json_path)
 
         return final_output
\ No newline at end of file
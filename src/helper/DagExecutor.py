@@ -0,0 +1,106 @@
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+from common import BaseComponent
+
+
+class DagExecutor(BaseComponent):
+    """
+    Runs a dependency DAG of tasks on a thread pool.
+
+    Every task whose dependencies have finished is running or queued, so a run takes
+    about critical-path time rather than the sum of all task times. Completion
+    callbacks run on the calling thread, one at a time, before the dependents of the
+    finished task are submitted, so they may publish results the dependents read
+    (e.g. ExtractionState.add_response) without further locking. Tasks run in a copy
+    of the caller's context, so they see its request-scoped ExtractionState.
+    """
+
+    def __init__(self, max_workers: int = 1, thread_name_prefix: str = "dag"):
+        """
+        Args:
+            max_workers: Tasks run concurrently. 1 runs them one by one on the calling thread.
+            thread_name_prefix: Name prefix of the pool's threads.
+        """
+        super().__init__()
+        self.max_workers = max(1, int(max_workers))
+        self.thread_name_prefix = thread_name_prefix
+
+    def run(
+        self,
+        tasks: Dict[Hashable, Callable[[], Any]],
+        dependencies: Dict[Hashable, Iterable[Hashable]],
+        on_done: Optional[Callable[[Hashable, Any], None]] = None,
+    ) -> Dict[Hashable, Any]:
+        """
+        Run every task after the tasks it depends on:
+          1) Count each task's unfinished dependencies; tasks without any are ready.
+          2) Run ready tasks (in `tasks` order) on up to max_workers threads.
+          3) When a task finishes, call on_done(key, result), then start each dependent
+             whose last dependency it was.
+          4) Stop at the first failing task: queued tasks are cancelled and its error re-raised.
+
+        Args:
+            tasks: Key → zero-argument callable.
+            dependencies: Key → keys of the tasks it needs; missing keys have none.
+            on_done: Optional completion callback, called on the calling thread.
+
+        Returns:
+            Key → result of every task.
+
+        Raises:
+            ValueError: If a dependency is not a task, or the dependencies contain a cycle.
+        """
+        # 1) Dependency counts and reverse edges
+        remaining = {}
+        dependents = {key: [] for key in tasks}
+        for key in tasks:
+            needs = set(dependencies.get(key, ()))
+            unknown = needs - tasks.keys()
+            if unknown:
+                raise ValueError(f"Task {key!r} depends on unknown tasks {sorted(map(repr, unknown))}")
+            remaining[key] = len(needs)
+            for dep in needs:
+                dependents[dep].append(key)
+
+        ready = deque(key for key in tasks if remaining[key] == 0)
+        results: Dict[Hashable, Any] = {}
+
+        def finish(key, result):
+            results[key] = result
+            if on_done is not None:
+                on_done(key, result)
+            for child in dependents[key]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+
+        # 2) + 3) Serially on the calling thread
+        if self.max_workers <= 1:
+            while ready:
+                key = ready.popleft()
+                finish(key, tasks[key]())
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.thread_name_prefix) as pool:
+                running = {}
+                while ready or running:
+                    while ready:
+                        key = ready.popleft()
+                        running[pool.submit(contextvars.copy_context().run, tasks[key])] = key
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        key = running.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception:
+                            # 4) Fail fast
+                            for pending in running:
+                                pending.cancel()
+                            raise
+                        finish(key, result)
+
+        if len(results) < len(tasks):
+            blocked = [key for key in tasks if key not in results]
+            raise ValueError(f"Dependency cycle between tasks {blocked}")
+        return results
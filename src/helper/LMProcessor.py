@@ -29,7 +29,10 @@ class LMProcessor(CallableComponent):
             RuntimeError if the LM output cannot be parsed or validated.
         """
         self.logger.info("Running LM inference...")
-        raw_output = self.lm_infer.infer_lang(prompt)
+        generation_kwargs = {"max_new_tokens": getattr(generation_model, "max_new_tokens", None)}
+        if getattr(self.lm_infer, "constrained_decoding", False):
+            generation_kwargs["json_schema"] = generation_model.model_json_schema()
+        raw_output = self.lm_infer.infer_lang(prompt, **generation_kwargs)
         self.logger.info("Finished LM inference.")
 
         try:
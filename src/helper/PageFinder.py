@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from common import CallableComponent, ExtractionState
 from vector_retrieve import PDFProcessor
 from extraction_io.ExtractionItems import ExtractionItem
@@ -15,6 +15,30 @@ class PageFinder(CallableComponent):
         super().__init__()
         self.pdf_processor = pdf_processor
 
+    def build_query(self, extraction_item: ExtractionItem) -> str:
+        """
+        Decide on the embedding-query string for an ExtractionItem.
+        """
+        if extraction_item.search_keys:
+            # Join all search_keys into one query string
+            self.logger.info(f"[PageFinder] Using search_keys: {extraction_item.search_keys}")
+            return " ".join(extraction_item.search_keys)
+
+        # Fallback to combining field_name and description
+        query = f"{extraction_item.field_name}: {extraction_item.description}"
+        self.logger.info(f"[PageFinder] Using default embedding query: '{query}'")
+        return query
+
+    def planned_queries(self, extraction_items: List[ExtractionItem]) -> List[str]:
+        """
+        Embedding queries for every item that PageFinder.plan() would retrieve pages for.
+        """
+        return [
+            self.build_query(item)
+            for item in extraction_items
+            if not item.probable_pages and not item.parent
+        ]
+
     def retrieve_pages(
         self,
         embeddings: List[tuple[int, any]],
@@ -24,20 +48,43 @@ class PageFinder(CallableComponent):
         Given all page embeddings and a validated ExtractionItem,
         decide on an embedding‐query string, then return the top‐k pages.
         """
-        # Determine the embedding query
-        if extraction_item.search_keys:
-            # Join all search_keys into one query string
-            query = " ".join(extraction_item.search_keys)
-            self.logger.info(f"[PageFinder] Using search_keys: {extraction_item.search_keys}")
-        else:
-            # Fallback to combining field_name and description
-            query = f"{extraction_item.field_name}: {extraction_item.description}"
-            self.logger.info(f"[PageFinder] Using default embedding query: '{query}'")
+        query = self.build_query(extraction_item)
 
-        
         # Use PDFProcessor to retrieve the most relevant pages
         return self.pdf_processor.retrieve_relevant_pages(embeddings, query)
 
+    def plan(
+        self,
+        extraction_items: Optional[List[ExtractionItem]] = None,
+        embeddings: Optional[List[tuple[int, any]]] = None
+    ) -> Dict[str, List[int]]:
+        """
+        Retrieval planning stage, run once per document before any item is processed:
+          1) Collect every item that needs retrieval (no probable_pages, no parent).
+          2) Embed all of their queries in batches and score the whole query × page
+             matrix in one pass (checkbox items are restricted to checkbox pages).
+          3) Store field_name → pages in ExtractionState, where __call__ picks them up.
+        """
+        if extraction_items is None:
+            extraction_items = ExtractionState.get_extraction_items()
+        if embeddings is None:
+            embeddings = ExtractionState.get_embeddings()
+
+        items = [item for item in extraction_items if not item.probable_pages and not item.parent]
+        if not items or not embeddings:
+            return {}
+
+        checkbox_pages = set(ExtractionState.get_checkboxes()) if ExtractionState.has_checkboxes() else None
+        queries = [self.build_query(item) for item in items]
+        page_filters = [checkbox_pages if item.type == "checkbox" else None for item in items]
+
+        self.logger.info(f"[PageFinder] Planning retrieval for {len(items)} items over {len(embeddings)} pages")
+        results = self.pdf_processor.retrieve_relevant_pages_batch(embeddings, queries, page_filters=page_filters)
+
+        plan = {item.field_name: pages for item, pages in zip(items, results)}
+        ExtractionState.set_retrieved_pages(plan)
+        return plan
+
     def __call__(
         self,
         embeddings: Optional[List[tuple[int, any]]] = None,
@@ -64,6 +111,11 @@ class PageFinder(CallableComponent):
         if extraction_item.parent:
             return []
 
+        # Pages already resolved by the retrieval plan
+        planned = ExtractionState.get_retrieved_pages(extraction_item.field_name)
+        if planned is not None:
+            return planned
+
         if extraction_item.type == "checkbox" and ExtractionState.has_checkboxes():
             checkboxes = ExtractionState.get_checkboxes()
             if checkboxes:
@@ -3,13 +3,16 @@ from common import CallableComponent, ExtractionState
 
 
 class ParentProcessor(CallableComponent):
-    def __call__(self, raw_data, *args, **kwargs):
+    def __call__(self, raw_data, *args, extraction_item=None, **kwargs):
         """
         Look up the processor name in extraction_item.extra['parent_processor'],
         import that processor class from this module, instantiate it, and
         delegate the call to obtain raw data.
+
+        extraction_item defaults to the current item in ExtractionState.
         """
-        extraction_item = ExtractionState.get_current_extraction_item()
+        if extraction_item is None:
+            extraction_item = ExtractionState.get_current_extraction_item()
         processor_name = extraction_item.extra.get("parent_processor", None)
         if not processor_name:
             return raw_data
@@ -32,5 +35,5 @@ class ParentProcessor(CallableComponent):
 
         # Instantiate and invoke
         processor_instance = processor_cls()
-        raw_data = processor_instance(raw_data, *args, **kwargs)
+        raw_data = processor_instance(raw_data, *args, extraction_item=extraction_item, **kwargs)
         return raw_data
\ No newline at end of file
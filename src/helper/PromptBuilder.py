@@ -1,8 +1,8 @@
 # src/helper/prompt_builder.py
 
 import json
-from typing import Any, Dict
-from common import CallableComponent
+from typing import Any, Dict, List
+from common import CallableComponent, Prompt
 from extraction_io.ExtractionItems import ExtractionItem  # adjust import path if needed
 from config.loader import prompts
 
@@ -65,7 +65,7 @@ class PromptBuilder(CallableComponent):
         schema_dict: dict = None,
         prev_value: str = "",
         **override_vars: Any,
-    ) -> str:
+    ) -> Prompt:
         """
         Build a prompt based on an ExtractionItem and an optional prev_value.
         Also accepts keyword‐args for any placeholders named in `vars: […]` for instruction templates.
@@ -77,7 +77,8 @@ class PromptBuilder(CallableComponent):
           override_vars: Mapping of placeholder‐name → override value (highest priority).
 
         Returns:
-          A single string combining the system‐schema prompt and the user prompt.
+          A Prompt: a single string combining the system‐schema prompt and the user prompt,
+          with the two parts also available as .system and .user.
         """
         # 1) Determine which "user" section to use
         raw_type = item.type  # e.g. "key-value", "bullet-points", "summarization", "checkbox"
@@ -201,10 +202,43 @@ class PromptBuilder(CallableComponent):
             fields_to_summarize=item.extra.get("fields_to_summarize", []),
         )
 
-        full_prompt = system_part + "\n" + user_part
+        # A str of system_part + "\n" + user_part that also keeps both parts
+        full_prompt = Prompt(system_part, user_part)
         self.logger.debug(f"Built prompt for '{item.field_name}':\n{full_prompt}")
         return full_prompt
 
+    def build_group(
+        self,
+        items: List[ExtractionItem],
+        schema_dict: dict = None,
+    ) -> Prompt:
+        """
+        Build one prompt asking for several single-page key-value fields at once
+        (the `key_value_group` user template), against the merged schema of
+        GroupedKeyValueGeneration.for_items(items).
+
+        Returns:
+          A Prompt with build()'s system template and a user part listing every field.
+          A system template that names the field gets every grouped field name and
+          description, joined.
+        """
+        schema_text = json.dumps(schema_dict, indent=2) if schema_dict else ""
+        system_part = PromptBuilder._templates["system"].format(
+            schema=schema_text,
+            field_name=", ".join(item.field_name for item in items),
+            description="; ".join(item.description for item in items),
+            extraction_type="key-value",
+        )
+        fields_text = "\n".join(f'- "{item.field_name}": {item.description}' for item in items)
+        user_part = PromptBuilder._templates["user"]["key_value_group"].format(
+            fields=fields_text,
+            postfix=PromptBuilder._templates["postfix"],
+        )
+
+        full_prompt = Prompt(system_part, user_part)
+        self.logger.debug(f"Built grouped prompt for {[item.field_name for item in items]}:\n{full_prompt}")
+        return full_prompt
+
     def _render_from_dict(
         self,
         instr_obj: Dict[str, Any],
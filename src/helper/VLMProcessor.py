@@ -1,4 +1,4 @@
-from common import CallableComponent
+from common import CallableComponent, ExtractionState
 import json
 from pydantic import ValidationError
 from common import DirtyJsonParser
@@ -12,7 +12,7 @@ class VLMProcessor(CallableComponent):
         super().__init__()
         self.vlm_infer = vlm_infer
 
-    def extract(self, image_data, prompt, generation_model):
+    def extract(self, image_data, prompt, generation_model, max_new_tokens=None):
         """
         Runs the VLM inference on image_data with the given prompt, then parses the JSON and validates.
 
@@ -20,6 +20,7 @@ class VLMProcessor(CallableComponent):
             image_data | PIL.Image.Image - image where extraction to be performed.
             prompt | str - extraction prompt asking for JSON only.
             typ | str - type of extraction. One of ["key-value", "bullet-points"]
+            max_new_tokens | int - generation budget; None uses the one generation_model declares.
 
         Returns:
             A Pydantic model instance (KVGeneration or BulletPointsGeneration) on success.
@@ -28,9 +29,62 @@ class VLMProcessor(CallableComponent):
             RuntimeError if the VLM output cannot be parsed or validated.
         """
         self.logger.info("Running VLM inference on image_data...")
-        raw_output = self.vlm_infer.infer(image_data, prompt)
+        raw_output = self.vlm_infer.infer(image_data, prompt, **self._generation_kwargs(generation_model, max_new_tokens))
         self.logger.info("Finished VLM inference on image_data.")
+        return self._parse(raw_output, generation_model)
 
+    def extract_batch(self, requests, generation_model, return_exceptions=False, documents=None, max_new_tokens=None):
+        """
+        Runs the VLM on several independent (image_data, prompt) pairs in one batched
+        call, then parses and validates every output against generation_model.
+
+        Arguments:
+            requests | list - (PIL.Image.Image, prompt) pairs.
+            generation_model | pydantic model class each output is validated against.
+            return_exceptions | bool - if True, an output that fails parsing or validation
+                is returned as its RuntimeError instead of raising.
+            documents | list - document id (ExtractionState.document_id) of each request, which
+                keys the VLM's per-document caches; defaults to the current document.
+            max_new_tokens | int - generation budget; None uses the one generation_model declares.
+
+        Returns:
+            A list with one Pydantic model instance (or RuntimeError) per request.
+        """
+        self.logger.info(f"Running batched VLM inference on {len(requests)} images...")
+        if documents is None:
+            documents = [ExtractionState.get_document_id()] * len(requests)
+        raw_outputs = self.vlm_infer.infer_batch(
+            requests, documents=documents, **self._generation_kwargs(generation_model, max_new_tokens)
+        )
+        self.logger.info("Finished batched VLM inference.")
+
+        results = []
+        for raw_output in raw_outputs:
+            try:
+                results.append(self._parse(raw_output, generation_model))
+            except RuntimeError as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    def _generation_kwargs(self, generation_model, max_new_tokens=None):
+        """
+        Generation options derived from the generation model:
+          - max_new_tokens: the caller's budget if given, else the one the model declares
+            (e.g. KeyValueGeneration.max_new_tokens).
+          - json_schema: its JSON schema, when the VLM decodes with constrained_decoding.
+        """
+        kwargs = {"max_new_tokens": max_new_tokens or getattr(generation_model, "max_new_tokens", None)}
+        if getattr(self.vlm_infer, "constrained_decoding", False):
+            kwargs["json_schema"] = generation_model.model_json_schema()
+        return kwargs
+
+    @staticmethod
+    def _parse(raw_output, generation_model):
+        """
+        Parse one raw VLM output as JSON and validate it against generation_model.
+        """
         try:
             # Attempt to parse as JSON string
             parsed = DirtyJsonParser.parse(raw_output)
@@ -43,5 +97,5 @@ class VLMProcessor(CallableComponent):
         except ValidationError as e:
             raise RuntimeError(f"VLM JSON failed schema validation: {e}") from e
 
-    def __call__(self, image_data, prompt, generation_model, *args, **kwargs):
-        return self.extract(image_data, prompt, generation_model)
+    def __call__(self, image_data, prompt, generation_model, *args, max_new_tokens=None, **kwargs):
+        return self.extract(image_data, prompt, generation_model, max_new_tokens=max_new_tokens)
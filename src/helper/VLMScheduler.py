@@ -0,0 +1,212 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future
+from typing import Any, List, Optional, Tuple
+
+from common import CallableComponent, ExtractionState
+
+
+class VLMScheduler(CallableComponent):
+    """
+    Gathers VLM requests from many concurrently running Parse* instances and
+    dispatches them to the VLM in shared batches.
+
+    Exposes the same calls as VLMProcessor (__call__ and extract_batch), so a
+    Parse* instance can use either. Each request is queued with a Future; a
+    dispatcher thread:
+      1) Groups pending requests by (generation_model, max_new_tokens, image size,
+         prompt-length bucket), so sequences in a batch need little padding and share
+         a schema and budget.
+      2) Waits until the oldest pending request is `max_wait_ms` old, until a group
+         is full, or until every active caller (see caller()) is blocked on its
+         requests, since then nobody is left to fill the batch. A lone caller is
+         therefore dispatched at once.
+      3) Sends the group holding the overdue request (or else the full group), up
+         to `max_batch_size` requests, through VLMProcessor.extract_batch() and
+         resolves each request's Future. A request of a rare shape is therefore
+         served within about max_wait_ms, however busy the other groups are.
+    """
+
+    def __init__(self, vlm_processor: Any, max_batch_size: int = 4, max_wait_ms: float = 20):
+        """
+        Args:
+            vlm_processor: The VLMProcessor that runs and validates each batch.
+            max_batch_size: Most requests per dispatched batch, normally the VLM's own
+                max_batch_size setting. Taken as an argument, so building the scheduler
+                does not load a lazily loaded VLM.
+            max_wait_ms: How long the oldest request may wait for its batch to fill.
+        """
+        super().__init__()
+        self.vlm_processor = vlm_processor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max_wait_ms / 1000.0
+        # group key -> list of (enqueue time, (image, prompt), future, document id)
+        self._pending: "OrderedDict[tuple, List[Tuple[float, Tuple[Any, str], Future, str]]]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Units of work registered by caller(), and callers blocked in extract_batch()
+        self._callers = 0
+        self._waiting = 0
+
+    @staticmethod
+    def _group_key(request: Tuple[Any, str], generation_model: Any, max_new_tokens: Optional[int] = None) -> tuple:
+        image, prompt = request
+        size = getattr(image, "size", None)
+        # Power-of-two buckets of prompt length
+        return generation_model, max_new_tokens, size, len(prompt).bit_length()
+
+    def submit(
+        self,
+        requests: List[Tuple[Any, str]],
+        generation_model: Any,
+        max_new_tokens: Optional[int] = None,
+    ) -> List[Future]:
+        """
+        Queue (image, prompt) requests for generation_model and return one Future per request.
+        Each Future resolves to the validated Pydantic instance, or to the RuntimeError
+        raised while parsing that output. max_new_tokens overrides the budget the
+        generation model declares (see VLMProcessor.extract_batch).
+        """
+        return self._submit(requests, generation_model, max_new_tokens)
+
+    def _submit(
+        self,
+        requests: List[Tuple[Any, str]],
+        generation_model: Any,
+        max_new_tokens: Optional[int] = None,
+        waiting: bool = False,
+    ) -> List[Future]:
+        futures = []
+        # Submitted from the document's own context; batches mix documents
+        document = ExtractionState.get_document_id()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("VLMScheduler is closed")
+            # Counted together with the enqueue, so the dispatcher never sees the caller
+            # waiting without its requests
+            self._waiting += waiting
+            self._ensure_dispatcher()
+            now = time.monotonic()
+            for request in requests:
+                future = Future()
+                self._pending.setdefault(self._group_key(request, generation_model, max_new_tokens), []).append((now, request, future, document))
+                futures.append(future)
+            self._condition.notify()
+        return futures
+
+    def extract_batch(
+        self,
+        requests: List[Tuple[Any, str]],
+        generation_model: Any,
+        return_exceptions: bool = False,
+        max_new_tokens: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Blocking equivalent of VLMProcessor.extract_batch(), batched with other callers' requests.
+        """
+        futures = self._submit(requests, generation_model, max_new_tokens, waiting=True)
+        try:
+            results = [future.result() for future in futures]
+        finally:
+            with self._condition:
+                self._waiting -= 1
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
+    def __call__(self, image_data, prompt, generation_model, *args, max_new_tokens=None, **kwargs):
+        return self.extract_batch([(image_data, prompt)], generation_model, max_new_tokens=max_new_tokens)[0]
+
+    @contextmanager
+    def caller(self):
+        """
+        Mark a unit of work (e.g. one extraction item) as an active caller while the
+        block runs. Requests wait up to max_wait_ms for other active callers only; once
+        all of them are blocked in extract_batch(), their requests are dispatched at once.
+        """
+        with self._condition:
+            self._callers += 1
+        try:
+            yield self
+        finally:
+            with self._condition:
+                self._callers -= 1
+                self._condition.notify()
+
+    def _all_callers_waiting(self) -> bool:
+        return self._callers > 0 and self._waiting >= self._callers
+
+    def close(self) -> None:
+        """
+        Stop the dispatcher once the queued requests have been served.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_dispatcher(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._dispatch_loop, name="VLMScheduler", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> Optional[Tuple[tuple, List[Tuple[float, Tuple[Any, str], Future, str]]]]:
+        """
+        Block until a batch is due and pop it with its group key; None once closed and drained.
+        """
+        with self._condition:
+            while True:
+                if self._pending:
+                    # Entries of a group are in arrival order, so its head is its oldest request
+                    oldest = min(self._pending, key=lambda key: self._pending[key][0][0])
+                    due = self._pending[oldest][0][0] + self.max_wait - time.monotonic()
+                    if due <= 0 or self._closed or self._all_callers_waiting():
+                        key = oldest
+                    else:
+                        key = next(
+                            (key for key, entries in self._pending.items() if len(entries) >= self.max_batch_size),
+                            None,
+                        )
+                        if key is None:
+                            self._condition.wait(due)
+                            continue
+                    entries = self._pending[key]
+                    batch, rest = entries[:self.max_batch_size], entries[self.max_batch_size:]
+                    if rest:
+                        self._pending[key] = rest
+                    else:
+                        del self._pending[key]
+                    return key, batch
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            next_batch = self._next_batch()
+            if next_batch is None:
+                return
+            (generation_model, max_new_tokens, *_), batch = next_batch
+            self.logger.info(f"Dispatching VLM batch of {len(batch)} ({generation_model.__name__})")
+            try:
+                results = self.vlm_processor.extract_batch(
+                    [request for _, request, _, _ in batch],
+                    generation_model,
+                    return_exceptions=True,
+                    documents=[document for _, _, _, document in batch],
+                    max_new_tokens=max_new_tokens,
+                )
+            except Exception as e:
+                for _, _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future, _), result in zip(batch, results):
+                future.set_result(result)
@@ -1,5 +1,7 @@
 from src.helper.PageFinder import PageFinder
 from src.helper.PromptBuilder import PromptBuilder
 from src.helper.VLMProcessor import VLMProcessor
+from src.helper.VLMScheduler import VLMScheduler
 from src.helper.LMProcessor import LMProcessor
 from src.helper.ParentProcessor import ParentProcessor
+from src.helper.DagExecutor import DagExecutor
@@ -14,12 +14,13 @@ class ExtractionItemsSummariser(CallableComponent):
             raise ValueError("VLM candidate not found in config.")
         self.lm_processor = LMProcessor(getattr(ModelManager, self.vlm_candidate))
 
-    def __call__(self, raw_data, *args, **kwargs):
+    def __call__(self, raw_data, *args, extraction_item=None, **kwargs):
         """
         Summarize the raw_data content using ModelManager, including context
         from any parent fields, and return a JSON matching the SummaryOutput schema.
         """
-        extraction_item = ExtractionState.get_current_extraction_item()
+        if extraction_item is None:
+            extraction_item = ExtractionState.get_current_extraction_item()
         # If there's no special parent_processor or no parents, just passthrough
         if not extraction_item.extra.get("parent_processor") or not extraction_item.parent:
             return raw_data
@@ -1,7 +1,7 @@
 # src/parsers/parse_base.py
 
 import json
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from common import CallableComponent, ExtractionState
 from extraction_io.ExtractionItems import ExtractionItem
@@ -12,12 +12,20 @@ class ParseBase(CallableComponent):
       1) Fetch the correct JSON schema via _choose_schema().
       2) Iterate over all specified pages.
       3) Maintain a running `prev_value` string (for multipage fields).
-      4) Delegate single‐page logic to _process_page().
+      4) Delegate single‐page logic to _prepare_page() and _parse_output().
       5) Expose a __call__ alias so instances can be invoked directly.
 
+    Pages are generated one at a time, in retrieval order. A multipage field passes
+    the previous pages' results into each prompt; any other field stops at the first
+    page that returns a result, so it costs a single generation. Batching happens
+    across items instead: concurrently running parsers share VLM batches through the
+    VLMScheduler.
+
     Subclasses MUST implement:
       - _choose_schema() -> Dict[str, Any]: return a Pydantic-generated JSON schema.
-      - _process_page(page_num: int, prev_value: str) -> Optional[Union[dict, List[dict]]]:
+      - _prepare_page(page_num: int, page_result: List) -> Optional[Tuple[image, str]]:
+          the page image and prompt to send to the VLM, or None to skip the page.
+      - _parse_output(page_num: int, page_result: List, raw_output) -> Optional[Union[dict, List[dict]]]:
           • For "key-value": return a dict {"value": str, "post_processing_value": Optional[str], "page_number": int}.
           • For "bullet-points": return a List[dict], each {"value": str, "post_processing_value": None, "page_number": int, "point_number": int}.
           • Return None if no data should be added for that page.
@@ -26,8 +34,8 @@ class ParseBase(CallableComponent):
     def __init__(
         self,
         item: ExtractionItem,
-        vlm_processor: Any,      # The VLM inference engine (implements .infer(image, prompt, typ=...))
-        prompt_builder: Any,      # The PromptBuilder (callable with (item, prev_value) -> str)
+        vlm_processor: Any,      # The VLMProcessor (callable with (image, prompt, generation_model))
+        prompt_builder: Any,      # The PromptBuilder (callable with (item, schema, prev_value) -> str)
         parser_response_model: Any,
     ):
         super().__init__()
@@ -44,31 +52,56 @@ class ParseBase(CallableComponent):
         """
         raise NotImplementedError
 
-    def _process_page(
+    def _prepare_page(
+        self,
+        page_num: int,
+        page_result: List[Dict[str, Any]]
+    ) -> Optional[Tuple[Any, str]]:
+        """
+        Prepare one page for the VLM. Must:
+          1) Fetch the image for page_num via ExtractionState.get_page_image().
+          2) Build a prompt via self.prompt_builder(self.item, schema, prev_value).
+          3) Return (image, prompt), or None if the page should be skipped.
+        """
+        raise NotImplementedError
+
+    def _parse_output(
         self,
         page_num: int,
-        prev_value: str
+        page_result: List[Dict[str, Any]],
+        raw_output: Any
     ) -> Optional[Any]:
         """
-        Perform one-page extraction. Must:
-          1) Locate the image for page_num in ExtractionState.get_images().
-          2) Build a prompt via self.prompt_builder(self.item, prev_value).
-          3) Run self.vlm_processor(img, prompt, typ=<extraction_type>).
-          4) Normalize the raw output into:
-             - A single dict (for key-value), OR
-             - A list of dicts (for bullet-points).
-          5) Return None if no extraction should be recorded for this page.
+        Normalize the validated VLM output for one page into:
+          - A single dict (for key-value), OR
+          - A list of dicts (for bullet-points).
+        Return None if no extraction should be recorded for this page.
         """
         raise NotImplementedError
 
+    def _process_page(
+        self,
+        page_num: int,
+        page_result: List[Dict[str, Any]]
+    ) -> Optional[Any]:
+        """
+        Perform one-page extraction: _prepare_page(), one VLM call, _parse_output().
+        """
+        prepared = self._prepare_page(page_num, page_result)
+        if prepared is None:
+            return None
+        img, prompt = prepared
+        raw_output = self.vlm_processor(img, prompt, self.parser_response_model)
+        return self._parse_output(page_num, page_result, raw_output)
+
     def run(self, pages: List[int]) -> List[Dict[str, Any]]:
         """
         Orchestrate multi-page extraction:
           a. Fetch JSON schema from _choose_schema().
-          b. Iterate through `pages` in order.
-          c. For each page, call _process_page(page, prev_value).
+          b. Iterate through `pages` in order, calling _process_page(page, results so far).
              - If result is a dict, append and update prev_value with result["value"].
              - If result is a list, extend; prev_value does not change.
+          c. Stop after the first result unless the field is multipage.
           d. Return a flat list of fragment/point dicts.
         """
         # 1) Pull in the Pydantic JSON schema for instructions
@@ -104,4 +137,4 @@ class ParseBase(CallableComponent):
         Allow the instance itself to be called with a list of pages.
         Equivalent to invoking .run(pages).
         """
-        return self.run(pages)
\ No newline at end of file
+        return self.run(pages)
@@ -1,7 +1,6 @@
 # src/parsers/parse_bullet_points.py
 
-from typing import List, Dict, Any
-from PIL import Image
+from typing import List, Dict, Any, Optional, Tuple
 
 from extraction_io.generation_utils import BulletPointsGeneration
 from src.parsers.ParseBase import ParseBase
@@ -11,46 +10,50 @@ class ParseBulletPoints(ParseBase):
     """
     Concrete parser for 'bullet-points' extraction. Implements:
       - _choose_schema(): Returns the BulletPoints Pydantic schema.
-      - _process_page(): Extract all bullets on one page (ignoring prev_value).
+      - _prepare_page(): Build the image + prompt for one page.
+      - _parse_output(): Turn the VLM output into a list of numbered bullet dicts.
     """
 
     def _choose_schema(self) -> Dict[str, Any]:
         # Return the JSON schema for BulletPointsOutput
         return BulletPointsGeneration.model_json_schema()
 
-    def _process_page(
+    def _prepare_page(
         self,
         page_num: int,
-        page_result: List[Any]  # Not used for bullet-points
-    ) -> List[Dict[str, object]]:
+        page_result: List[Any]
+    ) -> Optional[Tuple[Any, str]]:
         """
         1) Locate the image for page_num.
-        2) Build and send the prompt (no prev_value used).
-        3) Parse the VLM output into a list of bullet dicts.
-        4) Return List[{"value": ..., "post_processing_value": None, "page_number": page_num, "point_number": idx}, ...].
+        2) Build the prompt (including the points found so far).
+        3) Return (image, prompt), or None if the page has no image.
         """
         raw_val = [{"page_number": pr["page_number"], "values": pr["value"]} for pr in page_result]
         prev_value = f"{raw_val}"
-        n_bulltes = len(page_result)
-
-        # Find the matching image path
-        image_path = None
-        for (num, path) in ExtractionState.get_images():
-            if num == page_num:
-                image_path = path
-                break
 
-        # If no image found, return empty list
-        if image_path is None:
-            return []
+        # Fetch the decoded page image (shared LRU, decoded once per document)
+        img = ExtractionState.get_page_image(page_num)
 
-        img = Image.open(image_path).convert("RGB")
+        # If no image found, skip the page
+        if img is None:
+            return None
 
-        # Build the prompt (prev_value not needed)
+        # Build the prompt
         prompt = self.prompt_builder(self.item, self.parser_response_model_schema, prev_value)
+        return img, prompt
 
-        # Call the VLM to get raw output
-        raw_output = self.vlm_processor(img, prompt, self.parser_response_model)
+    def _parse_output(
+        self,
+        page_num: int,
+        page_result: List[Any],
+        raw_output: Any
+    ) -> List[Dict[str, object]]:
+        """
+        Parse the VLM output into
+        List[{"value": ..., "post_processing_value": None, "page_number": page_num, "point_number": idx}, ...],
+        numbering points after those already in page_result.
+        """
+        n_bulltes = len(page_result)
 
         # Normalize raw_output into a list of strings
         bullets: List[str] = []
@@ -1,7 +1,6 @@
 # src/parsers/parse_checkbox.py
 
-from typing import List, Dict, Any
-from PIL import Image
+from typing import List, Dict, Any, Optional, Tuple
 
 from extraction_io.generation_utils import CheckboxGeneration
 from src.parsers.ParseBase import ParseBase
@@ -11,51 +10,53 @@ class ParseCheckbox(ParseBase):
     """
     Concrete parser for 'checkbox' extraction. Implements:
       - _choose_schema(): Returns the CheckboxGeneration JSON schema.
-      - _process_page(): Extract checkbox result from one page.
+      - _prepare_page(): Build the image + prompt for a page with detected checkboxes.
+      - _parse_output(): Turn the VLM output into the checkbox result dict.
     """
 
     def _choose_schema(self) -> Dict[str, Any]:
         # Return the JSON schema for CheckboxGeneration
         return CheckboxGeneration.model_json_schema()
 
-    def _process_page(
+    def _prepare_page(
         self,
         page_num: int,
         page_result: List[Any]  # Not used for checkboxes
-    ) -> Dict[str, object]:
+    ) -> Optional[Tuple[Any, str]]:
         """
-        1) Locate the image for page_num.
-        2) Build and send the prompt (no prev_value).
-        3) Parse the VLM output into a dict with:
-           {
-             "selected_option": <str> or None,
-             "selected_options": <List[str]> or None,
-             "continue_next_page": <bool>,
-             "page_number": <int>
-           }
+        1) Skip pages without detected checkboxes.
+        2) Locate the image for page_num.
+        3) Build the prompt (no prev_value) and return (image, prompt).
         """
         if page_num not in ExtractionState.get_checkboxes():
             return None
 
-        # Find the matching image path
-        image_path = None
-        for (num, path) in ExtractionState.get_images():
-            if num == page_num:
-                image_path = path
-                break
-
-        # If no image found, return empty dict
-        if image_path is None:
-            return {}
+        # Fetch the decoded page image (shared LRU, decoded once per document)
+        img = ExtractionState.get_page_image(page_num)
 
-        img = Image.open(image_path).convert("RGB")
+        # If no image found, skip the page
+        if img is None:
+            return None
 
         # Build the prompt (no prev_value needed)
         prompt = self.prompt_builder(self.item, self.parser_response_model_schema, "")
+        return img, prompt
 
-        # Call the VLM to get raw output
-        raw_output = self.vlm_processor(img, prompt, self.parser_response_model)
-
+    def _parse_output(
+        self,
+        page_num: int,
+        page_result: List[Any],
+        raw_output: Any
+    ) -> Dict[str, object]:
+        """
+        Parse the VLM output into a dict with:
+           {
+             "selected_option": <str> or None,
+             "selected_options": <List[str]> or None,
+             "continue_next_page": <bool>,
+             "page_number": <int>
+           }
+        """
         # Normalize raw_output into the expected dict
         # raw_output may be a Pydantic model or a plain dict
         if hasattr(raw_output, "selected_option") or hasattr(raw_output, "selected_options"):
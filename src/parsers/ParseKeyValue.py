@@ -1,7 +1,6 @@
 # src/parsers/parse_key_value.py
 
-from typing import List, Dict, Any
-from PIL import Image
+from typing import List, Dict, Any, Optional, Tuple
 
 from extraction_io.generation_utils import KeyValueGeneration
 from src.parsers.ParseBase import ParseBase
@@ -11,25 +10,24 @@ class ParseKeyValue(ParseBase):
     """
     Concrete parser for 'key-value' extraction. Implements:
       - _choose_schema(): Returns the KV Pydantic schema.
-      - _process_page(): Extract one fragment per page, updating prev_value.
+      - _prepare_page(): Build the image + prompt for one page, including prev_value.
+      - _parse_output(): Turn the VLM output into one fragment dict.
     """
 
     def _choose_schema(self) -> Dict[str, Any]:
         # Return the JSON schema for KeyValueOutput
         return KeyValueGeneration.model_json_schema()
 
-    def _process_page(
+    def _prepare_page(
         self,
         page_num: int,
         page_result: List[Any]
-    ) -> Dict[str, object]:
+    ) -> Optional[Tuple[Any, str]]:
         """
         1) Locate the image for page_num.
-        2) Build and send the prompt (including prev_value).
-        3) Parse the VLM output into a single dict.
-        4) Return {"value": ..., "post_processing_value": ..., "page_number": page_num}.
+        2) Build the prompt (including prev_value from the fragments so far).
+        3) Return (image, prompt), or None if the page has no image.
         """
-        # Find the matching image path
         raw_val = [
             {
                 "page_number": pr["page_number"],
@@ -38,24 +36,26 @@ class ParseKeyValue(ParseBase):
             for pr in page_result
         ]
         prev_value = f"{raw_val}"
-        image_path = None
-        for (num, path) in ExtractionState.get_images():
-            if num == page_num:
-                image_path = path
-                break
+        # Fetch the decoded page image (shared LRU, decoded once per document)
+        img = ExtractionState.get_page_image(page_num)
 
         # If no image found (shouldn't happen if pages list is valid), return None
-        if image_path is None:
+        if img is None:
             return None
 
-        img = Image.open(image_path).convert("RGB")
-
         # Build the prompt using the PromptBuilder (passes previous concatenated value)
         prompt = self.prompt_builder(self.item, self.parser_response_model_schema, prev_value)
+        return img, prompt
 
-        # Call the VLM to get raw output
-        raw_output = self.vlm_processor(img, prompt, self.parser_response_model)
-
+    def _parse_output(
+        self,
+        page_num: int,
+        page_result: List[Any],
+        raw_output: Any
+    ) -> Dict[str, object]:
+        """
+        Parse the VLM output into {"value": ..., "post_processing_value": ..., "page_number": page_num}.
+        """
         # Normalize raw_output into primitives
         if isinstance(raw_output, dict):
             val  = raw_output.get("value", "")
@@ -0,0 +1,88 @@
+# src/parsers/parse_key_value_group.py
+
+from typing import List, Dict, Any, Optional, Tuple
+
+from extraction_io.ExtractionItems import ExtractionItem
+from extraction_io.generation_utils import GroupedKeyValueGeneration
+from src.parsers.ParseBase import ParseBase
+from common import ExtractionState
+
+
+class ParseKeyValueGroup(ParseBase):
+    """
+    Grouped parser for several single-page 'key-value' items that share their candidate
+    pages. One prompt asks for all of the fields at once, against a merged generation
+    model built by GroupedKeyValueGeneration.for_items(). Pages are tried in retrieval
+    order and the first page with an image is generated once, exactly as each ungrouped
+    ParseKeyValue would do; its output is then split per field. Implements:
+      - _choose_schema(): Returns the merged schema.
+      - _prepare_page(): Build the image + grouped prompt for one page.
+      - _process_page(): One generation, with the group's token budget.
+      - _parse_output(): Split the merged output into one fragment dict per field.
+      - run(): ParseBase.run(), regrouped by field_name.
+    """
+
+    def __init__(self, items: List[ExtractionItem], vlm_processor: Any, prompt_builder: Any):
+        self.items = items
+        # Passed with every generation; the merged model itself declares no budget
+        self.max_new_tokens = GroupedKeyValueGeneration.budget(len(items))
+        super().__init__(items[0], vlm_processor, prompt_builder, GroupedKeyValueGeneration.for_items(items))
+
+    def _choose_schema(self) -> Dict[str, Any]:
+        return self.parser_response_model_schema
+
+    def _prepare_page(
+        self,
+        page_num: int,
+        page_result: List[Any]  # Not used: grouped fields are single-page
+    ) -> Optional[Tuple[Any, str]]:
+        # Fetch the decoded page image (shared LRU, decoded once per document)
+        img = ExtractionState.get_page_image(page_num)
+        if img is None:
+            return None
+
+        prompt = self.prompt_builder.build_group(self.items, self.parser_response_model_schema)
+        return img, prompt
+
+    def _process_page(
+        self,
+        page_num: int,
+        page_result: List[Any]
+    ) -> Optional[Dict[str, Dict[str, object]]]:
+        prepared = self._prepare_page(page_num, page_result)
+        if prepared is None:
+            return None
+        img, prompt = prepared
+        raw_output = self.vlm_processor(img, prompt, self.parser_response_model, max_new_tokens=self.max_new_tokens)
+        return self._parse_output(page_num, page_result, raw_output)
+
+    def _parse_output(
+        self,
+        page_num: int,
+        page_result: List[Any],
+        raw_output: Any
+    ) -> Dict[str, Dict[str, object]]:
+        """
+        Split the merged output into {field_name: {"value": ..., "post_processing_value": None, "page_number": page_num}}.
+        """
+        return {
+            field_name: {
+                "value": value,
+                "post_processing_value": None,
+                "page_number": page_num
+            }
+            for field_name, value in raw_output.model_dump(by_alias=True).items()
+        }
+
+    def run(self, pages: List[int]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Extract every grouped field from the first page that has an image (see ParseBase.run).
+
+        Returns:
+            Dict mapping each item's field_name to its fragment list (at most one fragment).
+        """
+        results: Dict[str, List[Dict[str, Any]]] = {item.field_name: [] for item in self.items}
+        for page_fields in super().run(pages):
+            for field_name, fragment in page_fields.items():
+                results[field_name].append(fragment)
+        return results
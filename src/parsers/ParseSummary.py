@@ -1,7 +1,6 @@
 # src/parsers/parse_summary.py
 
-from typing import  Dict, Any, Optional
-from PIL import Image
+from typing import Dict, Any, List, Optional, Tuple
 from extraction_io.generation_utils import SummaryGeneration
 from src.parsers.ParseBase import ParseBase
 from common import ExtractionState
@@ -11,54 +10,57 @@ class ParseSummary(ParseBase):
     """
     Concrete parser for 'summarization' extraction. Implements:
       - _choose_schema(): Returns the SummaryGeneration schema.
-      - _process_page(): Extract one summary fragment per page, updating prev_summary.
+      - _prepare_page(): Build the image + prompt for one page, including prev_summary.
+      - _parse_output(): Turn the VLM output into one summary fragment dict.
     """
 
     def _choose_schema(self) -> Dict[str, Any]:
         # Return the JSON schema for SummaryGeneration
         return SummaryGeneration.model_json_schema()
 
-    def _process_page(
+    def _prepare_page(
         self,
         page_num: int,
-        prev_summary: str
-    ) -> Optional[Dict[str, Any]]:
+        page_result: List[Any]
+    ) -> Optional[Tuple[Any, str]]:
         """
         1) Locate the image for page_num.
-        2) Build and send the prompt (including prev_summary).
-        3) Parse the VLM output into a SummaryGeneration instance.
-        4) Return a dict with keys:
-           {
-             "summary": <fragment string or dict>,
-             "continue_next_page": <bool>,
-             "page_number": page_num
-           }
+        2) Build the prompt (including the summary fragments so far).
+        3) Return (image, prompt), or None if the page has no image.
         """
-        # Find the matching image path
-        image_path = None
-        for (num, path) in ExtractionState.get_images():
-            if num == page_num:
-                image_path = path
-                break
+        prev_summary = f"{[{'page_number': pr['page_number'], 'values': pr['value']} for pr in page_result]}"
+
+        # Fetch the decoded page image (shared LRU, decoded once per document)
+        img = ExtractionState.get_page_image(page_num)
 
         # If no image found (shouldn't happen if page list is valid), skip
-        if image_path is None:
+        if img is None:
             return None
 
-        img = Image.open(image_path).convert("RGB")
-
         # Build the prompt using the PromptBuilder (passes previous concatenated summary)
-        prompt = self.prompt_builder(self.item, prev_summary)
-
-        # Call the VLM to get raw output
-        raw_output = self.vlm_processor(img, prompt, typ="summarization")
+        prompt = self.prompt_builder(self.item, self.parser_response_model_schema, prev_summary)
+        return img, prompt
 
+    def _parse_output(
+        self,
+        page_num: int,
+        page_result: List[Any],
+        raw_output: Any
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Parse the VLM output (a SummaryGeneration instance) into a dict with keys:
+           {
+             "value": <fragment string or dict>,
+             "post_processing_value": None,
+             "page_number": page_num
+           }
+        """
         if isinstance(raw_output, dict):
-            val = raw_output.get("value", "")
+            val = raw_output.get("summary", raw_output.get("value", ""))
             post = raw_output.get("post_processing_value", None)
-        elif hasattr(raw_output, "value"):
-            val = getattr(raw_output, "value", "")
-            post = getattr(raw_output, "post_processing_value", None)
+        elif hasattr(raw_output, "summary"):
+            val = getattr(raw_output, "summary", "")
+            post = None
         else:
             val = str(raw_output)
             post = None
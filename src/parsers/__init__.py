@@ -1,4 +1,5 @@
 from src.parsers.ParseKeyValue import ParseKeyValue
 from src.parsers.ParseBulletPoints import ParseBulletPoints
 from src.parsers.ParseCheckbox import ParseCheckbox
-from src.parsers.ParseSummary import ParseSummary
\ No newline at end of file
+from src.parsers.ParseSummary import ParseSummary
+from src.parsers.ParseKeyValueGroup import ParseKeyValueGroup
\ No newline at end of file
@@ -0,0 +1,8 @@
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tests import the packages from the project root, as the entry points do
+sys.path.insert(0, PROJECT_ROOT)
+os.environ.setdefault("PROJECT_ROOT", PROJECT_ROOT)
@@ -0,0 +1,75 @@
+import threading
+import time
+import pytest
+
+pytest.importorskip("torch")
+
+from src.helper.DagExecutor import DagExecutor
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_tasks_run_after_their_dependencies(max_workers):
+    order = []
+    lock = threading.Lock()
+
+    def task(key, delay=0.0):
+        def run():
+            time.sleep(delay)
+            with lock:
+                order.append(key)
+            return key.upper()
+        return run
+
+    tasks = {"parent": task("parent", 0.02), "child": task("child"), "grandchild": task("grandchild"), "other": task("other")}
+    dependencies = {"child": ["parent"], "grandchild": ["child"]}
+
+    results = DagExecutor(max_workers).run(tasks, dependencies)
+
+    assert results == {"parent": "PARENT", "child": "CHILD", "grandchild": "GRANDCHILD", "other": "OTHER"}
+    assert order.index("parent") < order.index("child") < order.index("grandchild")
+
+
+def test_on_done_runs_before_dependents_start():
+    published = {}
+
+    def child():
+        # The parent's result is visible without any locking in the task
+        return published["parent"] + 1
+
+    results = DagExecutor(4).run(
+        {"parent": lambda: 1, "child": child},
+        {"child": ["parent"]},
+        on_done=lambda key, result: published.__setitem__(key, result),
+    )
+
+    assert results["child"] == 2
+
+
+def test_independent_tasks_run_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+    tasks = {key: barrier.wait for key in "abc"}
+
+    # Deadlocks (and times out) unless all three run at once
+    DagExecutor(3).run(tasks, {})
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_cycle_is_rejected(max_workers):
+    with pytest.raises(ValueError, match="cycle"):
+        DagExecutor(max_workers).run({"a": lambda: 1, "b": lambda: 2}, {"a": ["b"], "b": ["a"]})
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        DagExecutor(2).run({"a": lambda: 1}, {"a": ["missing"]})
+
+
+def test_first_failure_is_raised_and_dependents_do_not_run():
+    ran = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        DagExecutor(2).run({"a": fail, "b": lambda: ran.append("b")}, {"b": ["a"]})
+    assert ran == []
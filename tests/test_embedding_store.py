@@ -0,0 +1,56 @@
+import os
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("numpy")
+
+from vector_retrieve.EmbeddingStore import EmbeddingStore
+
+
+def _pages(num_pages=12, n_tokens=40, dim=128):
+    generator = torch.Generator().manual_seed(0)
+    return [(page_num, torch.randn(1, n_tokens, dim, generator=generator)) for page_num in range(1, num_pages + 1)]
+
+
+def _maxsim(query, page):
+    return (query @ page.squeeze(0).float().T).amax(dim=1).sum().item()
+
+
+def test_int8_store_round_trips_page_by_page(tmp_path):
+    pages = _pages()
+    EmbeddingStore.write(str(tmp_path), pages, dtype="int8")
+
+    loaded = EmbeddingStore.load(str(tmp_path))
+
+    assert [page_num for page_num, _ in loaded] == [page_num for page_num, _ in pages]
+    for (_, original), (_, restored) in zip(pages, loaded):
+        assert restored.shape == original.shape
+        assert restored.dtype == torch.float16
+        # Per-token scale: error is at most half a quantization step of that token
+        step = original.abs().amax(dim=-1, keepdim=True) / 127
+        assert ((restored.float() - original).abs() <= step * 0.51 + 1e-3).all()
+
+
+def test_int8_store_is_about_half_the_size_of_float16(tmp_path):
+    pages = _pages()
+    EmbeddingStore.write(str(tmp_path / "fp16"), pages, dtype="float16")
+    EmbeddingStore.write(str(tmp_path / "int8"), pages, dtype="int8")
+
+    def size(store):
+        return sum(os.path.getsize(os.path.join(store, name)) for name in os.listdir(store))
+
+    assert size(tmp_path / "int8") < 0.6 * size(tmp_path / "fp16")
+
+
+def test_int8_store_keeps_the_maxsim_ranking(tmp_path):
+    pages = _pages()
+    EmbeddingStore.write(str(tmp_path), pages, dtype="int8")
+    loaded = dict(EmbeddingStore.load(str(tmp_path)))
+    generator = torch.Generator().manual_seed(1)
+
+    for page_num, page in pages:
+        # A query made of noisy tokens of one page
+        query = page.squeeze(0)[:10] + 0.5 * torch.randn(10, page.shape[-1], generator=generator)
+        exact = sorted(pages, key=lambda p: -_maxsim(query, p[1]))
+        quantized = sorted(loaded.items(), key=lambda p: -_maxsim(query, p[1]))
+        assert [p for p, _ in quantized[:3]] == [p for p, _ in exact[:3]]
@@ -0,0 +1,62 @@
+import contextvars
+import threading
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("pydantic")
+
+from common import ExtractionState
+from src.helper.DagExecutor import DagExecutor
+
+
+def test_concurrent_scopes_do_not_share_state():
+    barrier = threading.Barrier(2)
+    seen = {}
+
+    def extract(document):
+        with ExtractionState.scope():
+            ExtractionState.set_images([(1, f"{document}-page-1")])
+            # Both documents are in their scope at the same time
+            barrier.wait(timeout=5)
+            seen[document] = ExtractionState.get_page_image(1)
+
+    threads = [threading.Thread(target=extract, args=(document,)) for document in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert seen == {"a": "a-page-1", "b": "b-page-1"}
+
+
+def test_scope_restores_the_previous_state():
+    with ExtractionState.scope() as outer:
+        with ExtractionState.scope() as inner:
+            assert ExtractionState.current() is inner is not outer
+        assert ExtractionState.current() is outer
+
+
+def test_state_is_not_created_implicitly():
+    def read_outside_any_scope():
+        return ExtractionState.get_images()
+
+    # A fresh context, as in a thread started without copy_context()
+    with pytest.raises(RuntimeError, match="No ExtractionState is current"):
+        contextvars.Context().run(read_outside_any_scope)
+
+
+def test_legacy_reset_installs_a_state():
+    def reset_then_read():
+        ExtractionState.reset()
+        return ExtractionState.get_images()
+
+    assert contextvars.Context().run(reset_then_read) == []
+
+
+def test_dag_tasks_see_the_callers_state():
+    with ExtractionState.scope() as state:
+        results = DagExecutor(max_workers=4).run(
+            {key: ExtractionState.current for key in "abcd"},
+            dependencies={},
+        )
+    assert all(result is state for result in results.values())
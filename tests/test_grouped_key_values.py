@@ -0,0 +1,114 @@
+import json
+import re
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("pydantic")
+
+from common import ExtractionState
+from extraction_io.ExtractionItems import ExtractionItem
+from extraction_io.generation_utils import GroupedKeyValueGeneration, KeyValueGeneration
+from src import Parser
+from src.helper import PromptBuilder, VLMProcessor
+from src.parsers.ParseKeyValue import ParseKeyValue
+from src.parsers.ParseKeyValueGroup import ParseKeyValueGroup
+
+# What a perfect VLM reads on each page; page 1 lacks the date
+PAGES = {
+    "page-1": {"Borrower Name": "Jane Doe", "loan_amount": "$250,000", "Date": ""},
+    "page-2": {"Borrower Name": "J. Doe", "loan_amount": "$1", "Date": "2024-05-01"},
+}
+ITEMS = [
+    ExtractionItem(field_name="Borrower Name", description="Name of the borrower", type="key-value"),
+    ExtractionItem(field_name="loan_amount", description="Principal amount", type="key-value"),
+    ExtractionItem(field_name="Date", description="Signing date", type="key-value"),
+]
+
+
+class PageReadingVLM:
+    """
+    Stands in for QwenV25Infer: answers the fields a prompt asks for, as JSON text,
+    from PAGES, and records the budget of every generation.
+    """
+
+    def __init__(self):
+        self.budgets = []
+
+    def infer(self, image_data, prompt, max_new_tokens=None, json_schema=None):
+        self.budgets.append(max_new_tokens)
+        truth = PAGES[image_data]
+        single = re.search(r'extract the field "([^"]+)"', prompt)
+        if single:
+            name = single.group(1)
+            return json.dumps({"field_name": name, "value": truth[name], "continue_next_page": False})
+        names = re.findall(r'^- "([^"]+)":', prompt, flags=re.MULTILINE)
+        return "```json\n" + json.dumps({name: truth[name] for name in names}) + "\n```"
+
+
+def _extract(parse):
+    vlm = PageReadingVLM()
+    with ExtractionState.scope():
+        ExtractionState.set_images([(1, "page-1"), (2, "page-2")])
+        results = parse(VLMProcessor(vlm), PromptBuilder())
+    return results, vlm.budgets
+
+
+@pytest.mark.parametrize("pages", [[1, 2], [2, 1], [3, 2]])
+def test_grouped_extraction_matches_ungrouped_per_field(pages):
+    ungrouped, single_budgets = _extract(lambda vlm, prompts: {
+        item.field_name: ParseKeyValue(item, vlm, prompts, KeyValueGeneration)(pages) for item in ITEMS
+    })
+    grouped, group_budgets = _extract(lambda vlm, prompts: ParseKeyValueGroup(ITEMS, vlm, prompts)(pages))
+
+    def values(results):
+        return {
+            field_name: [(fragment["value"], fragment["page_number"]) for fragment in fragments]
+            for field_name, fragments in results.items()
+        }
+
+    assert values(grouped) == values(ungrouped)
+    # One generation for the group instead of one per field
+    assert len(single_budgets) == len(ITEMS)
+    assert group_budgets == [GroupedKeyValueGeneration.budget(len(ITEMS))]
+
+
+def test_group_prompt_names_every_field_in_system_and_user_parts():
+    schema = GroupedKeyValueGeneration.for_items(ITEMS).model_json_schema()
+
+    prompt = PromptBuilder().build_group(ITEMS, schema)
+
+    for item in ITEMS:
+        assert f'- "{item.field_name}": {item.description}' in prompt.user
+        assert f'"{item.field_name}"' in prompt.system
+
+
+def test_merged_model_is_shared_and_keyed_by_field_name():
+    model = GroupedKeyValueGeneration.for_items(ITEMS)
+
+    assert GroupedKeyValueGeneration.for_items(list(ITEMS)) is model
+    output = model.model_validate({"Borrower Name": "Jane", "loan_amount": "1", "Date": ""})
+    assert output.model_dump(by_alias=True) == {"Borrower Name": "Jane", "loan_amount": "1", "Date": ""}
+    # No per-group state on the class
+    assert not hasattr(model, "field_names")
+    assert not hasattr(model, "max_new_tokens")
+
+
+def test_merged_model_cache_is_bounded():
+    assert GroupedKeyValueGeneration._model_for.cache_info().maxsize is not None
+
+
+def test_duplicate_field_names_are_not_merged():
+    duplicate = ExtractionItem(field_name="Date", description="Maturity date", type="key-value")
+
+    with pytest.raises(ValueError, match="distinct field names"):
+        GroupedKeyValueGeneration.for_items(ITEMS + [duplicate])
+
+    # The Parser leaves the duplicate ungrouped instead
+    indexed = list(enumerate(
+        item.model_copy(update={"probable_pages": [1]}) for item in ITEMS + [duplicate]
+    ))
+    groups, singles = Parser._group_key_values(SimpleNamespace(page_finder=None), indexed)
+
+    assert [[idx for idx, _ in members] for members, _ in groups] == [[0, 1, 2]]
+    assert [idx for idx, _ in singles] == [3]
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("pydantic")
+
+from models import LazyModel
+from src import Parser
+from src.helper.VLMScheduler import VLMScheduler
+
+
+class Loader:
+    """
+    Stands in for ModelManager.get_model / is_loaded, counting loads.
+    """
+
+    def __init__(self):
+        self.loads = 0
+        self.instance = SimpleNamespace(max_batch_size=8, cleared=[])
+        self.instance.clear_vision_cache = self.instance.cleared.append
+
+    def get_model(self, class_name):
+        self.loads += 1
+        return self.instance
+
+    def is_loaded(self, class_name):
+        return self.loads > 0
+
+
+def test_lazy_model_loads_on_first_attribute_access():
+    loader = Loader()
+    model = LazyModel("QwenV25Infer", loader.get_model, loader.is_loaded)
+    assert not model.loaded and loader.loads == 0
+
+    assert model.max_batch_size == 8
+    assert model.loaded
+
+
+def test_building_the_scheduler_does_not_load_the_vlm():
+    loader = Loader()
+    vlm_processor = SimpleNamespace(vlm_infer=LazyModel("QwenV25Infer", loader.get_model, loader.is_loaded))
+
+    scheduler = VLMScheduler(vlm_processor, max_batch_size=2)
+
+    assert scheduler.max_batch_size == 2
+    assert loader.loads == 0
+
+
+def test_releasing_a_document_does_not_load_the_vlm():
+    loader = Loader()
+    vlm_infer = LazyModel("QwenV25Infer", loader.get_model, loader.is_loaded)
+    parser = SimpleNamespace(vlm_processor=SimpleNamespace(vlm_infer=vlm_infer))
+
+    Parser._release_document(parser, "doc-a")
+    assert loader.loads == 0
+
+    # Once loaded, the finished document's cache entries are dropped
+    vlm_infer.max_batch_size
+    Parser._release_document(parser, "doc-b")
+    assert loader.instance.cleared == ["doc-b"]
+
+
+def test_configured_model_name_does_not_load_the_model():
+    loader = Loader()
+    model = LazyModel("ColPaliInfer", loader.get_model, loader.is_loaded, model_name="vidore/colqwen2-v1.0")
+
+    assert model.model_name == "vidore/colqwen2-v1.0"
+    assert loader.loads == 0
+
+
+def test_handle_is_falsy_when_the_model_is_not_registered():
+    loader = Loader()
+    registered = {"ColPaliInfer"}
+
+    def handle(name):
+        return LazyModel(name, loader.get_model, loader.is_loaded, is_registered=registered.__contains__)
+
+    assert handle("ColPaliInfer")
+    assert not handle("YOLOCheckBox")
+    assert loader.loads == 0
@@ -0,0 +1,32 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from models.ModelPrecision import ModelPrecision
+
+
+class TakesDtype:
+    def __init__(self, model_name=None, torch_dtype=None):
+        pass
+
+
+def test_unset_precision_keeps_the_model_default():
+    precision = ModelPrecision.from_config({"precision": None, "quantization": None})
+
+    assert precision.torch_dtype is None
+    assert precision.constructor_kwargs(TakesDtype) == {}
+
+
+def test_bf16_is_passed_as_torch_dtype():
+    assert ModelPrecision("bf16").constructor_kwargs(TakesDtype) == {"torch_dtype": torch.bfloat16}
+
+
+def test_dynamic_int8_forces_an_fp32_load():
+    assert ModelPrecision("bf16", "dynamic_int8").torch_dtype is torch.float32
+
+
+def test_shipped_settings_load_the_vlm_in_fp32():
+    from config.loader import settings
+
+    models = settings["model_manager"]["models"]
+    assert ModelPrecision.from_config(models["QwenV25Infer"]).torch_dtype in (None, torch.float32)
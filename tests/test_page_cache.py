@@ -0,0 +1,56 @@
+import os
+import pytest
+
+pytest.importorskip("torch")
+
+from vector_retrieve.PageCache import PageCache
+
+OLD = 1_000_000_000  # an mtime far outside the eviction grace period
+
+
+def _write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    os.utime(path, (OLD, OLD))
+    os.utime(os.path.dirname(path), (OLD, OLD))
+
+
+def test_evict_removes_least_recently_used_entries(tmp_path):
+    cache = PageCache(str(tmp_path), max_bytes=1500)
+    old_key, new_key = "a" * 64, "b" * 64
+    _write(os.path.join(cache.entry_dir(old_key), "vectors.npy"), 1000)
+    _write(os.path.join(cache.entry_dir(new_key), "vectors.npy"), 1000)
+    cache.touch(new_key)
+    os.utime(os.path.join(cache.entry_dir(new_key), PageCache._ACCESS_MARKER), (OLD + 10, OLD + 10))
+
+    cache.evict()
+
+    assert not os.path.exists(cache.entry_dir(old_key))
+    assert os.path.exists(cache.entry_dir(new_key))
+
+
+def test_evict_keeps_page_store_spill_directories(tmp_path):
+    # PDFProcessor spills PageStore pages under <cache_dir>/spill while a document is extracted
+    cache = PageCache(str(tmp_path), max_bytes=1)
+    spilled_page = os.path.join(str(tmp_path), "spill", "pages_x", "page_1.raw")
+    _write(spilled_page, 1000)
+    _write(os.path.join(cache.entry_dir("c" * 64), "vectors.npy"), 1000)
+
+    cache.evict()
+
+    assert os.path.exists(spilled_page)
+    assert not os.path.exists(cache.entry_dir("c" * 64))
+
+
+def test_evict_sweeps_stale_staging_directories(tmp_path):
+    cache = PageCache(str(tmp_path))
+    store_dir = cache.embedding_dir("d" * 64, 72, "vidore/colqwen2-v1.0")
+    stale = cache.staging_dir(store_dir)
+    _write(os.path.join(stale, "vectors.npy"), 1000)
+    fresh = cache.staging_dir(store_dir)
+
+    cache.evict()
+
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
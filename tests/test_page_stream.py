@@ -0,0 +1,111 @@
+import threading
+import pytest
+
+pytest.importorskip("torch")
+
+from vector_retrieve.PageStream import PageStream
+
+
+class Store(dict):
+    def add(self, page_num, image):
+        self[page_num] = image
+
+
+class FakeProcessor:
+    """
+    Stands in for PDFProcessor: "renders" page numbers, releasing page 2 and later only
+    once `gate` is set, and records the batches it embeds.
+    """
+
+    def __init__(self, num_pages, cached=None, checkbox_pages=(), fail_embedding=False):
+        self.num_pages = num_pages
+        self.cached = cached
+        self.checkbox_infer = object()
+        self.checkbox_pages = set(checkbox_pages)
+        self.fail_embedding = fail_embedding
+        self.colpali_infer = type("ColPali", (), {"batch_size": 2})()
+        self.gate = threading.Event()
+        self.embedded_batches = []
+        self.stores = {"embedding": Store(), "vlm": Store(), "checkbox": Store()}
+
+    def _page_stores(self, with_checkboxes, with_embedding=True):
+        skipped = {name for name, needed in (("checkbox", with_checkboxes), ("embedding", with_embedding)) if not needed}
+        stores = {k: v for k, v in self.stores.items() if k not in skipped}
+        return stores, {name: store for name, store in stores.items()}, 72
+
+    def count_pages(self, pdf_path):
+        return self.num_pages
+
+    def cached_embeddings(self, doc_key):
+        return self.cached
+
+    def iter_rendered_pages(self, pdf_path, num_pages, dpi=None, chunk_pages=None):
+        for page_num in range(1, num_pages + 1):
+            if page_num == 2:
+                assert self.gate.wait(5)
+            yield page_num, (1, 1), f"image {page_num}"
+
+    def _add_page(self, by_dpi, source_dpi, page_num, size, samples):
+        for store in by_dpi.values():
+            store.add(page_num, samples)
+
+    def embed_pages(self, page_nums, images):
+        if self.fail_embedding:
+            raise RuntimeError("embedding failed")
+        self.embedded_batches.append(list(page_nums))
+        return [(page_num, f"vector {page_num}") for page_num in page_nums]
+
+    def store_embeddings(self, doc_key, embeddings):
+        return dict(embeddings)
+
+    def detect_checkboxes(self, image):
+        page_num = int(image.split()[-1])
+        return {"checkbox_count": 1} if page_num in self.checkbox_pages else None
+
+
+def test_pages_are_available_before_ingestion_finishes():
+    processor = FakeProcessor(num_pages=5)
+    stream = PageStream(processor, "doc.pdf", "key", with_checkboxes=False).start()
+
+    assert stream.wait_pages([1], timeout=5)
+    assert stream.images.get(1) == "image 1"
+    assert not stream.wait(timeout=0.05)
+
+    processor.gate.set()
+    assert stream.wait(timeout=5)
+    assert sorted(stream.images) == [1, 2, 3, 4, 5]
+
+
+def test_every_page_is_embedded_and_checked_in_batches():
+    processor = FakeProcessor(num_pages=5, checkbox_pages=[3])
+    processor.gate.set()
+    stream = PageStream(processor, "doc.pdf", "key", with_checkboxes=True).start()
+
+    assert stream.wait(timeout=5)
+    assert processor.embedded_batches == [[1, 2], [3, 4], [5]]
+    assert stream.embeddings == {page_num: f"vector {page_num}" for page_num in range(1, 6)}
+    assert stream.checkboxes == {3: {"checkbox_count": 1}}
+
+
+def test_cached_embeddings_skip_the_embedding_stage():
+    processor = FakeProcessor(num_pages=3, cached={"cached": True})
+    processor.gate.set()
+    stream = PageStream(processor, "doc.pdf", "key", with_checkboxes=False).start()
+
+    assert stream.wait(timeout=5)
+    assert processor.embedded_batches == []
+    assert stream.embeddings == {"cached": True}
+    # Pages are not rendered for ColPali either
+    assert "embedding" not in stream.stores and processor.stores["embedding"] == {}
+
+
+def test_stage_failure_is_raised_to_waiters_and_on_finish_still_runs():
+    finished = threading.Event()
+    processor = FakeProcessor(num_pages=6, fail_embedding=True)
+    processor.gate.set()
+    stream = PageStream(processor, "doc.pdf", "key", with_checkboxes=False, queue_pages=1, on_finish=finished.set)
+    stream.start()
+
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        stream.wait(timeout=5)
+    assert finished.wait(5)
@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("pydantic")
+
+from common import ExtractionState
+from extraction_io.ExtractionItems import ExtractionItem
+from extraction_io.generation_utils import KeyValueGeneration
+from src.parsers.ParseKeyValue import ParseKeyValue
+
+
+class RecordingVLM:
+    """
+    Stands in for VLMProcessor: returns "value of <page image>" and records each call.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, image, prompt, generation_model):
+        self.calls.append(image)
+        return {"value": f"value of {image}", "post_processing_value": None}
+
+
+def _parse(item, pages):
+    vlm = RecordingVLM()
+    with ExtractionState.scope():
+        ExtractionState.set_images([(page, f"page-{page}") for page in (1, 2, 3)])
+        results = ParseKeyValue(item, vlm, lambda *args: "prompt", KeyValueGeneration)(pages)
+    return results, vlm.calls
+
+
+def test_single_page_field_stops_at_first_result():
+    item = ExtractionItem(field_name="name", description="Borrower name", type="key-value")
+
+    results, calls = _parse(item, [2, 1, 3])
+
+    # One generation, on the first page in retrieval order
+    assert calls == ["page-2"]
+    assert results == [{"value": "value of page-2", "post_processing_value": None, "page_number": 2}]
+
+
+def test_single_page_field_skips_pages_without_image():
+    item = ExtractionItem(field_name="name", description="Borrower name", type="key-value")
+
+    results, calls = _parse(item, [7, 3, 1])
+
+    assert calls == ["page-3"]
+    assert [result["page_number"] for result in results] == [3]
@@ -0,0 +1,66 @@
+import os
+import threading
+import types
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("pydantic")
+
+from common import BaseComponent
+from src.Parser import Parser
+
+
+class StubParser(Parser):
+    """
+    A Parser without models: perform_de() writes the PDF's name into its output file.
+    """
+
+    def __init__(self, document_workers=2, fail=()):
+        BaseComponent.__init__(self, {})
+        self.document_workers = document_workers
+        self.fail = set(fail)
+        self.pdf_processor = types.SimpleNamespace(warm_query_cache=lambda queries: None)
+        self.page_finder = types.SimpleNamespace(planned_queries=lambda items: [])
+        self.extracted = []
+        self._lock = threading.Lock()
+
+    def _validate_extraction_items(self, extraction_items):
+        return extraction_items
+
+    def perform_de(self, pdf_path, extraction_items, output_json_path):
+        with self._lock:
+            self.extracted.append(pdf_path)
+        if pdf_path in self.fail:
+            raise RuntimeError(f"cannot read {pdf_path}")
+        with open(output_json_path, "w") as f:
+            f.write(pdf_path)
+        return f"outputs of {pdf_path}"
+
+
+def test_each_document_gets_its_own_output_in_input_order(tmp_path):
+    pdfs = ["a/1008.pdf", "b/form2-2.pdf", "c/broken.pdf"]
+    parser = StubParser(fail=["c/broken.pdf"])
+
+    results = parser.perform_de_batch(pdfs, [], str(tmp_path))
+
+    assert list(results) == pdfs
+    assert results["a/1008.pdf"] == "outputs of a/1008.pdf"
+    assert isinstance(results["c/broken.pdf"], RuntimeError)
+    assert (tmp_path / "1008.json").read_text() == "a/1008.pdf"
+    assert (tmp_path / "form2-2.json").read_text() == "b/form2-2.pdf"
+
+
+@pytest.mark.parametrize("pdfs", [
+    ["2023/invoice.pdf", "2024/invoice.pdf"],
+    ["invoice.pdf", "scans/Invoice.PDF"],
+    ["invoice.pdf", "invoice.pdf"],
+])
+def test_colliding_outputs_are_rejected_before_any_extraction(tmp_path, pdfs):
+    parser = StubParser()
+
+    with pytest.raises(ValueError, match="invoice.json") as error:
+        parser.perform_de_batch(pdfs + ["other.pdf"], [], str(tmp_path))
+
+    assert all(pdf in str(error.value) for pdf in pdfs)
+    assert parser.extracted == []
+    assert not os.listdir(tmp_path)
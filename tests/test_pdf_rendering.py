@@ -0,0 +1,55 @@
+import threading
+import pytest
+
+pytest.importorskip("torch")
+fitz = pytest.importorskip("fitz")
+
+from vector_retrieve.PDFProcessor import PDFProcessor
+
+
+def _pdf(tmp_path, num_pages):
+    doc = fitz.open()
+    for page_num in range(num_pages):
+        page = doc.new_page(width=200, height=200)
+        page.insert_text((20, 40 + page_num * 10), f"page {page_num + 1}")
+    path = str(tmp_path / "doc.pdf")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _processor(tmp_path, render_workers):
+    return PDFProcessor(None, render_workers=render_workers, cache_dir=str(tmp_path / "cache"), query_cache_dir=None)
+
+
+def test_parallel_render_matches_serial_render(tmp_path):
+    path = _pdf(tmp_path, 7)
+    serial = _processor(tmp_path, 1)._render_pages(path, 7)
+    parallel = _processor(tmp_path, 3)._render_pages(path, 7)
+
+    assert [page_num for page_num, _, _ in parallel] == list(range(1, 8))
+    assert parallel == serial
+
+
+def test_streamed_chunks_come_out_in_page_order(tmp_path):
+    path = _pdf(tmp_path, 5)
+    processor = _processor(tmp_path, 2)
+
+    pages = list(processor.iter_rendered_pages(path, 5, chunk_pages=2))
+
+    assert [page_num for page_num, _, _ in pages] == [1, 2, 3, 4, 5]
+
+
+def test_render_pool_is_created_once_and_reused(tmp_path):
+    path = _pdf(tmp_path, 4)
+    processor = _processor(tmp_path, 2)
+    assert processor._render_pool is None
+
+    processor._render_pages(path, 4)
+    pool = processor.render_pool
+    processor._render_pages(path, 4)
+    list(processor.iter_rendered_pages(path, 4, chunk_pages=1))
+
+    assert processor.render_pool is pool
+    # Threads, not worker processes
+    assert any(thread.name.startswith("pdf-render") for thread in threading.enumerate())
@@ -0,0 +1,46 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("safetensors")
+
+from vector_retrieve.QueryEmbeddingCache import QueryEmbeddingCache
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, queries):
+        self.calls.append(list(queries))
+        return [torch.full((2, 4), float(len(query))) for query in queries]
+
+
+def test_only_misses_are_embedded_once_per_query(tmp_path):
+    cache = QueryEmbeddingCache("vidore/colqwen2", str(tmp_path))
+    embedder = CountingEmbedder()
+
+    first = cache.embed(["total amount", "date", "total amount"], embedder)
+    second = cache.embed(["date", "vendor"], embedder)
+
+    assert sorted(embedder.calls[0]) == ["date", "total amount"]
+    assert embedder.calls[1] == ["vendor"]
+    assert torch.equal(first[0], first[2])
+    assert torch.equal(first[1], second[0])
+
+
+def test_embeddings_persist_across_instances(tmp_path):
+    embedder = CountingEmbedder()
+    QueryEmbeddingCache("vidore/colqwen2", str(tmp_path)).warm(["invoice number"], embedder)
+
+    reloaded = QueryEmbeddingCache("vidore/colqwen2", str(tmp_path))
+    embedding = reloaded.embed(["invoice number"], embedder)[0]
+
+    assert len(embedder.calls) == 1
+    assert torch.equal(embedding, torch.full((2, 4), float(len("invoice number"))))
+
+
+def test_cache_is_keyed_by_model(tmp_path):
+    embedder = CountingEmbedder()
+    QueryEmbeddingCache("model-a", str(tmp_path)).embed(["date"], embedder)
+
+    assert QueryEmbeddingCache("model-b", str(tmp_path)).get("date") is None
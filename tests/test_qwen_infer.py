@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("qwen_vl_utils")
+from PIL import Image
+
+import models.QwenV25Infer as qwen_module
+from models.QwenV25Infer import QwenV25Infer
+from common import Prompt
+
+
+class FakeInputs(dict):
+    def to(self, device):
+        return self
+
+
+class FakeTokenizer:
+    pad_token_id = 0
+
+
+class FakeProcessor:
+    tokenizer = FakeTokenizer()
+
+    def apply_chat_template(self, messages, tokenize=False, add_generation_prompt=True):
+        return "prompt"
+
+    def __call__(self, text, **kwargs):
+        rows = len(text)
+        return FakeInputs(
+            input_ids=torch.ones((rows, 4), dtype=torch.long),
+            attention_mask=torch.ones((rows, 4), dtype=torch.long),
+        )
+
+    def batch_decode(self, ids, skip_special_tokens=True):
+        return ["{}"] * ids.shape[0]
+
+
+class OverlapTrackingModel:
+    """
+    generate() that records how many calls ran at the same time.
+    """
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.guard = threading.Lock()
+
+    def generate(self, input_ids, **kwargs):
+        with self.guard:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self.guard:
+            self.active -= 1
+        return torch.ones((input_ids.shape[0], 6), dtype=torch.long)
+
+
+def test_image_and_text_generations_never_overlap(monkeypatch):
+    monkeypatch.setattr(qwen_module, "process_vision_info", lambda conversations: (None, None))
+    vlm = QwenV25Infer(api_endpoint="http://localhost", api_token="unused", device="cpu", stop_at_json=False)
+    vlm.client, vlm.model, vlm.processor = None, OverlapTrackingModel(), FakeProcessor()
+    image = Image.new("RGB", (8, 8))
+
+    calls = [lambda: vlm.infer_batch([(image, "extract")]), lambda: vlm.infer_lang("summarise")] * 4
+    threads = [threading.Thread(target=call) for call in calls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert vlm.model.max_active == 1
+
+
+@pytest.fixture(scope="module")
+def local_vlm():
+    # Loads real weights: set QWEN_TEST_MODEL to a local or cached Qwen2.5-VL checkpoint
+    model_name = os.environ.get("QWEN_TEST_MODEL")
+    if not model_name:
+        pytest.skip("QWEN_TEST_MODEL is not set")
+    return QwenV25Infer(
+        model_name=model_name, device="cpu", prefix_cache_mb=256, vision_cache_mb=256, min_prefix_tokens=1,
+        min_pixels=64 * 28 * 28, max_pixels=64 * 28 * 28,
+    )
+
+
+def test_cached_prefill_matches_plain_generate(local_vlm):
+    system = "Extract the requested field and answer with JSON only: {\"value\": \"...\"}"
+    requests = [
+        (Image.new("RGB", (224, 224), "white"), Prompt(system, "Field: title")),
+        (Image.new("RGB", (224, 160), "black"), Prompt(system, "Field: the document date, as written")),
+    ]
+    inputs, images = local_vlm._prepare_inputs(requests)
+    generation_kwargs = {
+        "max_new_tokens": 24,
+        "do_sample": False,
+        "pad_token_id": local_vlm.processor.tokenizer.pad_token_id,
+    }
+
+    with torch.no_grad():
+        plain = local_vlm.model.generate(**inputs, **generation_kwargs)
+        cache_miss = local_vlm._generate_from_caches(inputs, images, generation_kwargs)
+        cache_hit = local_vlm._generate_from_caches(inputs, images, generation_kwargs)
+
+    assert len(local_vlm.prefix_cache) == 1
+    assert torch.equal(plain, cache_miss)
+    assert torch.equal(plain, cache_hit)
+
+
+def test_clear_vision_cache_drops_only_that_documents_entries():
+    vlm = QwenV25Infer(api_endpoint="http://localhost", api_token="unused", vision_cache_mb=1)
+    for document in ("doc-a", "doc-b"):
+        vlm.vision_cache.put((document, b"digest", (8, 8), (1, 2, 2)), torch.zeros(4))
+
+    vlm.clear_vision_cache("doc-a")
+
+    assert vlm.vision_cache.get(("doc-a", b"digest", (8, 8), (1, 2, 2))) is None
+    assert vlm.vision_cache.get(("doc-b", b"digest", (8, 8), (1, 2, 2))) is not None
+
+
+class PlainModel:
+    """
+    A model without the Qwen2.5-VL internals the cached prefill relies on.
+    """
+
+    def generate(self, input_ids, **kwargs):
+        return torch.ones((input_ids.shape[0], 6), dtype=torch.long)
+
+
+def test_caches_fall_back_to_plain_generate_without_model_internals(monkeypatch):
+    monkeypatch.setattr(qwen_module, "process_vision_info", lambda conversations: (None, None))
+    monkeypatch.setattr(QwenV25Infer, "CACHE_TRANSFORMERS_VERSIONS", qwen_module.SpecifierSet(">=0"))
+    vlm = QwenV25Infer(
+        api_endpoint="http://localhost", api_token="unused", device="cpu", stop_at_json=False,
+        prefix_cache_mb=1, vision_cache_mb=1,
+    )
+    vlm.client, vlm.model, vlm.processor = None, PlainModel(), FakeProcessor()
+
+    vlm._disable_unsupported_caches()
+
+    assert vlm.prefix_cache is None and vlm.vision_cache is None
+    assert vlm.infer_batch([(Image.new("RGB", (8, 8)), "extract")]) == ["{}"]
+
+
+def test_caches_are_disabled_outside_the_supported_transformers_range(monkeypatch):
+    monkeypatch.setattr(QwenV25Infer, "CACHE_TRANSFORMERS_VERSIONS", qwen_module.SpecifierSet("<1"))
+    vlm = QwenV25Infer(api_endpoint="http://localhost", api_token="unused", prefix_cache_mb=1)
+    vlm.model = OverlapTrackingModel()
+
+    vlm._disable_unsupported_caches()
+
+    assert vlm.prefix_cache is None
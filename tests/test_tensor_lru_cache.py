@@ -0,0 +1,44 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from common import TensorLRUCache
+
+
+def test_evicts_least_recently_used_beyond_budget():
+    cache = TensorLRUCache(max_bytes=2 * 4 * 4)  # two float32 tensors of 4 values
+    cache.put("a", torch.zeros(4))
+    cache.put("b", torch.zeros(4))
+    cache.get("a")
+    cache.put("c", torch.zeros(4))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_get_or_compute_computes_only_on_a_miss():
+    cache = TensorLRUCache(max_bytes=1024)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return torch.ones(2)
+
+    first = cache.get_or_compute("key", compute)
+    second = cache.get_or_compute("key", compute)
+
+    assert len(calls) == 1
+    assert second is first
+
+
+def test_drop_removes_matching_keys_and_frees_their_bytes():
+    cache = TensorLRUCache(max_bytes=3 * 4 * 4)
+    for key in (("doc-a", 1), ("doc-a", 2), ("doc-b", 1)):
+        cache.put(key, torch.zeros(4))
+
+    assert cache.drop(lambda key: key[0] == "doc-a") == 2
+    assert len(cache) == 1 and cache.get(("doc-b", 1)) is not None
+    # The freed budget is reusable without evicting doc-b
+    cache.put(("doc-c", 1), torch.zeros(4))
+    cache.put(("doc-c", 2), torch.zeros(4))
+    assert cache.get(("doc-b", 1)) is not None
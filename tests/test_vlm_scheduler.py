@@ -0,0 +1,151 @@
+import threading
+import time
+from concurrent.futures import Future
+import pytest
+
+pytest.importorskip("torch")
+
+from common import ExtractionState
+from src.helper.VLMScheduler import VLMScheduler
+
+
+class Page:
+    def __init__(self, size=(100, 100)):
+        self.size = size
+
+
+class Generation:
+    pass
+
+
+class RecordingProcessor:
+    """
+    Stands in for VLMProcessor: echoes each prompt and records the batches it ran.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.documents = {}
+        self.budgets = []
+
+    def extract_batch(self, requests, generation_model, return_exceptions=False, documents=None, max_new_tokens=None):
+        self.batches.append([prompt for _, prompt in requests])
+        self.budgets.append(max_new_tokens)
+        self.documents.update((prompt, document) for (_, prompt), document in zip(requests, documents))
+        return [f"out:{prompt}" for _, prompt in requests]
+
+
+def test_concurrent_requests_share_one_batch():
+    processor = RecordingProcessor()
+    scheduler = VLMScheduler(processor, max_batch_size=4, max_wait_ms=5000)
+    results = {}
+
+    def call(prompt):
+        results[prompt] = scheduler(Page(), prompt, Generation)
+
+    threads = [threading.Thread(target=call, args=(f"p{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    scheduler.close()
+
+    # A full group is dispatched without waiting for max_wait_ms
+    assert len(processor.batches) == 1
+    assert sorted(processor.batches[0]) == [f"p{i}" for i in range(4)]
+    assert results == {f"p{i}": f"out:p{i}" for i in range(4)}
+
+
+def test_overdue_group_is_dispatched_before_fuller_groups():
+    scheduler = VLMScheduler(RecordingProcessor(), max_batch_size=2, max_wait_ms=10)
+    now = time.monotonic()
+    rare = VLMScheduler._group_key((Page((50, 50)), "rare"), Generation)
+    common = VLMScheduler._group_key((Page(), "common"), Generation)
+    scheduler._pending[rare] = [(now - 1.0, (Page((50, 50)), "rare"), Future(), "doc")]
+    scheduler._pending[common] = [(now, (Page(), f"common{i}"), Future(), "doc") for i in range(4)]
+
+    key, batch = scheduler._next_batch()
+
+    assert key == rare
+    assert [prompt for _, (_, prompt), _, _ in batch] == ["rare"]
+
+
+def test_requests_with_different_budgets_are_batched_apart():
+    processor = RecordingProcessor()
+    scheduler = VLMScheduler(processor, max_batch_size=4, max_wait_ms=10)
+
+    short = scheduler.submit([(Page(), "short")], Generation)
+    long = scheduler.submit([(Page(), "long")], Generation, max_new_tokens=768)
+    assert [future.result(timeout=5) for future in short + long] == ["out:short", "out:long"]
+    scheduler.close()
+
+    assert sorted(zip(map(tuple, processor.batches), processor.budgets), key=str) == [
+        (("long",), 768),
+        (("short",), None),
+    ]
+
+
+def test_each_request_keeps_its_document():
+    processor = RecordingProcessor()
+    scheduler = VLMScheduler(processor, max_batch_size=2, max_wait_ms=5000)
+    document_ids = {}
+
+    def call(prompt):
+        with ExtractionState.scope() as state:
+            document_ids[prompt] = state.document_id
+            scheduler(Page(), prompt, Generation)
+
+    threads = [threading.Thread(target=call, args=(prompt,)) for prompt in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    scheduler.close()
+
+    # One batch, two documents: the VLM can key per-document caches by request
+    assert len(processor.batches) == 1
+    assert processor.documents == document_ids
+    assert document_ids["a"] != document_ids["b"]
+
+
+def test_lone_caller_is_dispatched_without_waiting():
+    processor = RecordingProcessor()
+    scheduler = VLMScheduler(processor, max_batch_size=4, max_wait_ms=5000)
+
+    start = time.monotonic()
+    with scheduler.caller():
+        assert scheduler(Page(), "alone", Generation) == "out:alone"
+    scheduler.close()
+
+    assert time.monotonic() - start < 2
+
+
+def test_request_waits_for_other_active_callers():
+    processor = RecordingProcessor()
+    scheduler = VLMScheduler(processor, max_batch_size=4, max_wait_ms=5000)
+    busy, results = threading.Event(), {}
+
+    def call(prompt, before=None):
+        with scheduler.caller():
+            busy.set()
+            if before is not None:
+                assert before.wait(5)
+            results[prompt] = scheduler(Page(), prompt, Generation)
+
+    release = threading.Event()
+    slow = threading.Thread(target=call, args=("slow", release))
+    slow.start()
+    assert busy.wait(5)
+    fast = threading.Thread(target=call, args=("fast",))
+    fast.start()
+
+    # "slow" is still active but has not submitted yet, so "fast" waits for it
+    time.sleep(0.2)
+    assert processor.batches == []
+    release.set()
+    for thread in (slow, fast):
+        thread.join(timeout=5)
+    scheduler.close()
+
+    assert len(processor.batches) == 1
+    assert sorted(processor.batches[0]) == ["fast", "slow"]
@@ -0,0 +1,134 @@
+import os
+import json
+from typing import List, Tuple
+import numpy as np
+import torch
+
+
+class EmbeddingStore:
+    """
+    Compact per-document store for variable-length multi-vector page embeddings.
+
+    All token vectors of a document are concatenated into one contiguous
+    (total_tokens, dim) array saved as .npy, plus a JSON index of
+    (page_num, offset, n_tokens) rows:
+
+        <store_dir>/vectors.npy
+        <store_dir>/index.json
+
+    Vectors are stored as float16, or as bfloat16 bit patterns in an int16
+    array, since numpy has no bfloat16. load() memory-maps the array and
+    returns zero-copy tensor views, so only the pages that are scored are
+    read from disk. Nothing is unpickled.
+
+    With dtype "int8", each token vector is stored as int8 codes plus one
+    float16 scale (symmetric, max |x| → 127) in scales.npy, half the size of
+    float16. load() dequantizes it page by page to float16, so scoring stays
+    the exact MaxSim over (slightly rounded) vectors.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    SCALES_FILE = "scales.npy"
+    INDEX_FILE = "index.json"
+    SUPPORTED_DTYPES = ("float16", "bfloat16", "int8")
+    _NP_DTYPES = {"float16": np.float16, "bfloat16": np.int16, "int8": np.int8}
+
+    @classmethod
+    def exists(cls, store_dir: str) -> bool:
+        return os.path.exists(os.path.join(store_dir, cls.INDEX_FILE))
+
+    @classmethod
+    def write(cls, store_dir: str, embeddings: List[Tuple[int, torch.Tensor]], dtype: str = "float16") -> None:
+        """
+        Write (page_num, embedding) pairs to `store_dir`. Each embedding is
+        (n_tokens, dim) or (1, n_tokens, dim).
+
+        The index is written last, so a store without index.json is incomplete.
+        """
+        if dtype not in cls.SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding store dtype '{dtype}'. Must be one of {cls.SUPPORTED_DTYPES}.")
+        os.makedirs(store_dir, exist_ok=True)
+
+        flat = [(page_num, emb.reshape(-1, emb.shape[-1])) for page_num, emb in embeddings]
+        dim = flat[0][1].shape[-1] if flat else 0
+        total = sum(emb.shape[0] for _, emb in flat)
+
+        vectors = np.lib.format.open_memmap(
+            os.path.join(store_dir, cls.VECTORS_FILE), mode="w+", dtype=cls._NP_DTYPES[dtype], shape=(total, dim)
+        )
+        scales = None
+        if dtype == "int8":
+            scales = np.lib.format.open_memmap(
+                os.path.join(store_dir, cls.SCALES_FILE), mode="w+", dtype=np.float16, shape=(total,)
+            )
+        rows = []
+        offset = 0
+        for page_num, emb in flat:
+            n_tokens = emb.shape[0]
+            emb = emb.detach().cpu()
+            if dtype == "float16":
+                vectors[offset:offset + n_tokens] = emb.to(torch.float16).numpy()
+            elif dtype == "bfloat16":
+                vectors[offset:offset + n_tokens] = emb.to(torch.bfloat16).view(torch.int16).numpy()
+            else:
+                codes, token_scales = cls._quantize_int8(emb)
+                vectors[offset:offset + n_tokens] = codes.numpy()
+                scales[offset:offset + n_tokens] = token_scales.numpy()
+            rows.append([int(page_num), offset, n_tokens])
+            offset += n_tokens
+        vectors.flush()
+        del vectors
+        if scales is not None:
+            scales.flush()
+            del scales
+
+        with open(os.path.join(store_dir, cls.INDEX_FILE), "w") as f:
+            json.dump({"dtype": dtype, "dim": dim, "pages": rows}, f)
+
+    @staticmethod
+    def _quantize_int8(vectors: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        (n, dim) float vectors → ((n, dim) int8 codes, (n,) float16 scales).
+        """
+        vectors = vectors.float()
+        scales = (vectors.abs().amax(dim=-1) / 127.0).to(torch.float16).clamp(min=torch.finfo(torch.float16).tiny)
+        codes = torch.round(vectors / scales.float().unsqueeze(-1)).clamp(-127, 127).to(torch.int8)
+        return codes, scales
+
+    @classmethod
+    def _load_vectors(cls, store_dir: str):
+        """
+        Memory-map the store, returning the (total_tokens, dim) tensor and the index dict.
+        """
+        with open(os.path.join(store_dir, cls.INDEX_FILE), "r") as f:
+            index = json.load(f)
+
+        # Copy-on-write mapping: writable views for torch.from_numpy, never written back
+        vectors = np.load(os.path.join(store_dir, cls.VECTORS_FILE), mmap_mode="c")
+        tensor = torch.from_numpy(vectors)
+        if index["dtype"] == "bfloat16":
+            tensor = tensor.view(torch.bfloat16)
+        return tensor, index
+
+    @classmethod
+    def load(cls, store_dir: str) -> List[Tuple[int, torch.Tensor]]:
+        """
+        Memory-map the store and return (page_num, tensor) pairs, each tensor a
+        (1, n_tokens, dim) view into the mapped array (for int8, a float16 page
+        dequantized from it).
+        """
+        tensor, index = cls._load_vectors(store_dir)
+        if index["dtype"] == "int8":
+            scales = torch.from_numpy(np.load(os.path.join(store_dir, cls.SCALES_FILE), mmap_mode="c"))
+            return [
+                (
+                    page_num,
+                    (tensor[offset:offset + n_tokens].float()
+                     * scales[offset:offset + n_tokens].float().unsqueeze(-1)).to(torch.float16).unsqueeze(0),
+                )
+                for page_num, offset, n_tokens in index["pages"]
+            ]
+        return [
+            (page_num, tensor[offset:offset + n_tokens].unsqueeze(0))
+            for page_num, offset, n_tokens in index["pages"]
+        ]
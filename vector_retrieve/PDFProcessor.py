@@ -1,136 +1,515 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import fitz  # PyMuPDF
-from PIL import Image
+from PIL import Image, ImageOps
 import torch
-from common import CallableComponent, ExtractionState
+from common import CallableComponent, ExtractionState, PageStore
+from vector_retrieve.PageCache import PageCache
+from vector_retrieve.QueryEmbeddingCache import QueryEmbeddingCache
+from vector_retrieve.EmbeddingStore import EmbeddingStore
+from vector_retrieve.TokenPooler import TokenPooler
+from vector_retrieve.PageStream import PageStream
+
+
+def _render_page_range(pdf_path, start, stop, dpi=72):
+    """
+    Render task: render pages [start, stop) of `pdf_path` to raw RGB buffers.
+    Each task opens its own fitz document, since a document must not be shared across threads.
+    No image codec is involved; the caller wraps the buffers with Image.frombytes.
+
+    Returns:
+        list of tuples: (page_num, (width, height), rgb_bytes) for each rendered page, 1-indexed.
+    """
+    doc = fitz.open(pdf_path)
+    pages = []
+    try:
+        for page_num in range(start, stop):
+            page = doc.load_page(page_num)
+            pix = page.get_pixmap(dpi=dpi, alpha=False)
+            pages.append((page_num + 1, (pix.width, pix.height), pix.samples))
+    finally:
+        doc.close()
+    return pages
 
 
 class PDFProcessor(CallableComponent):
     """
     A class for processing PDFs and generating embeddings for their pages.
     
-    This class extracts pages as images from a PDF, saves them to a temporary directory,
-    generates embeddings for those images using the ColPali model, and retrieves the most 
-    relevant pages based on a text query.
+    This class renders the pages of a PDF into an in-memory PageStore, generates embeddings
+    for those images using the ColPali model (cached on disk by PageCache), and retrieves
+    the most relevant pages based on a text query.
     """
-    def __init__(self, colpali_infer, checkbox_infer=None, override=False):
+    def __init__(
+        self,
+        colpali_infer,
+        checkbox_infer=None,
+        override=False,
+        render_workers=1,
+        render_dpi=72,
+        cache_dir="./tmp/page_cache",
+        cache_max_gb=None,
+        page_store_max_mb=None,
+        query_cache_dir="./tmp/query_cache",
+        embedding_dtype="float16",
+        token_pool_factor=None,
+        embedding_dpi=None,
+        checkbox_dpi=None,
+        vlm_dpi=None,
+        vlm_crop_to_content=False,
+        vlm_crop_padding=16,
+        stream_queue_pages=16,
+        stream_chunk_pages=4,
+    ):
         """
         Initializes the PDFProcessor by creating an instance of ColPaliInfer.
+
+        Args:
+            override (bool): Ignore cached renders and embeddings and recompute them.
+            render_workers (int): Number of threads used to rasterize pages (PyMuPDF releases the GIL
+                while rendering). 1 renders serially on the calling thread.
+            render_dpi (int): Resolution pages are rendered at (72 is PyMuPDF's default).
+            cache_dir (str): Root of the shared page/embedding cache.
+            cache_max_gb (float): Size cap of the cache; least-recently-used documents are evicted beyond it.
+            page_store_max_mb (float): Memory budget for decoded page images per document; pages beyond
+                it are spilled to disk. None keeps every page in memory.
+            query_cache_dir (str): Directory of the persistent query-embedding cache. None disables it.
+            embedding_dtype (str): On-disk precision of page embeddings, "float16", "bfloat16" or
+                "int8" (half the size, dequantized to float16 page by page on load).
+            token_pool_factor (float): Pool each page's patch vectors down to 1 / token_pool_factor
+                of their count before storing them (see TokenPooler). None keeps every vector.
+            embedding_dpi (int): Resolution of the pages embedded by ColPali. None uses render_dpi.
+            checkbox_dpi (int): Resolution of the pages searched for checkboxes. None uses render_dpi.
+            vlm_dpi (int): Resolution of the pages sent to the VLM. None uses render_dpi.
+            vlm_crop_to_content (bool): Trim blank page margins from the VLM images, so the
+                image tokens are spent on content.
+            vlm_crop_padding (int): Pixels of margin kept around the content when cropping.
+            stream_queue_pages (int): Capacity of each stage queue of stream(), in pages.
+            stream_chunk_pages (int): Pages per render task of stream() with render_workers > 1.
         """
         super().__init__()
         self.colpali_infer = colpali_infer
         self.override = override
         self.checkbox_infer = checkbox_infer
+        self.render_workers = max(1, int(render_workers or 1))
+        self.render_dpi = render_dpi
+        self.embedding_dpi = embedding_dpi or render_dpi
+        self.checkbox_dpi = checkbox_dpi or render_dpi
+        self.vlm_dpi = vlm_dpi or render_dpi
+        self.vlm_crop_to_content = vlm_crop_to_content
+        self.vlm_crop_padding = vlm_crop_padding
+        self.stream_queue_pages = max(1, int(stream_queue_pages))
+        self.stream_chunk_pages = max(1, int(stream_chunk_pages))
+        max_bytes = int(cache_max_gb * 2**30) if cache_max_gb else None
+        self.page_cache = PageCache(cache_dir, max_bytes=max_bytes)
+        self.cache_dir = cache_dir
+        self.page_store_max_bytes = int(page_store_max_mb * 2**20) if page_store_max_mb else None
+        self.query_cache_dir = query_cache_dir
+        self.embedding_dtype = embedding_dtype
+        self.token_pooler = TokenPooler(token_pool_factor) if token_pool_factor and token_pool_factor > 1 else None
+        self._query_cache = None
+        self._render_pool = None
+        self._render_pool_lock = threading.Lock()
 
     def __call__(self, pdf_path: str):
         # populate state
-        ExtractionState.images = self.pdf_to_images(pdf_path)
-        ExtractionState.embeddings = self.generate_embeddings(ExtractionState.images)
-        if ExtractionState.extraction_items.has_checkbox_items():
-            ExtractionState.checkboxes = self.process_checkboxes(ExtractionState.images)
+        doc_key = self.page_cache.document_key(pdf_path)
+        with_checkboxes = ExtractionState.get_extraction_items().has_checkbox_items()
+        # On a cache hit, pages are not rendered for ColPali at all
+        embeddings = self.cached_embeddings(doc_key)
+        stores = self.pdf_to_images(pdf_path, with_checkboxes=with_checkboxes, with_embedding=embeddings is None)
+        ExtractionState.set_images(stores["vlm"])
+        if embeddings is None:
+            embeddings = self.generate_embeddings(stores["embedding"], doc_key)
+        ExtractionState.set_embeddings(embeddings)
+        if with_checkboxes:
+            ExtractionState.set_checkboxes(self.process_checkboxes(stores["checkbox"]))
+        # Only the VLM pages are needed from here on
+        for store in {id(store): store for store in stores.values()}.values():
+            if store is not stores["vlm"]:
+                store.clear()
+
+    def stream(self, pdf_path: str, on_finish=None) -> PageStream:
+        """
+        Start ingesting `pdf_path` in the background (see PageStream): pages are rendered,
+        embedded and searched for checkboxes stage by stage over bounded queues. The VLM
+        PageStore is put in state right away and fills as pages are rendered, so items with
+        known pages can be extracted before ingestion ends. Call finish_stream() to
+        publish the embeddings and checkboxes once it is done.
+        """
+        with_checkboxes = ExtractionState.get_extraction_items().has_checkbox_items()
+        stream = PageStream(
+            self,
+            pdf_path,
+            self.page_cache.document_key(pdf_path),
+            with_checkboxes,
+            queue_pages=self.stream_queue_pages,
+            chunk_pages=self.stream_chunk_pages,
+            on_finish=on_finish,
+        )
+        ExtractionState.set_images(stream.images)
+        return stream.start()
+
+    def finish_stream(self, stream: PageStream):
+        """
+        Wait for a stream() to finish and publish its results like __call__ does.
+        """
+        stream.wait()
+        ExtractionState.set_embeddings(stream.embeddings)
+        if stream.checkboxes:
+            ExtractionState.set_checkboxes(stream.checkboxes)
+        # Only the VLM pages are needed from here on
+        for store in {id(store): store for store in stream.stores.values()}.values():
+            if store is not stream.images:
+                store.clear()
 
     def process_checkboxes(self, images):
         """
         Process images to detect checkboxes if checkbox items are present in extraction items.
         
         Args:
-            images (list): List of tuples containing page number and image path
+            images (PageStore): Page number → decoded page image
             
         Returns:
             dict: Dictionary with page numbers as keys and checkbox details as values
         """
         checkboxes = {}
         if self.checkbox_infer:
-            for page_num, image_path in images:
-                checkbox_list = self.checkbox_infer.infer(image_data=image_path)
-                if checkbox_list:
-                    checkboxes[page_num] = {
-                        'image_path': image_path,
-                        'checkbox_count': len(checkbox_list),
-                        'checkbox_data': checkbox_list,
-                    }
+            for page_num, image in images:
+                detected = self.detect_checkboxes(image)
+                if detected:
+                    checkboxes[page_num] = detected
         return checkboxes
 
+    def detect_checkboxes(self, image):
+        """
+        Checkbox details of one page image, or None if it has no checkboxes.
+        """
+        checkbox_list = self.checkbox_infer.infer(image_data=image)
+        if not checkbox_list:
+            return None
+        return {
+            'checkbox_count': len(checkbox_list),
+            'checkbox_data': checkbox_list,
+        }
+
     
-    def pdf_to_images(self, pdf_path):
+    def pdf_to_images(self, pdf_path, with_checkboxes=True, with_embedding=True):
         """
-        Converts a PDF into a list of images, one per page, and saves them to a temporary directory.
+        Converts a PDF into decoded RGB images, one PageStore per consumer resolution.
+
+        Pages are rasterized once, at the highest DPI any consumer needs; lower-resolution
+        copies are downscaled from that render rather than rendered again. Consumers at the
+        same DPI share one store. With vlm_crop_to_content, the VLM store holds its own
+        cropped copies.
 
         Args:
             pdf_path (str): Path to the PDF file.
+            with_checkboxes (bool): Whether checkbox detection needs its pages.
+            with_embedding (bool): Whether ColPali needs its pages (False when the
+                embeddings are cached).
 
         Returns:
-            list of tuples: Each tuple contains the page number (int) and the file path (str) to the saved image.
+            dict: "vlm", and "embedding" / "checkbox" if requested → PageStore, each an
+            iterable of (page_num, PIL.Image.Image) tuples ordered by page number.
         """
-        pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
-        # Open the PDF
+        num_pages = self.count_pages(pdf_path)
+        stores, by_dpi, source_dpi = self._page_stores(with_checkboxes, with_embedding)
+        for page_num, size, samples in self._render_pages(pdf_path, num_pages, source_dpi):
+            self._add_page(by_dpi, source_dpi, page_num, size, samples)
+        return stores
+
+    def count_pages(self, pdf_path):
         doc = fitz.open(pdf_path)
-        images = []
+        num_pages = len(doc)
+        doc.close()
+        self.logger.info(f"total number of pages in PDF: {num_pages}")
+        return num_pages
+
+    def _page_stores(self, with_checkboxes, with_embedding=True):
+        """
+        Empty PageStores per consumer (consumers at the same DPI share one) and the DPI
+        pages must be rendered at.
+
+        Returns:
+            tuple: (consumer → PageStore, (dpi, cropped) → PageStore, source_dpi)
+        """
+        consumer_dpis = {"vlm": self.vlm_dpi}
+        if with_embedding:
+            consumer_dpis["embedding"] = self.embedding_dpi
+        if with_checkboxes:
+            consumer_dpis["checkbox"] = self.checkbox_dpi
+        source_dpi = max(consumer_dpis.values())
+
+        stores = {}
+        by_dpi = {}
+        for consumer, dpi in consumer_dpis.items():
+            cropped = consumer == "vlm" and self.vlm_crop_to_content
+            key = (dpi, cropped)
+            if key not in by_dpi:
+                by_dpi[key] = PageStore(
+                    max_bytes=self.page_store_max_bytes,
+                    spill_root=os.path.join(self.cache_dir, "spill"),
+                )
+            stores[consumer] = by_dpi[key]
+        return stores, by_dpi, source_dpi
 
-        self.logger.info(f"total number of pages in PDF: {len(doc)}")
-        # Create a unique temporary directory using uuid
-        tmp_dir = os.path.join("./tmp", pdf_name)
+    def _add_page(self, by_dpi, source_dpi, page_num, size, samples):
+        """
+        Wrap one rendered page and add its copy at each store's DPI (cropped for the VLM if enabled).
+        """
+        image = Image.frombytes("RGB", size, samples)
+        for (dpi, cropped), store in by_dpi.items():
+            page_image = self._resize_to_dpi(image, source_dpi, dpi)
+            if cropped:
+                page_image = self._crop_to_content(page_image, self.vlm_crop_padding)
+            store.add(page_num, page_image)
 
-        if not self.override and os.path.exists(tmp_dir):
-            for page_num, page in enumerate(doc):
-                file_path = os.path.join(tmp_dir, f"page_{page_num + 1}.png")
-                images.append((page_num + 1, file_path))
-            return images
+    @staticmethod
+    def _resize_to_dpi(image, source_dpi, dpi):
+        if dpi == source_dpi:
+            return image
+        scale = dpi / source_dpi
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        return image.resize(size, Image.Resampling.LANCZOS)
 
-        os.makedirs(tmp_dir, exist_ok=True)
-        # Process each page in the PDF
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            pix = page.get_pixmap()
-            file_path = os.path.join(tmp_dir, f"page_{page_num + 1}.png")
-            pix.save(file_path)
-            images.append((page_num + 1, file_path))
-        return images
+    @staticmethod
+    def _crop_to_content(image, padding=16, threshold=16):
+        """
+        Crop `image` to the bounding box of its non-blank pixels plus `padding`.
+        Pixels within `threshold` of white count as blank; a blank page is returned as is.
+        """
+        ink = ImageOps.invert(image.convert("L")).point(lambda v: 255 if v > threshold else 0)
+        bbox = ink.getbbox()
+        if bbox is None:
+            return image
+        left, top, right, bottom = bbox
+        return image.crop((
+            max(0, left - padding),
+            max(0, top - padding),
+            min(image.width, right + padding),
+            min(image.height, bottom + padding),
+        ))
+
+    @property
+    def render_pool(self):
+        """
+        Thread pool shared by every render of this processor, created on first use.
+        Threads rather than processes: forking a process that already runs model and
+        scheduler threads is unsafe, and spawning re-imports torch in every worker.
+        """
+        if self._render_pool is None:
+            with self._render_pool_lock:
+                if self._render_pool is None:
+                    self._render_pool = ThreadPoolExecutor(
+                        max_workers=self.render_workers, thread_name_prefix="pdf-render"
+                    )
+        return self._render_pool
 
-    def generate_embeddings(self, images):
+    def iter_rendered_pages(self, pdf_path, num_pages, dpi=None, chunk_pages=None):
         """
-        Generates embeddings for a list of page images stored as file paths.
+        Render pages to raw RGB buffers at `dpi` (render_dpi if None), yielding them in page
+        order as they are rendered. With render_workers > 1, the page range is cut into
+        contiguous chunks of `chunk_pages` (an even share per worker if None) rendered on
+        render_pool.
+
+        Yields:
+            tuple: (page_num, (width, height), rgb_bytes)
+        """
+        dpi = dpi or self.render_dpi
+        workers = min(self.render_workers, num_pages)
+        if workers <= 1:
+            for page_num in range(num_pages):
+                yield from _render_page_range(pdf_path, page_num, page_num + 1, dpi)
+            return
+
+        # Contiguous chunks keep each task's page loads sequential within its own document
+        chunk = max(1, int(chunk_pages or -(-num_pages // workers)))
+        futures = [
+            self.render_pool.submit(_render_page_range, pdf_path, start, min(start + chunk, num_pages), dpi)
+            for start in range(0, num_pages, chunk)
+        ]
+        try:
+            # Collect in submission order so pages come out sorted by page number
+            for future in futures:
+                yield from future.result()
+        finally:
+            # The pool outlives this document; drop the chunks nobody will read
+            for future in futures:
+                future.cancel()
+
+    def _render_pages(self, pdf_path, num_pages, dpi=None):
+        """
+        Render all pages at once (see iter_rendered_pages()).
+
+        Returns:
+            list of tuples: (page_num, (width, height), rgb_bytes), ordered by page number.
+        """
+        return list(self.iter_rendered_pages(pdf_path, num_pages, dpi))
+
+    def generate_embeddings(self, images, doc_key):
+        """
+        Generates embeddings for the page images of a document.
+
+        Embeddings are cached per (document hash, embedding DPI, embedding model) as one
+        EmbeddingStore: a contiguous float16/bfloat16 (or int8 + scales) array plus an
+        offsets index, which is memory-mapped on load. On a miss, pages are sent to ColPaliInfer in batches of
+        `colpali_infer.batch_size` (settings.yml → ColPaliInfer → args → batch_size).
+        With token_pool_factor set, each page's vectors are pooled by TokenPooler before
+        storing, under a separate cache key.
 
         Args:
-            images (list of tuples): Each tuple contains a page number (int) and an image file path (str).
+            images (PageStore): Iterable of (page number, PIL image) tuples.
+            doc_key (str): Content hash of the PDF the pages belong to.
 
         Returns:
-            list of tuples: Each tuple contains the page number (int) and its embedding (torch.Tensor).
+            list of tuples: Each tuple contains the page number (int) and its embedding (torch.Tensor),
+            a view into the memory-mapped store.
         """
+        cached = self.cached_embeddings(doc_key)
+        if cached is not None:
+            return cached
+
+        pages = images.pages()
         embeddings = []
-        for page_num, image_path in images:
-            # Open the image file
-            image = Image.open(image_path).convert("RGB")
-            # Get the image embedding using ColPaliInfer
-            if not self.override:
-                pickle_path = image_path.replace('.png', '.pkl')
-                if os.path.exists(pickle_path):
-                    with open(pickle_path, 'rb') as f:
-                        embedding = torch.load(f)
-                    embeddings.append((page_num, embedding.cpu()))
-                    continue
-
-            embedding = self.colpali_infer.get_image_embedding(image)
-            # If embedding has shape (1, embed_dim), squeeze to (embed_dim,)
-            if embedding.dim() == 2 and embedding.shape[0] == 1:
-                embedding = embedding.squeeze(0)
-
-            # Save embedding as pickle file
-            pickle_path = image_path.replace('.png', '.pkl')
-            with open(pickle_path, 'wb') as f:
-                torch.save(embedding, f)
-
-            embeddings.append((page_num, embedding.cpu()))
-
-        return embeddings
+        batch_size = getattr(self.colpali_infer, "batch_size", 1)
+        for start in range(0, len(pages), batch_size):
+            chunk = pages[start:start + batch_size]
+            # Page images are handed to ColPali straight from the store, without copying
+            embeddings.extend(self.embed_pages(chunk, [images.get(page_num) for page_num in chunk]))
+        return self.store_embeddings(doc_key, embeddings)
+
+    def cached_embeddings(self, doc_key):
+        """
+        The document's cached page embeddings, or None on a miss (or with override).
+        """
+        self.page_cache.touch(doc_key)
+        store_dir = self._embedding_dir(doc_key)
+        if not self.override and EmbeddingStore.exists(store_dir):
+            self.logger.info(f"Loading cached embeddings for {doc_key[:12]}")
+            return EmbeddingStore.load(store_dir)
+        return None
+
+    def embed_pages(self, page_nums, page_images):
+        """
+        Embed one batch of pages with ColPali (token-pooled if enabled).
+
+        Returns:
+            list of tuples: (page number, CPU embedding tensor)
+        """
+        batch_size = getattr(self.colpali_infer, "batch_size", 1)
+        page_embeddings = self.colpali_infer.get_image_embeddings(page_images, batch_size=batch_size)
+        if self.token_pooler is not None:
+            page_embeddings = [self.token_pooler.pool(embedding) for embedding in page_embeddings]
+        return [(page_num, embedding.cpu()) for page_num, embedding in zip(page_nums, page_embeddings)]
+
+    def store_embeddings(self, doc_key, embeddings):
+        """
+        Write freshly computed embeddings to the page cache and return the memory-mapped copy.
+        """
+        store_dir = self._embedding_dir(doc_key)
+        staging = self.page_cache.staging_dir(store_dir)
+        EmbeddingStore.write(staging, embeddings, dtype=self.embedding_dtype)
+        self.page_cache.publish(staging, store_dir, replace=self.override)
+        self.page_cache.evict()
+        # Serve the mapped copy so the freshly computed tensors can be released
+        return EmbeddingStore.load(store_dir)
+
+    def _embedding_dir(self, doc_key):
+        variant = f"pool{self.token_pooler.pool_factor:g}" if self.token_pooler is not None else None
+        return self.page_cache.embedding_dir(doc_key, self.embedding_dpi, self.colpali_infer.model_name, variant)
+
+    @property
+    def query_cache(self):
+        """
+        QueryEmbeddingCache for the embedding model, created on first use; None if disabled.
+        """
+        if self._query_cache is None and self.query_cache_dir:
+            self._query_cache = QueryEmbeddingCache(self.colpali_infer.model_name, self.query_cache_dir)
+        return self._query_cache
+
+    def embed_queries(self, queries):
+        """
+        Embed retrieval queries, consulting the persistent query cache before ColPali.
+        """
+        if self.query_cache is None:
+            return self.colpali_infer.get_text_embeddings(queries)
+        return self.query_cache.embed(queries, self.colpali_infer.get_text_embeddings)
+
+    def warm_query_cache(self, queries):
+        """
+        Load or precompute the embeddings of `queries`, e.g. every query of a de_config.
+        """
+        if self.query_cache is not None and queries:
+            self.query_cache.warm(queries, self.colpali_infer.get_text_embeddings)
+
+    def score_pages(self, embeddings, query_embeddings):
+        """
+        Score every query against every page in a single score_multi_vector call.
+
+        Args:
+            embeddings (list of tuples): (page number, embedding) for each page.
+            query_embeddings (list of torch.Tensor): One (n_tokens, embed_dim) tensor per query.
+
+        Returns:
+            torch.Tensor: MaxSim scores of shape (num_queries, num_pages), pages in `embeddings` order.
+        """
+        device = self.colpali_infer.model.device
+        dtype = query_embeddings[0].dtype
+        # One (n_tokens, embed_dim) tensor per page; pages may differ in token count
+        # (batched embeddings are trimmed to their unpadded length), so score_multi_vector
+        # receives lists and pads internally. Stored pages are cast to the query dtype.
+        page_embeddings = [emb.squeeze(0).to(device=device, dtype=dtype) for _, emb in embeddings]
+        query_embeddings = [q.to(device) for q in query_embeddings]
+        return self.colpali_infer.processor.score_multi_vector(query_embeddings, page_embeddings)
+
+    def retrieve_relevant_pages_batch(self, embeddings, queries, top_k=3, page_filters=None):
+        """
+        Retrieves the top relevant pages for many queries at once.
+
+        Queries missing from the persistent query cache are embedded in batches, then the
+        whole query × page score matrix is computed with one score_multi_vector call.
+
+        Args:
+            embeddings (list of tuples): Each tuple contains the page number (int) and its embedding (torch.Tensor).
+            queries (list of str): The text queries to evaluate.
+            top_k (int): The number of top relevant pages to return per query.
+            page_filters (list): Optional per-query set of allowed page numbers; None allows every page.
+
+        Returns:
+            list of list of int: For each query, page numbers sorted by relevance.
+        """
+        if not queries:
+            return []
+
+        query_embeddings = self.embed_queries(queries)
+        scores = self.score_pages(embeddings, query_embeddings).float().cpu()
+        return self._top_pages(scores, [page_num for page_num, _ in embeddings], top_k, page_filters)
+
+    @staticmethod
+    def _top_pages(scores, page_nums, top_k, page_filters=None):
+        """
+        Per query row of `scores`, the top_k page numbers among that query's allowed pages.
+        """
+        results = []
+        for qi in range(scores.shape[0]):
+            row = scores[qi]
+            allowed = page_filters[qi] if page_filters else None
+            if allowed:
+                keep = torch.tensor([p in allowed for p in page_nums])
+                row = row.masked_fill(~keep, float("-inf"))
+                k = min(top_k, int(keep.sum()))
+            else:
+                k = min(top_k, len(page_nums))
+            top_indices = torch.topk(row, k).indices.tolist()
+            results.append([page_nums[i] for i in top_indices])
+        return results
 
     def retrieve_relevant_pages(self, embeddings, query, top_k=3):
         """
         Retrieves the top relevant pages for a given query using similarity scores.
 
-        This method generates a text embedding for the query, stacks the page embeddings,
-        and uses the processor's `score_multi_vector` method to compute similarity scores.
-
         Args:
             embeddings (list of tuples): Each tuple contains the page number (int) and its embedding (torch.Tensor).
             query (str): The text query to evaluate.
@@ -139,24 +518,4 @@ class PDFProcessor(CallableComponent):
         Returns:
             list of int: The page numbers of the most relevant pages, sorted by relevance.
         """
-        # Get the query embedding (shape: (1, embed_dim))
-        query_embedding = self.colpali_infer.get_text_embedding(query)
-        if query_embedding.dim() == 2 and query_embedding.shape[0] == 1:
-            query_embedding = query_embedding.squeeze(0).unsqueeze(0)  # Ensure shape remains (1, embed_dim)
-        
-        # Stack all page embeddings to form a tensor of shape (num_pages, embed_dim)
-        page_embeddings = torch.stack([emb for _, emb in embeddings], dim=0).to(self.colpali_infer.model.device)
-        page_embeddings = page_embeddings.squeeze(1)
-
-        # Compute similarity scores using the processor's score_multi_vector method.
-        # Expected shape for a single query: (1, num_pages)
-        scores = self.colpali_infer.processor.score_multi_vector(query_embedding, page_embeddings)
-        scores = scores.squeeze(0)  # Now shape: (num_pages,)
-
-        # Sort scores in descending order and get indices of top_k scores.
-        sorted_scores, indices = torch.sort(scores, descending=True)
-        top_indices = indices[:top_k]
-
-        # Map indices back to the corresponding page numbers.
-        relevant_pages = [embeddings[i][0] for i in top_indices]
-        return relevant_pages
+        return self.retrieve_relevant_pages_batch(embeddings, [query], top_k)[0]
@@ -0,0 +1,169 @@
+import os
+import re
+import glob
+import time
+import uuid
+import shutil
+import hashlib
+from common import BaseComponent
+
+
+class PageCache(BaseComponent):
+    """
+    Content-addressed on-disk cache for page embeddings.
+
+    Entries are keyed by the SHA-256 of the PDF bytes, so identical documents
+    share an entry whatever their file name, and different documents with the
+    same name never collide. Inside an entry, embeddings are keyed by the render
+    DPI they were computed from and by the embedding model name, and stored as
+    one EmbeddingStore per document:
+
+        <cache_dir>/<sha256>/dpi<dpi>/<model>/{vectors.npy, index.json}
+
+    Rendered pages themselves are not cached; they live in memory (see
+    common.PageStore). Stores are built in a staging directory and renamed into
+    place, so several workers can share one cache directory. Whole entries are
+    evicted least-recently-used first once the cache grows beyond `max_bytes`;
+    staging directories left behind by a crashed worker are swept by evict().
+    """
+
+    _ACCESS_MARKER = ".last_access"
+    # Entry directories are named by a document's SHA-256; anything else under
+    # cache_dir (e.g. PageStore spill directories) is not an entry
+    _ENTRY_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+    def __init__(self, cache_dir="./tmp/page_cache", max_bytes=None, eviction_grace_seconds=300):
+        """
+        Args:
+            cache_dir (str): Root directory of the cache.
+            max_bytes (int): Size cap for the whole cache. None disables eviction.
+            eviction_grace_seconds (int): Entries accessed more recently than this are never
+                evicted, so a worker that is still reading an entry does not lose it.
+        """
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.eviction_grace_seconds = eviction_grace_seconds
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def document_key(pdf_path, chunk_size=1 << 20):
+        """
+        Return the SHA-256 hex digest of the PDF file contents.
+        """
+        digest = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def entry_dir(self, doc_key):
+        return os.path.join(self.cache_dir, doc_key)
+
+    def render_dir(self, doc_key, dpi):
+        return os.path.join(self.entry_dir(doc_key), f"dpi{dpi}")
+
+    def embedding_dir(self, doc_key, dpi, model_name, variant=None):
+        """
+        Directory of a document's page embeddings for one model. `variant` (e.g. "pool3"
+        for token-pooled embeddings) keeps post-processed stores apart from the raw ones.
+        """
+        model_slug = model_name.replace("/", "__")
+        if variant:
+            model_slug = f"{model_slug}.{variant}"
+        return os.path.join(self.render_dir(doc_key, dpi), model_slug)
+
+    def staging_dir(self, path):
+        """
+        Create and return a private sibling directory of `path` to build into before publish().
+        """
+        staging = f"{path}.{uuid.uuid4().hex}.partial"
+        os.makedirs(staging)
+        return staging
+
+    def publish(self, staging, path, replace=False):
+        """
+        Atomically rename a finished staging directory to `path`. If another worker
+        published it first, the staging copy is discarded, unless `replace` is set.
+        """
+        if replace:
+            shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.rename(staging, path)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def touch(self, doc_key):
+        """
+        Record an access to the entry, used as its recency for LRU eviction.
+        """
+        marker = os.path.join(self.entry_dir(doc_key), self._ACCESS_MARKER)
+        os.makedirs(os.path.dirname(marker), exist_ok=True)
+        with open(marker, "a"):
+            os.utime(marker, None)
+
+    def _last_access(self, entry_path):
+        marker = os.path.join(entry_path, self._ACCESS_MARKER)
+        try:
+            return os.path.getmtime(marker)
+        except OSError:
+            return os.path.getmtime(entry_path)
+
+    @staticmethod
+    def _dir_size(path):
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    # File removed concurrently by another worker
+                    continue
+        return total
+
+    def _sweep_staging(self):
+        """
+        Remove staging directories older than the eviction grace period, i.e. left behind
+        by a worker that died before publish().
+        """
+        now = time.time()
+        pattern = os.path.join(self.cache_dir, "*", "*", "*.partial")
+        for staging in glob.glob(pattern):
+            name = os.path.relpath(staging, self.cache_dir).split(os.sep)[0]
+            if not self._ENTRY_NAME.match(name):
+                continue
+            try:
+                stale = now - os.path.getmtime(staging) >= self.eviction_grace_seconds
+            except OSError:
+                # Published or removed concurrently
+                continue
+            if stale:
+                self.logger.info(f"Removing stale staging directory {staging}")
+                shutil.rmtree(staging, ignore_errors=True)
+
+    def evict(self):
+        """
+        Remove stale staging directories, then least-recently-used entries until the
+        cache fits in max_bytes. Only document entries are considered; other directories
+        are neither counted nor removed.
+        """
+        self._sweep_staging()
+        if not self.max_bytes:
+            return
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if self._ENTRY_NAME.match(name) and os.path.isdir(path):
+                entries.append((self._last_access(path), self._dir_size(path), path))
+
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        for last_access, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if now - last_access < self.eviction_grace_seconds:
+                continue
+            self.logger.info(f"Evicting cache entry {path} ({size / 2**20:.1f} MiB)")
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
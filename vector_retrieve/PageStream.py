@@ -0,0 +1,216 @@
+import queue
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from common import BaseComponent
+
+
+class PageStream(BaseComponent):
+    """
+    Background, streaming ingestion of one document:
+
+        render ──▶ [bounded queue] ──▶ embed (ColPali, batched)
+               └─▶ [bounded queue] ──▶ detect (YOLO checkboxes)
+
+    Each stage runs on its own thread. Pages flow from rendering into embedding and
+    checkbox detection as soon as they are rendered, instead of each stage waiting for
+    the whole document. The bounded queues keep rendering at most `queue_pages` pages
+    ahead of the slower stages. Consumers can wait for specific pages to be rendered
+    (wait_pages()), e.g. to start extracting an item with known probable_pages while
+    the rest of the document is still being ingested, or for the whole ingestion (wait()).
+
+    Stage threads never touch ExtractionState; PDFProcessor.finish_stream() publishes
+    the results from the caller's context.
+    """
+
+    _DONE = None  # end-of-stream marker on the stage queues
+
+    def __init__(
+        self,
+        pdf_processor,
+        pdf_path: str,
+        doc_key: str,
+        with_checkboxes: bool,
+        queue_pages: int = 16,
+        chunk_pages: int = 4,
+        on_finish: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Args:
+            pdf_processor: The PDFProcessor whose render/embed/detect steps the stages run.
+            pdf_path: PDF to ingest.
+            doc_key: Content hash of the PDF (PageCache.document_key).
+            with_checkboxes: Whether to run checkbox detection.
+            queue_pages: Capacity of each stage queue, in pages.
+            chunk_pages: Pages per render task when rendering on the render pool.
+            on_finish: Called once every stage has finished, successfully or not.
+        """
+        super().__init__()
+        self.pdf_processor = pdf_processor
+        self.pdf_path = pdf_path
+        self.doc_key = doc_key
+        self.chunk_pages = chunk_pages
+        self.on_finish = on_finish
+
+        # Cached embeddings make the embedding stage (and its pages) unnecessary
+        self.embeddings = pdf_processor.cached_embeddings(doc_key)
+        self.stores, self._by_dpi, self._source_dpi = pdf_processor._page_stores(
+            with_checkboxes, with_embedding=self.embeddings is None
+        )
+        self.num_pages = pdf_processor.count_pages(pdf_path)
+        self.checkboxes: Dict[int, dict] = {}
+
+        self._embed_queue = queue.Queue(maxsize=queue_pages) if self.embeddings is None else None
+        self._checkbox_queue = (
+            queue.Queue(maxsize=queue_pages) if with_checkboxes and pdf_processor.checkbox_infer else None
+        )
+        self._rendered = set()
+        self._rendering_done = False
+        self._condition = threading.Condition()
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._threads: List[threading.Thread] = []
+        self._drained = set()  # stage queues whose end marker has been consumed
+
+    @property
+    def images(self):
+        """
+        The VLM's PageStore, filled as pages are rendered.
+        """
+        return self.stores["vlm"]
+
+    def start(self) -> "PageStream":
+        consumers = []
+        if self._embed_queue is not None:
+            consumers.append(self._thread(self._embed_stage, "embed"))
+        if self._checkbox_queue is not None:
+            consumers.append(self._thread(self._checkbox_stage, "detect"))
+        self._threads = consumers + [self._thread(lambda: self._render_stage(consumers), "render")]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def _thread(self, target, stage):
+        return threading.Thread(target=target, name=f"PageStream-{stage}", daemon=True)
+
+    def _fail(self, error: BaseException):
+        with self._condition:
+            if self._error is None:
+                self._error = error
+            self._condition.notify_all()
+        self._cancelled.set()
+
+    def _render_stage(self, consumers: List[threading.Thread]):
+        """
+        Render pages into the PageStores and fan them out to the stage queues; then wait
+        for the consumers and signal completion.
+        """
+        queues = [q for q in (self._embed_queue, self._checkbox_queue) if q is not None]
+        try:
+            for page_num, size, samples in self.pdf_processor.iter_rendered_pages(
+                self.pdf_path, self.num_pages, self._source_dpi, self.chunk_pages
+            ):
+                if self._cancelled.is_set():
+                    break
+                self.pdf_processor._add_page(self._by_dpi, self._source_dpi, page_num, size, samples)
+                with self._condition:
+                    self._rendered.add(page_num)
+                    self._condition.notify_all()
+                for stage_queue in queues:
+                    stage_queue.put(page_num)
+        except BaseException as e:
+            self.logger.exception(f"Rendering {self.pdf_path} failed")
+            self._fail(e)
+        finally:
+            with self._condition:
+                self._rendering_done = True
+                self._condition.notify_all()
+            for stage_queue in queues:
+                stage_queue.put(self._DONE)
+            for thread in consumers:
+                thread.join()
+            self._done.set()
+            if self.on_finish is not None:
+                self.on_finish()
+
+    def _drain(self, stage_queue: queue.Queue) -> Iterable[int]:
+        """
+        Pages from a stage queue until the end marker. After a failure the queue is still
+        drained (without yielding), so the render stage never blocks on a full queue.
+        """
+        while id(stage_queue) not in self._drained:
+            page_num = stage_queue.get()
+            if page_num is self._DONE:
+                self._drained.add(id(stage_queue))
+                return
+            if not self._cancelled.is_set():
+                yield page_num
+
+    def _embed_stage(self):
+        batch_size = getattr(self.pdf_processor.colpali_infer, "batch_size", 1)
+        store = self.stores["embedding"]
+        embeddings: List[Tuple[int, object]] = []
+        batch: List[int] = []
+        try:
+            for page_num in self._drain(self._embed_queue):
+                batch.append(page_num)
+                if len(batch) == batch_size:
+                    embeddings.extend(self.pdf_processor.embed_pages(batch, [store.get(p) for p in batch]))
+                    batch = []
+            if batch and not self._cancelled.is_set():
+                embeddings.extend(self.pdf_processor.embed_pages(batch, [store.get(p) for p in batch]))
+            if not self._cancelled.is_set():
+                self.embeddings = self.pdf_processor.store_embeddings(self.doc_key, embeddings)
+        except BaseException as e:
+            self.logger.exception(f"Embedding {self.pdf_path} failed")
+            self._fail(e)
+            for _ in self._drain(self._embed_queue):
+                pass
+
+    def _checkbox_stage(self):
+        store = self.stores["checkbox"]
+        try:
+            for page_num in self._drain(self._checkbox_queue):
+                detected = self.pdf_processor.detect_checkboxes(store.get(page_num))
+                if detected:
+                    self.checkboxes[page_num] = detected
+        except BaseException as e:
+            self.logger.exception(f"Checkbox detection on {self.pdf_path} failed")
+            self._fail(e)
+            for _ in self._drain(self._checkbox_queue):
+                pass
+
+    def wait_pages(self, pages: Iterable[int], timeout: Optional[float] = None) -> bool:
+        """
+        Block until every page in `pages` is rendered (pages past the end of the document
+        count once rendering is done). Raises the ingestion error, if any.
+
+        Returns:
+            False if `timeout` expired first, else True.
+        """
+        pages = set(pages)
+        with self._condition:
+            ready = self._condition.wait_for(
+                lambda: self._error is not None or self._rendering_done or pages <= self._rendered,
+                timeout,
+            )
+            if self._error is not None:
+                raise self._error
+        return ready
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every stage has finished. Raises the ingestion error, if any.
+        """
+        finished = self._done.wait(timeout)
+        if self._error is not None:
+            raise self._error
+        return finished
+
+    def close(self):
+        """
+        Stop ingesting (e.g. after an extraction error) and wait for the stage threads.
+        """
+        self._cancelled.set()
+        for thread in self._threads:
+            thread.join()
@@ -0,0 +1,80 @@
+import os
+import uuid
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional
+import torch
+from safetensors.torch import load_file, save_file
+from common import BaseComponent
+
+
+class QueryEmbeddingCache(BaseComponent):
+    """
+    Persistent cache of query (text) embeddings, keyed by embedding model name and query text.
+
+    The search_keys and descriptions of a de_config rarely change, so their
+    embeddings are computed once and reused across documents and processes:
+
+        <cache_dir>/<model>/<sha256(query)>.safetensors
+
+    Lookups go to an in-memory dict first, then to disk. Files are written
+    through a temporary name and os.replace, so workers can share the directory.
+    """
+
+    def __init__(self, model_name: str, cache_dir: str = "./tmp/query_cache"):
+        super().__init__()
+        self.model_name = model_name
+        self.cache_dir = os.path.join(cache_dir, model_name.replace("/", "__"))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._memory: Dict[str, torch.Tensor] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, query: str) -> str:
+        digest = hashlib.sha256(query.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.safetensors")
+
+    def get(self, query: str) -> Optional[torch.Tensor]:
+        """
+        Return the cached embedding for `query`, or None on a miss.
+        """
+        with self._lock:
+            embedding = self._memory.get(query)
+        if embedding is not None:
+            return embedding
+
+        path = self._path(query)
+        if not os.path.exists(path):
+            return None
+        embedding = load_file(path)["embedding"]
+        with self._lock:
+            self._memory[query] = embedding
+        return embedding
+
+    def put(self, query: str, embedding: torch.Tensor) -> None:
+        embedding = embedding.detach().cpu().contiguous()
+        path = self._path(query)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        save_file({"embedding": embedding}, tmp_path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._memory[query] = embedding
+
+    def embed(self, queries: List[str], embed_fn: Callable[[List[str]], List[torch.Tensor]]) -> List[torch.Tensor]:
+        """
+        Return one embedding per query, calling `embed_fn` only for the cache misses
+        (deduplicated, in one call so the model can batch them).
+        """
+        cached = {query: self.get(query) for query in set(queries)}
+        missing = [query for query, embedding in cached.items() if embedding is None]
+        if missing:
+            self.logger.info(f"Embedding {len(missing)} uncached queries ({len(cached) - len(missing)} cached)")
+            for query, embedding in zip(missing, embed_fn(missing)):
+                self.put(query, embedding)
+                cached[query] = self.get(query)
+        return [cached[query] for query in queries]
+
+    def warm(self, queries: List[str], embed_fn: Callable[[List[str]], List[torch.Tensor]]) -> None:
+        """
+        Load (or compute and persist) the embeddings of `queries` ahead of the first document.
+        """
+        self.embed(queries, embed_fn)
@@ -0,0 +1,56 @@
+import math
+import torch
+
+
+class TokenPooler:
+    """
+    Shrinks a page's multi-vector embedding by clustering similar patch vectors
+    and mean-pooling each cluster.
+
+    A page of n token vectors is reduced to ceil(n / pool_factor) vectors with
+    spherical k-means (cosine similarity). Centroids are seeded from evenly
+    spaced tokens, which follow the patch order and so cover the whole page.
+    Pooled vectors are L2-normalised like ColPali's own outputs. MaxSim cost
+    and embedding memory both shrink by about pool_factor.
+    """
+
+    def __init__(self, pool_factor: float = 2, iterations: int = 10):
+        """
+        Args:
+            pool_factor: Average number of original vectors merged into one pooled vector.
+            iterations: k-means refinement steps per page.
+        """
+        if pool_factor < 1:
+            raise ValueError(f"pool_factor must be >= 1, got {pool_factor}")
+        self.pool_factor = pool_factor
+        self.iterations = iterations
+
+    def pool(self, embedding: torch.Tensor) -> torch.Tensor:
+        """
+        Pool one page embedding of shape (n_tokens, dim) or (1, n_tokens, dim);
+        the output keeps the input's rank and dtype.
+        """
+        squeeze = embedding.dim() == 3
+        vectors = embedding.reshape(-1, embedding.shape[-1]).float()
+        n_tokens = vectors.shape[0]
+        k = max(1, math.ceil(n_tokens / self.pool_factor))
+        if k >= n_tokens:
+            return embedding
+
+        normed = torch.nn.functional.normalize(vectors, dim=-1)
+        seeds = torch.linspace(0, n_tokens - 1, k).round().long()
+        centroids = normed[seeds].clone()
+
+        for _ in range(self.iterations):
+            assignment = (normed @ centroids.T).argmax(dim=-1)
+            sums = torch.zeros_like(centroids).index_add_(0, assignment, normed)
+            counts = torch.bincount(assignment, minlength=k)
+            # Keep the previous centroid for clusters that lost all their members
+            filled = counts > 0
+            centroids[filled] = torch.nn.functional.normalize(sums[filled], dim=-1)
+
+        assignment = (normed @ centroids.T).argmax(dim=-1)
+        pooled = torch.zeros_like(centroids).index_add_(0, assignment, vectors)
+        counts = torch.bincount(assignment, minlength=k)
+        pooled = torch.nn.functional.normalize(pooled[counts > 0], dim=-1).to(embedding.dtype)
+        return pooled.unsqueeze(0) if squeeze else pooled
@@ -1 +1,6 @@
+from vector_retrieve.PageCache import PageCache
+from vector_retrieve.QueryEmbeddingCache import QueryEmbeddingCache
+from vector_retrieve.EmbeddingStore import EmbeddingStore
+from vector_retrieve.TokenPooler import TokenPooler
+from vector_retrieve.PageStream import PageStream
 from vector_retrieve.PDFProcessor import PDFProcessor
\ No newline at end of file